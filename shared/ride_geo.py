@@ -0,0 +1,148 @@
+"""
+Geodesic distance kernel shared by web-api and utils-gpx.
+
+Distances are in miles. Every function takes a ``model`` argument:
+
+- ``equirectangular``: flat-earth projection around the mean latitude.
+  Against haversine its relative error is below 1e-7 for segments up to
+  1 mile (below 1e-10 at 0.01 mile, typical of 1-second samples) anywhere
+  below 80 degrees of latitude, but it degrades with distance and must not
+  be used for long segments or across the antimeridian.
+- ``haversine``: great-circle distance on a sphere of mean Earth radius.
+  Within 0.6% of the ellipsoidal distance for any pair of points
+  (typically within 0.3%).
+- ``vincenty``: Vincenty's inverse formula on the WGS-84 ellipsoid,
+  accurate to well under a millimetre. Slowest; may fail to converge for
+  nearly antipodal points, which raises ValueError.
+- ``auto`` (the default): equirectangular for segments whose coordinate
+  deltas are small (about 0.6 miles, relative error below 5e-8), haversine
+  otherwise, which keeps the haversine error bound at a fraction of the
+  cost for dense tracks.
+
+``segment_distances`` computes every segment of a track in one pass and
+reuses per-point trigonometry, so it is the preferred way to measure a
+ride.
+"""
+
+from math import asin, atan, atan2, cos, radians, sin, sqrt, tan
+from typing import List, Sequence
+
+EARTH_RADIUS_MI = 3958.7613  # IUGG mean Earth radius (6371.0088 km)
+METERS_PER_MILE = 1609.344
+
+# WGS-84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+EQUIRECTANGULAR = 'equirectangular'
+HAVERSINE = 'haversine'
+VINCENTY = 'vincenty'
+AUTO = 'auto'
+MODELS = (EQUIRECTANGULAR, HAVERSINE, VINCENTY, AUTO)
+DEFAULT_MODEL = AUTO
+
+# Largest latitude/longitude delta (radians) measured with the
+# equirectangular approximation in auto mode: about 0.6 miles
+AUTO_MAX_DELTA = 1.5e-4
+
+def _equirectangular(phi1: float, lam1: float, phi2: float, lam2: float) -> float:
+    x = (lam2 - lam1) * cos((phi1 + phi2) / 2)
+    y = phi2 - phi1
+    return EARTH_RADIUS_MI * sqrt(x * x + y * y)
+
+def _haversine(phi1: float, lam1: float, phi2: float, lam2: float, cos1: float, cos2: float) -> float:
+    a = sin((phi2 - phi1) / 2) ** 2 + cos1 * cos2 * sin((lam2 - lam1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MI * asin(min(1.0, sqrt(a)))
+
+def _vincenty(phi1: float, lam1: float, phi2: float, lam2: float) -> float:
+    f, a, b = WGS84_F, WGS84_A, WGS84_B
+    u1 = atan((1 - f) * tan(phi1))
+    u2 = atan((1 - f) * tan(phi2))
+    sin_u1, cos_u1, sin_u2, cos_u2 = sin(u1), cos(u1), sin(u2), cos(u2)
+    l = lam2 - lam1
+    lam = l
+    for _ in range(200):
+        sin_lam, cos_lam = sin(lam), cos(lam)
+        sin_sigma = sqrt((cos_u2 * sin_lam) ** 2 + (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam) ** 2)
+        if sin_sigma == 0:
+            return 0.0  # coincident points
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / sin_sigma
+        cos2_alpha = 1 - sin_alpha ** 2
+        cos_2sigma_m = cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha if cos2_alpha else 0.0
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam_prev = lam
+        lam = l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+        )
+        if abs(lam - lam_prev) < 1e-12:
+            break
+    else:
+        raise ValueError("Vincenty formula failed to converge (nearly antipodal points)")
+    u_sq = cos2_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+    ))
+    return b * big_a * (sigma - delta_sigma) / METERS_PER_MILE
+
+def _check_model(model: str) -> None:
+    if model not in MODELS:
+        raise ValueError(f"Unknown distance model '{model}'. Expected one of: {', '.join(MODELS)}")
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float, model: str = DEFAULT_MODEL) -> float:
+    """
+    Distance in miles between two points given in decimal degrees.
+
+    Raises:
+        ValueError: If the model is unknown (or Vincenty does not converge)
+    """
+    return segment_distances((lat1, lat2), (lon1, lon2), model)[0]
+
+def segment_distances(lats: Sequence[float], lons: Sequence[float], model: str = DEFAULT_MODEL) -> List[float]:
+    """
+    Distances in miles between consecutive points of a track.
+
+    Args:
+        lats: Latitudes in decimal degrees
+        lons: Longitudes in decimal degrees, same length as lats
+        model: Distance model (see module docstring)
+
+    Returns:
+        One distance per segment (len(lats) - 1 values)
+
+    Raises:
+        ValueError: If the model is unknown (or Vincenty does not converge)
+    """
+    _check_model(model)
+    phis = [radians(lat) for lat in lats]
+    lams = [radians(lon) for lon in lons]
+    pairs = zip(phis, lams, phis[1:], lams[1:])
+    if model == EQUIRECTANGULAR:
+        return [_equirectangular(p1, l1, p2, l2) for p1, l1, p2, l2 in pairs]
+    if model == VINCENTY:
+        return [_vincenty(p1, l1, p2, l2) for p1, l1, p2, l2 in pairs]
+
+    coss = [cos(phi) for phi in phis]
+    if model == HAVERSINE:
+        return [_haversine(p1, l1, p2, l2, c1, c2)
+                for (p1, l1, p2, l2), c1, c2 in zip(pairs, coss, coss[1:])]
+    distances = []
+    for (p1, l1, p2, l2), c1, c2 in zip(pairs, coss, coss[1:]):
+        dphi, dlam = p2 - p1, l2 - l1
+        if -AUTO_MAX_DELTA < dphi < AUTO_MAX_DELTA and -AUTO_MAX_DELTA < dlam < AUTO_MAX_DELTA:
+            # Equirectangular, with the mean of the endpoint cosines standing in
+            # for the cosine of the mean latitude (they differ by ~dphi^2 / 8)
+            x = dlam * (c1 + c2) / 2
+            distances.append(EARTH_RADIUS_MI * sqrt(x * x + dphi * dphi))
+        else:
+            distances.append(_haversine(p1, l1, p2, l2, c1, c2))
+    return distances
+
+def total_distance(lats: Sequence[float], lons: Sequence[float], model: str = DEFAULT_MODEL) -> float:
+    """Total length in miles of a track (see segment_distances)"""
+    return sum(segment_distances(lats, lons, model))
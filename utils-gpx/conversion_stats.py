@@ -0,0 +1,128 @@
+"""
+Per-stage timing of GPX conversions for the --stats report.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('read', 'parse', 'points', 'stats', 'write', 'upload')
+
+class FileStats:
+    """Stage timings and size of one converted file."""
+
+    def __init__(self, path: Path):
+        self.path = str(path)
+        self.seconds: Dict[str, float] = {}
+        self.points = 0
+        self.creator: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'creator': self.creator,
+            'points': self.points,
+            'seconds': {name: round(value, 6) for name, value in self.seconds.items()},
+            'points_per_sec': rate(self.points, self.total_seconds())
+        }
+
+def stage(file_stats: Optional[FileStats], name: str) -> ContextManager[None]:
+    """Time a stage of a file's conversion, or do nothing when stats are off."""
+    return file_stats.stage(name) if file_stats is not None else nullcontext()
+
+def rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class ConversionStats:
+    """
+    Timings of a run's conversions, aggregated per stage and per GPX
+    creator (the device or app that wrote the file), so slow formats stand
+    out. Files are added from upload threads, hence the lock.
+    """
+
+    def __init__(self):
+        self.files: List[FileStats] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, file_stats: FileStats) -> None:
+        """Record a successfully converted file."""
+        with self._lock:
+            self.files.append(file_stats)
+
+    def report(self) -> Dict[str, Any]:
+        """Totals per stage and creator, throughput and peak RSS."""
+        with self._lock:
+            files = list(self.files)
+        stages = {name: sum(f.seconds.get(name, 0.0) for f in files) for name in STAGES}
+        busy = sum(stages.values())
+        points = sum(f.points for f in files)
+        creators: Dict[str, Dict[str, Any]] = {}
+        for f in files:
+            entry = creators.setdefault(f.creator or 'unknown', {'files': 0, 'points': 0, 'seconds': 0.0})
+            entry['files'] += 1
+            entry['points'] += f.points
+            entry['seconds'] += f.total_seconds()
+        for entry in creators.values():
+            entry['points_per_sec'] = rate(entry['points'], entry['seconds'])
+            entry['seconds'] = round(entry['seconds'], 6)
+        return {
+            'files': len(files),
+            'points': points,
+            'wall_seconds': round(time.perf_counter() - self.started, 6),
+            'stage_seconds': {name: round(value, 6) for name, value in stages.items() if value},
+            'points_per_sec': rate(points, busy),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'creators': creators,
+            'per_file': [f.to_dict() for f in files]
+        }
+
+    @staticmethod
+    def format_text(report: Dict[str, Any]) -> str:
+        """Human-readable form of a report."""
+        busy = sum(report['stage_seconds'].values())
+        lines = [
+            f"Conversion stats: {report['files']} files, {report['points']} points "
+            f"in {report['wall_seconds']:.2f}s wall",
+            f"{'stage':<10}{'seconds':>10}{'share':>8}"
+        ]
+        for name, seconds in report['stage_seconds'].items():
+            share = seconds / busy * 100 if busy else 0.0
+            lines.append(f"{name:<10}{seconds:>10.3f}{share:>7.1f}%")
+        lines.append(f"Throughput: {report['points_per_sec']:,.0f} points/sec")
+        peak = report['peak_rss_bytes']
+        lines.append(f"Peak RSS: {peak / (1024 * 1024):.1f} MiB" if peak is not None else "Peak RSS: unavailable")
+        if len(report['creators']) > 1:
+            lines.append("By creator:")
+            for creator, entry in sorted(report['creators'].items()):
+                lines.append(f"  {creator}: {entry['files']} files, {entry['points']} points, "
+                             f"{entry['points_per_sec']:,.0f} points/sec")
+        return '\n'.join(lines)
@@ -8,8 +8,11 @@ Uses imperial/standard units (miles, feet) for measurements.
 import gpxpy
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 import argparse
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import sys
 from utils import (
@@ -19,16 +22,30 @@ from utils import (
     format_elapsed_time,
     is_valid_speed
 )
-from models import Waypoint, RideData
+from models import Waypoint, RideData, SegmentResult, SegmentSummary, TrackPoint
+from conversion_stats import ConversionStats, FileStats, stage
+from manifest import ConversionManifest
+from uploader import RideUploader
 
-def parse_gpx_to_json(input_gpx_file: str, output_json_file: str) -> RideData:
+# Bump when a change to the conversion alters the JSON output, so the
+# manifest re-converts every file on the next run
+CONVERTER_VERSION = "2"
+DEFAULT_MANIFEST = ".gpx_manifest.json"
+# Smaller files are processed serially: shipping points to worker
+# processes costs about as much as processing them
+PARALLEL_MIN_POINTS = 20000
+
+def convert_gpx(input_gpx_file: str, show_progress: bool = True,
+                file_stats: Optional[FileStats] = None, executor: Optional[Executor] = None) -> RideData:
     """
-    Parse GPX file and convert to JSON format with additional ride metrics.
+    Parse a GPX file into ride data with additional ride metrics.
     All measurements are in imperial/standard units (miles, feet).
     
     Args:
         input_gpx_file: Path to input GPX file
-        output_json_file: Path to output JSON file
+        show_progress: Print progress to stderr for rides over 1000 points
+        file_stats: Records the time spent in each conversion stage
+        executor: Process pool for the segments of large files (see ride_from_gpx)
     
     Returns:
         Dictionary containing ride data and metrics
@@ -36,11 +53,12 @@ def parse_gpx_to_json(input_gpx_file: str, output_json_file: str) -> RideData:
     Raises:
         FileNotFoundError: If input file doesn't exist
         gpxpy.GPXException: If GPX file is invalid
-        PermissionError: If unable to write output file
     """
     try:
-        with open(input_gpx_file, 'r') as gpx_file:
-            gpx = gpxpy.parse(gpx_file)
+        with stage(file_stats, 'read'), open(input_gpx_file, 'r') as gpx_file:
+            gpx_text = gpx_file.read()
+        with stage(file_stats, 'parse'):
+            gpx = gpxpy.parse(gpx_text)
     except FileNotFoundError:
         print(f"Error: Input file '{input_gpx_file}' not found", file=sys.stderr)
         raise
@@ -51,53 +69,165 @@ def parse_gpx_to_json(input_gpx_file: str, output_json_file: str) -> RideData:
         print(f"Error reading GPX file: {str(e)}", file=sys.stderr)
         raise
 
+    return ride_from_gpx(gpx, show_progress, file_stats, executor)
+
+def ride_from_gpx(gpx: gpxpy.gpx.GPX, show_progress: bool = False,
+                  file_stats: Optional[FileStats] = None,
+                  executor: Optional[Executor] = None) -> RideData:
+    """
+    Build ride data with additional ride metrics from a parsed GPX document.
+    
+    Every track segment is processed independently (distance, elevation gain
+    and speed readings never carry across a segment boundary), then merged
+    into the ride totals in track order; per-segment summaries go in
+    ride_data['segments']. The ride is named after its first named track.
+    
+    Args:
+        gpx: Parsed GPX document
+        show_progress: Print progress to stderr for rides over 1000 points
+        file_stats: Records the time spent processing points and calculating stats
+        executor: Process pool for the segments of files with several segments
+            and at least PARALLEL_MIN_POINTS points
+    
+    Returns:
+        Dictionary containing ride data and metrics
+    """
     ride_data = create_empty_ride_data()
-    total_points = sum(len(segment.points) for track in gpx.tracks for segment in track.segments)
-    points_processed = 0
-    speed_readings = []
+    segments = [
+        (track_index, segment_index, track.name, segment.points)
+        for track_index, track in enumerate(gpx.tracks)
+        for segment_index, segment in enumerate(track.segments)
+    ]
+    total_points = sum(len(points) for _, _, _, points in segments)
+    if file_stats is not None:
+        file_stats.points = total_points
+        file_stats.creator = gpx.creator
+    ride_data['name'] = next((name for _, _, name, _ in segments if name), None)
+
+    with stage(file_stats, 'points'):
+        if executor is not None and len(segments) > 1 and total_points >= PARALLEL_MIN_POINTS:
+            # gpxpy points are slow to pickle; ship plain tuples to the workers
+            results = list(executor.map(process_segment, [
+                [TrackPoint(p.latitude, p.longitude, p.elevation, p.time) for p in points]
+                for _, _, _, points in segments
+            ]))
+        else:
+            results = []
+            done = 0
+            for _, _, _, points in segments:
+                progress = None
+                if show_progress and total_points > 1000:
+                    progress = lambda count, offset=done: print(
+                        f"\rProcessing points: {offset + count}/{total_points}", end='', file=sys.stderr)
+                results.append(process_segment(points, progress))
+                done += len(points)
+            if show_progress and total_points > 1000:
+                print(file=sys.stderr)
+
+    with stage(file_stats, 'stats'):
+        speed_readings: List[float] = []
+        for (track_index, segment_index, track_name, _), result in zip(segments, results):
+            ride_data['waypoints'].extend(result['waypoints'])
+            ride_data['total_distance_mi'] += result['distance_mi']
+            ride_data['total_elevation_gain_ft'] += result['elevation_gain_ft']
+            speed_readings.extend(result['speed_readings'])
+            ride_data['segments'].append(summarize_segment(track_index, segment_index, track_name, result))
+        calculate_ride_stats(ride_data, speed_readings)
+    return ride_data
+
+def process_segment(points: Sequence[Union[gpxpy.gpx.GPXTrackPoint, TrackPoint]],
+                    progress: Optional[Callable[[int], None]] = None) -> SegmentResult:
+    """
+    Compute the waypoints, distance, elevation gain and speed readings of one
+    track segment. Runs in pool worker processes for large files.
+    
+    Args:
+        points: The segment's track points
+        progress: Called with the number of points processed every 100 points
+    """
+    waypoints: List[Waypoint] = []
+    elevations_ft: List[float] = []
+    speed_readings: List[float] = []
+    distance_mi = 0.0
+    prev_point = None
+    prev_time = None
     last_valid_speed = 0.0
     
-    for track in gpx.tracks:
-        ride_data['name'] = track.name
+    for count, point in enumerate(points, 1):
+        waypoint, distance, speed, new_last_valid_speed = process_point(
+            point, prev_point, prev_time, last_valid_speed
+        )
+        
+        waypoints.append(waypoint)
+        distance_mi += distance
+        
+        if speed is not None:
+            speed_readings.append(speed)
+            last_valid_speed = new_last_valid_speed
         
-        for segment in track.segments:
-            prev_point = None
-            prev_time = None
-            segment_elevations_ft = []
-            
-            for point in segment.points:
-                waypoint, distance, speed, new_last_valid_speed = process_point(
-                    point, prev_point, prev_time, last_valid_speed
-                )
-                
-                ride_data['waypoints'].append(waypoint)
-                ride_data['total_distance_mi'] += distance
-                
-                if speed is not None:
-                    speed_readings.append(speed)
-                    last_valid_speed = new_last_valid_speed
-                
-                if point.elevation is not None:
-                    segment_elevations_ft.append(waypoint['elevation_ft'])
-                
-                prev_point = point
-                prev_time = point.time
-                points_processed += 1
-                
-                if total_points > 1000 and points_processed % 100 == 0:
-                    print(f"\rProcessing points: {points_processed}/{total_points}", 
-                          end='', file=sys.stderr)
-            
-            if segment_elevations_ft:
-                ride_data['total_elevation_gain_ft'] += calculate_elevation_gain(segment_elevations_ft)
-
-    if total_points > 1000:
-        print(file=sys.stderr)
-
-    calculate_ride_stats(ride_data, speed_readings)
+        if point.elevation is not None:
+            elevations_ft.append(waypoint['elevation_ft'])
+        
+        prev_point = point
+        prev_time = point.time
+        
+        if progress is not None and count % 100 == 0:
+            progress(count)
+    
+    return {
+        'waypoints': waypoints,
+        'distance_mi': distance_mi,
+        'elevation_gain_ft': calculate_elevation_gain(elevations_ft) if elevations_ft else 0.0,
+        'speed_readings': speed_readings
+    }
+
+def summarize_segment(track_index: int, segment_index: int, track_name: Optional[str],
+                      result: SegmentResult) -> SegmentSummary:
+    """Summarize a processed segment for ride_data['segments'] (waypoints are left out)."""
+    waypoints = result['waypoints']
+    start_time = waypoints[0]['timestamp'] if waypoints else None
+    end_time = waypoints[-1]['timestamp'] if waypoints else None
+    average_speed, max_speed, elapsed_time = speed_stats(
+        start_time, end_time, result['distance_mi'], result['speed_readings']
+    )
+    return {
+        'track': track_index,
+        'segment': segment_index,
+        'track_name': track_name,
+        'start_time': start_time,
+        'end_time': end_time,
+        'number_waypoints': len(waypoints),
+        'distance_mi': result['distance_mi'],
+        'elevation_gain_ft': result['elevation_gain_ft'],
+        'average_speed_mph': average_speed,
+        'max_speed_mph': max_speed,
+        'elapsed_time': elapsed_time
+    }
+
+def parse_gpx_to_json(input_gpx_file: str, output_json_file: str,
+                      file_stats: Optional[FileStats] = None, executor: Optional[Executor] = None) -> RideData:
+    """
+    Parse GPX file and convert to JSON format with additional ride metrics.
+    All measurements are in imperial/standard units (miles, feet).
+    
+    Args:
+        input_gpx_file: Path to input GPX file
+        output_json_file: Path to output JSON file
+        file_stats: Records the time spent in each conversion stage
+        executor: Process pool for the segments of large files (see ride_from_gpx)
+    
+    Returns:
+        Dictionary containing ride data and metrics
+    
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        gpxpy.GPXException: If GPX file is invalid
+        PermissionError: If unable to write output file
+    """
+    ride_data = convert_gpx(input_gpx_file, file_stats=file_stats, executor=executor)
 
     try:
-        with open(output_json_file, 'w') as json_file:
+        with stage(file_stats, 'write'), open(output_json_file, 'w') as json_file:
             json.dump(ride_data, json_file, indent=2)
     except PermissionError:
         print(f"Error: Unable to write to output file '{output_json_file}'", file=sys.stderr)
@@ -120,11 +250,12 @@ def create_empty_ride_data() -> RideData:
         'average_speed_mph': None,
         'max_speed_mph': None,
         'elapsed_time': None,
-        'waypoints': []
+        'waypoints': [],
+        'segments': []
     }
 
-def process_point(point: gpxpy.gpx.GPXTrackPoint,
-                 prev_point: Optional[gpxpy.gpx.GPXTrackPoint],
+def process_point(point: Union[gpxpy.gpx.GPXTrackPoint, TrackPoint],
+                 prev_point: Optional[Union[gpxpy.gpx.GPXTrackPoint, TrackPoint]],
                  prev_time: Optional[datetime],
                  last_valid_speed: float) -> Tuple[Waypoint, float, float, Optional[float]]:
     """
@@ -175,51 +306,228 @@ def calculate_ride_stats(ride_data: RideData, speed_readings: List[float]) -> No
     ride_data['end_time'] = last_point['timestamp']
     ride_data['number_waypoints'] = len(ride_data['waypoints'])
     
-    if first_point['timestamp'] and last_point['timestamp']:
-        start_time = datetime.fromisoformat(first_point['timestamp'])
-        end_time = datetime.fromisoformat(last_point['timestamp'])
-        elapsed_seconds = (end_time - start_time).total_seconds()
-        duration_hours = elapsed_seconds / 3600
-        
-        if duration_hours > 0:
-            ride_data['average_speed_mph'] = ride_data['total_distance_mi'] / duration_hours
-            
-            if speed_readings:
-                sorted_speeds = sorted(speed_readings)
-                percentile_95_idx = int(len(sorted_speeds) * 0.95)
-                ride_data['max_speed_mph'] = sorted_speeds[percentile_95_idx]
-            
-            ride_data['elapsed_time'] = format_elapsed_time(elapsed_seconds)
+    average_speed, max_speed, elapsed_time = speed_stats(
+        first_point['timestamp'], last_point['timestamp'], ride_data['total_distance_mi'], speed_readings
+    )
+    ride_data['average_speed_mph'] = average_speed
+    ride_data['max_speed_mph'] = max_speed
+    ride_data['elapsed_time'] = elapsed_time
+
+def speed_stats(start_timestamp: Optional[str], end_timestamp: Optional[str], distance_mi: float,
+                speed_readings: List[float]) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """
+    Average speed, max speed (95th percentile of the readings) and elapsed
+    time between two ISO timestamps; all None without a positive duration.
+    """
+    if not start_timestamp or not end_timestamp:
+        return None, None, None
+    start_time = datetime.fromisoformat(start_timestamp)
+    end_time = datetime.fromisoformat(end_timestamp)
+    elapsed_seconds = (end_time - start_time).total_seconds()
+    duration_hours = elapsed_seconds / 3600
+    if duration_hours <= 0:
+        return None, None, None
+    
+    max_speed = None
+    if speed_readings:
+        sorted_speeds = sorted(speed_readings)
+        percentile_95_idx = int(len(sorted_speeds) * 0.95)
+        max_speed = sorted_speeds[percentile_95_idx]
+    return distance_mi / duration_hours, max_speed, format_elapsed_time(elapsed_seconds)
+
+def collect_inputs(inputs: List[str]) -> List[Path]:
+    """Expand input arguments into GPX files, searching directories recursively."""
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths.extend(sorted(path.rglob('*.gpx')))
+        else:
+            paths.append(path)
+    return paths
+
+def print_ride_summary(result: RideData) -> None:
+    """Print the metrics of a converted ride."""
+    print(f"\nSuccessfully processed GPX file:")
+    print(f"Ride name: {result['name']}")
+    print(f"Start time: {result['start_time']}")
+    print(f"End time: {result['end_time']}")
+    print(f"Elapsed time: {result['elapsed_time']}")
+    print(f"Number of waypoints: {result['number_waypoints']}")
+    print(f"Total distance: {result['total_distance_mi']:.2f} mi")
+    print(f"Total elevation gain: {result['total_elevation_gain_ft']:.1f} ft")
+    if result['average_speed_mph']:
+        print(f"Average speed: {result['average_speed_mph']:.1f} mph")
+    if result['max_speed_mph']:
+        print(f"Max speed: {result['max_speed_mph']:.1f} mph")
+
+def convert_files(input_paths: List[Path], output_path: Optional[Path], manifest: ConversionManifest,
+                  force: bool = False, stats: Optional[ConversionStats] = None,
+                  executor: Optional[Executor] = None) -> Tuple[int, int, int]:
+    """
+    Convert GPX files to JSON, skipping files whose output is up to date.
+    
+    Args:
+        input_paths: GPX files to convert
+        output_path: Output file for a single input (default: input_file_name.json)
+        manifest: Manifest of previous conversions, updated as files convert
+        force: Convert every file even if the manifest says it is up to date
+        stats: Collects stage timings of the converted files
+        executor: Process pool for the segments of large files
+    
+    Returns:
+        Tuple of converted, skipped and failed file counts
+    """
+    converted = skipped = failed = 0
+    try:
+        for input_path in input_paths:
+            target = output_path or input_path.with_suffix('.json')
+            if not force and manifest.is_up_to_date(input_path, target):
+                skipped += 1
+                continue
+            file_stats = FileStats(input_path) if stats is not None else None
+            try:
+                sha256 = ConversionManifest.file_hash(input_path)
+                result = parse_gpx_to_json(str(input_path), str(target), file_stats, executor)
+            except Exception as e:
+                print(f"Error: {input_path}: {str(e)}", file=sys.stderr)
+                failed += 1
+                continue
+            manifest.record(input_path, target, sha256)
+            if stats is not None:
+                stats.add(file_stats)
+            converted += 1
+            if len(input_paths) == 1:
+                print_ride_summary(result)
+    finally:
+        manifest.save()
+    return converted, skipped, failed
+
+def upload_file(input_path: Path, uploader: RideUploader, stats: Optional[ConversionStats] = None,
+                executor: Optional[Executor] = None) -> bool:
+    """
+    Convert a GPX file and post it to the web-api without writing JSON to disk.
+    
+    The Idempotency-Key is derived from the file's content hash and the
+    converter version, so re-uploading an unchanged file returns the ride
+    stored the first time.
+    
+    Returns:
+        True if the server already had the ride
+    """
+    file_stats = FileStats(input_path) if stats is not None else None
+    sha256 = ConversionManifest.file_hash(input_path)
+    ride_data = convert_gpx(str(input_path), show_progress=False, file_stats=file_stats, executor=executor)
+    with stage(file_stats, 'upload'):
+        result = uploader.upload(ride_data, idempotency_key=f"utils-gpx-{CONVERTER_VERSION}-{sha256}")
+    if stats is not None:
+        stats.add(file_stats)
+    return bool(result.get('duplicate'))
+
+def upload_files(input_paths: List[Path], uploader: RideUploader, concurrency: int,
+                 stats: Optional[ConversionStats] = None,
+                 executor: Optional[Executor] = None) -> Tuple[int, int, int, float]:
+    """
+    Convert and upload GPX files with up to `concurrency` uploads in flight.
+    
+    Returns:
+        Tuple of uploaded, duplicate and failed file counts, and elapsed seconds
+    """
+    uploaded = duplicates = failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [(path, pool.submit(upload_file, path, uploader, stats, executor)) for path in input_paths]
+        for path, future in futures:
+            try:
+                if future.result():
+                    duplicates += 1
+                else:
+                    uploaded += 1
+            except Exception as e:
+                print(f"Error: {path}: {str(e)}", file=sys.stderr)
+                failed += 1
+    return uploaded, duplicates, failed, time.perf_counter() - start
+
+def emit_stats(stats: Optional[ConversionStats], fmt: str, output: Optional[str]) -> None:
+    """Print or write the --stats report (nothing when stats are off)."""
+    if stats is None:
+        return
+    report = stats.report()
+    report['converter_version'] = CONVERTER_VERSION
+    text = json.dumps(report, indent=2) if fmt == 'json' else ConversionStats.format_text(report)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
 
 def main():
     """Main entry point with command line argument parsing."""
     parser = argparse.ArgumentParser(description='Convert GPX file to JSON with ride metrics')
-    parser.add_argument('input', help='Input GPX file')
-    parser.add_argument('-o', '--output', help='Output JSON file (default: input_file_name.json)')
+    parser.add_argument('input', nargs='+', help='Input GPX files or directories (searched recursively)')
+    parser.add_argument('-o', '--output', help='Output JSON file for a single input (default: input_file_name.json)')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help=f'Manifest of previous conversions (default: {DEFAULT_MANIFEST})')
+    parser.add_argument('--force', action='store_true', help='Convert files even if their output is up to date')
+    parser.add_argument('--upload', metavar='URL',
+                        help='Post converted rides to this web-api endpoint instead of writing JSON files, '
+                             'e.g. http://localhost:8000/api/rides/upload')
+    parser.add_argument('--concurrency', type=int, default=8, help='Uploads in flight at once (default: 8)')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per ride for transient failures (default: 3)')
+    parser.add_argument('--compress', action='store_true', help='Send upload bodies gzip-compressed')
+    parser.add_argument('--ingest-token', default=os.environ.get('RIDE_INGEST_TOKEN'),
+                        help='X-Ingest-Token for the trusted ingest endpoint (default: $RIDE_INGEST_TOKEN)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes for the segments of large multi-segment files (default: one per CPU; '
+                             '1 processes serially)')
+    parser.add_argument('--stats', nargs='?', const='text', choices=['text', 'json'],
+                        help='Report time per conversion stage, points/sec and peak RSS as text (default) or JSON')
+    parser.add_argument('--stats-output', metavar='PATH', help='Write the --stats report to a file instead of stdout')
     args = parser.parse_args()
+    stats = ConversionStats() if args.stats or args.stats_output else None
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    # Worker processes only start when a large multi-segment file is converted
+    executor = ProcessPoolExecutor(args.workers) if args.workers > 1 else None
+    try:
+        run(parser, args, stats, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-    input_path = Path(args.input)
-    if not args.output:
-        output_path = input_path.with_suffix('.json')
-    else:
-        output_path = Path(args.output)
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace, stats: Optional[ConversionStats],
+        executor: Optional[Executor]) -> None:
+    """Convert or upload the inputs named on the command line."""
+    input_paths = collect_inputs(args.input)
+    if args.upload:
+        if args.concurrency < 1:
+            parser.error('--concurrency must be at least 1')
+        try:
+            uploader = RideUploader(args.upload, retries=args.retries, compress=args.compress,
+                                    ingest_token=args.ingest_token)
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            uploaded, duplicates, failed, elapsed = upload_files(input_paths, uploader, args.concurrency, stats, executor)
+        finally:
+            uploader.close()
+        rate = (uploaded + duplicates) / elapsed if elapsed > 0 else 0.0
+        print(f"Uploaded {uploaded}, already stored {duplicates}, failed {failed} "
+              f"in {elapsed:.2f}s ({rate:.1f} rides/sec)")
+        emit_stats(stats, args.stats or 'text', args.stats_output)
+        if failed:
+            sys.exit(1)
+        return
 
-    try:
-        result = parse_gpx_to_json(str(input_path), str(output_path))
-        print(f"\nSuccessfully processed GPX file:")
-        print(f"Ride name: {result['name']}")
-        print(f"Start time: {result['start_time']}")
-        print(f"End time: {result['end_time']}")
-        print(f"Elapsed time: {result['elapsed_time']}")
-        print(f"Number of waypoints: {result['number_waypoints']}")
-        print(f"Total distance: {result['total_distance_mi']:.2f} mi")
-        print(f"Total elevation gain: {result['total_elevation_gain_ft']:.1f} ft")
-        if result['average_speed_mph']:
-            print(f"Average speed: {result['average_speed_mph']:.1f} mph")
-        if result['max_speed_mph']:
-            print(f"Max speed: {result['max_speed_mph']:.1f} mph")
-    except Exception as e:
-        print(f"Error: {str(e)}", file=sys.stderr)
+    if args.output and len(input_paths) != 1:
+        parser.error('--output can only be used with a single input file')
+    output_path = Path(args.output) if args.output else None
+
+    manifest = ConversionManifest(Path(args.manifest), CONVERTER_VERSION)
+    converted, skipped, failed = convert_files(input_paths, output_path, manifest, args.force, stats, executor)
+    print(f"Converted {converted}, skipped {skipped} up to date, failed {failed}")
+    emit_stats(stats, args.stats or 'text', args.stats_output)
+    if failed:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+"""
+Conversion manifest for incremental GPX to JSON re-runs.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, TypedDict
+
+class ManifestEntry(TypedDict):
+    size: int
+    mtime_ns: int
+    sha256: str
+    output: str
+    output_size: int
+    output_mtime_ns: int
+
+class ConversionManifest:
+    """
+    Record of converted GPX files, keyed by absolute input path.
+
+    Each entry stores the input's size, mtime and content hash together
+    with the output file's size and mtime. A file is up to date when its
+    output is unchanged and either its size and mtime match (no read
+    needed) or, after a touch or copy, its content hash still matches.
+    Changing the converter version invalidates every entry.
+    """
+
+    def __init__(self, path: Path, converter_version: str):
+        self.path = path
+        self.converter_version = converter_version
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load entries from disk, starting empty if the manifest is missing, unreadable or stale."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('converter_version') == self.converter_version:
+            self.entries = data.get('entries', {})
+
+    def save(self) -> None:
+        """Write the manifest atomically so an interrupted run never leaves it truncated."""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'converter_version': self.converter_version, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        """Return the SHA-256 hex digest of a file, read in 1 MB blocks."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(input_path: Path) -> str:
+        return str(input_path.resolve())
+
+    def is_up_to_date(self, input_path: Path, output_path: Path) -> bool:
+        """
+        Check whether a previous conversion of input_path to output_path is still valid.
+
+        A hash match after an mtime-only change refreshes the entry so the
+        next run can skip the file without reading it.
+        """
+        entry = self.entries.get(self._key(input_path))
+        if entry is None or entry['output'] != str(output_path.resolve()):
+            return False
+        try:
+            output_stat = output_path.stat()
+        except FileNotFoundError:
+            return False
+        if (output_stat.st_size, output_stat.st_mtime_ns) != (entry['output_size'], entry['output_mtime_ns']):
+            return False
+
+        input_stat = input_path.stat()
+        if (input_stat.st_size, input_stat.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+            return True
+        if input_stat.st_size != entry['size'] or self.file_hash(input_path) != entry['sha256']:
+            return False
+        entry['mtime_ns'] = input_stat.st_mtime_ns
+        return True
+
+    def record(self, input_path: Path, output_path: Path, sha256: Optional[str] = None) -> None:
+        """Record a successful conversion of input_path to output_path."""
+        input_stat = input_path.stat()
+        output_stat = output_path.stat()
+        self.entries[self._key(input_path)] = {
+            'size': input_stat.st_size,
+            'mtime_ns': input_stat.st_mtime_ns,
+            'sha256': sha256 or self.file_hash(input_path),
+            'output': str(output_path.resolve()),
+            'output_size': output_stat.st_size,
+            'output_mtime_ns': output_stat.st_mtime_ns
+        }
@@ -2,7 +2,8 @@
 Data models for GPX processing.
 """
 
-from typing import List, Optional, TypedDict
+from datetime import datetime
+from typing import List, NamedTuple, Optional, TypedDict
 
 class Waypoint(TypedDict):
     lat: float
@@ -10,6 +11,32 @@ class Waypoint(TypedDict):
     elevation_ft: float
     timestamp: Optional[str]
 
+class TrackPoint(NamedTuple):
+    """Picklable copy of a GPX track point, with gpxpy's attribute names."""
+    latitude: float
+    longitude: float
+    elevation: Optional[float]
+    time: Optional[datetime]
+
+class SegmentSummary(TypedDict):
+    track: int
+    segment: int
+    track_name: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    number_waypoints: int
+    distance_mi: float
+    elevation_gain_ft: float
+    average_speed_mph: Optional[float]
+    max_speed_mph: Optional[float]
+    elapsed_time: Optional[str]
+
+class SegmentResult(TypedDict):
+    waypoints: List[Waypoint]
+    distance_mi: float
+    elevation_gain_ft: float
+    speed_readings: List[float]
+
 class RideData(TypedDict):
     name: Optional[str]
     start_time: Optional[str]
@@ -20,4 +47,5 @@ class RideData(TypedDict):
     average_speed_mph: Optional[float]
     max_speed_mph: Optional[float]
     elapsed_time: Optional[str]
-    waypoints: List[Waypoint]
\ No newline at end of file
+    waypoints: List[Waypoint]
+    segments: List[SegmentSummary]
@@ -0,0 +1,133 @@
+"""
+HTTP client for posting converted rides to the web-api.
+"""
+
+import gzip
+import http.client
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Responses worth retrying: timeouts, rate limiting and server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+class UploadError(Exception):
+    """Raised when a ride could not be uploaded."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class RideUploader:
+    """
+    Keep-alive HTTP client for ride uploads, safe to share between threads.
+
+    Each thread reuses its own persistent connection, so a pool of N
+    uploading threads holds at most N connections to the server. Failed
+    connections are reopened and transient failures retried with
+    exponential backoff; every retry of a ride sends the same
+    Idempotency-Key, so a retry after a lost response cannot store the
+    ride twice.
+    """
+
+    def __init__(self, url: str, retries: int = 3, backoff: float = 0.5, compress: bool = False,
+                 ingest_token: Optional[str] = None, timeout: float = 60.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Invalid upload URL: {url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+        self.retries = retries
+        self.backoff = backoff
+        self.compress = compress
+        self.ingest_token = ingest_token
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = connection_class(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _reset_connection(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _headers(self, idempotency_key: Optional[str]) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        if self.compress:
+            headers['Content-Encoding'] = 'gzip'
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        if self.ingest_token:
+            headers['X-Ingest-Token'] = self.ingest_token
+        return headers
+
+    def _post(self, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        conn = self._connection()
+        conn.request('POST', self.path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        if response.will_close:
+            self._reset_connection()
+        return response.status, data
+
+    def upload(self, ride: dict, idempotency_key: Optional[str] = None) -> dict:
+        """
+        Post a ride and return the decoded response.
+
+        Args:
+            ride: Ride data as produced by the converter
+            idempotency_key: Key identifying this ride across retries
+
+        Returns:
+            Decoded JSON response (the stored ride and its ID)
+
+        Raises:
+            UploadError: If the server rejects the ride or every attempt fails
+        """
+        body = json.dumps(ride).encode('utf-8')
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+        headers = self._headers(idempotency_key)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                status, data = self._post(body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                self._reset_connection()
+                error = UploadError(f"Connection failed: {e}")
+                continue
+            if status == 200:
+                return json.loads(data)
+            error = UploadError(f"HTTP {status}: {data.decode('utf-8', 'replace')[:500]}", status)
+            if status not in RETRY_STATUSES:
+                break
+        raise error
+
+    def close(self) -> None:
+        """Close the connections opened by every thread."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
@@ -2,23 +2,25 @@
 Utility functions for GPX processing and calculations.
 """
 
+import sys
+from pathlib import Path
 from typing import List
-from math import asin, cos, radians, sin, sqrt
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+# Distances come from the repository's shared geo kernel, which the web-api
+# uses too, so converted rides and server summaries agree
+_SHARED_DIR = str(Path(__file__).resolve().parent.parent / 'shared')
+if _SHARED_DIR not in sys.path:
+    sys.path.append(_SHARED_DIR)
+import ride_geo  # noqa: E402
+
+def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float,
+                       model: str = ride_geo.DEFAULT_MODEL) -> float:
     """
-    Calculate distance between two points using the Haversine formula.
+    Calculate distance between two points with a shared geo kernel model
+    (haversine, or equirectangular for short segments by default).
     Returns distance in miles.
     """
-    R = 3959.0  # Earth's radius in miles
-
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return R * c
+    return ride_geo.distance(lat1, lon1, lat2, lon2, model)
 
 def calculate_elevation_gain(elevations_ft: List[float]) -> float:
     """Calculate total elevation gain in feet from a list of elevation points."""
@@ -0,0 +1,27 @@
+import os
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+
+INGEST_TOKEN_ENV = "RIDE_INGEST_TOKEN"
+ADMIN_TOKEN_ENV = "RIDE_ADMIN_TOKEN"
+
+def _check_token(expected: Optional[str], provided: Optional[str]) -> None:
+    """Reject the request unless the provided token matches the configured one"""
+    if not expected:
+        raise HTTPException(status_code=403, detail="Endpoint is disabled")
+    if not provided or not secrets.compare_digest(provided, expected):
+        raise HTTPException(status_code=401, detail="Invalid or missing token")
+
+def require_ingest_token(x_ingest_token: Optional[str] = Header(None)) -> None:
+    """Dependency guarding the trusted (internal) ingest endpoints"""
+    _check_token(os.environ.get(INGEST_TOKEN_ENV), x_ingest_token)
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether a token matches the configured admin token (False if none is configured)"""
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    return bool(expected and token and secrets.compare_digest(token, expected))
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency guarding the admin endpoints"""
+    _check_token(os.environ.get(ADMIN_TOKEN_ENV), x_admin_token)
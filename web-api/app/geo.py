@@ -0,0 +1,19 @@
+"""
+Distance models from the repository's shared geo kernel (shared/ride_geo.py),
+which utils-gpx uses too so both projects measure rides identically.
+"""
+
+import sys
+from pathlib import Path
+
+_SHARED_DIR = str(Path(__file__).resolve().parents[2] / 'shared')
+if _SHARED_DIR not in sys.path:
+    sys.path.append(_SHARED_DIR)
+
+from ride_geo import (  # noqa: E402
+    AUTO, DEFAULT_MODEL, EARTH_RADIUS_MI, EQUIRECTANGULAR, HAVERSINE, MODELS, VINCENTY,
+    distance, segment_distances, total_distance
+)
+
+__all__ = ['AUTO', 'DEFAULT_MODEL', 'EARTH_RADIUS_MI', 'EQUIRECTANGULAR', 'HAVERSINE', 'MODELS', 'VINCENTY',
+           'distance', 'segment_distances', 'total_distance']
@@ -1,18 +1,57 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import api, web
-
-app = FastAPI()
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:*", "tauri://localhost"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(web.router)
-app.include_router(api.router)
\ No newline at end of file
+from app.middleware import AdmissionMiddleware, CompressionMiddleware
+from app.middleware.admission import settings_from_env
+from app.routes import admin, api, telemetry, tiles
+from app.services import RideService
+from app.services.gpx_ingest import GpxIngestPool
+from app.storage import MemoryRideStore, create_store
+
+API_ONLY_ENV = "RIDE_API_ONLY"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the configured ride store (shared SQLite file when RIDE_STORE_PATH is set)
+    RideService.use_store(create_store())
+    yield
+    GpxIngestPool.shutdown()
+    RideService.use_store(MemoryRideStore())
+
+def create_app(web_pages: bool = True) -> FastAPI:
+    """
+    Build the application. Without web_pages the HTML routes are left out
+    and their module (and Jinja2) is never imported, for API-only workers.
+    """
+    app = FastAPI(lifespan=lifespan)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:*", "tauri://localhost"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Bound upload sizes, per-client concurrency and rate, and queue depth
+    # (RIDE_MAX_BODY_MB, RIDE_MAX_WAYPOINTS, RIDE_UPLOADS_PER_CLIENT, ...).
+    # Added before compression so it sees decompressed bodies.
+    app.add_middleware(AdmissionMiddleware, **settings_from_env())
+
+    # Ride JSON is highly repetitive: accept compressed uploads and compress responses
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, max_decompressed_size=64 * 1024 * 1024)
+
+    # Include routers
+    if web_pages:
+        from app.routes import web
+        app.include_router(web.router)
+    app.include_router(api.router)
+    app.include_router(telemetry.router)
+    app.include_router(tiles.router)
+    app.include_router(admin.router)
+    return app
+
+# RIDE_API_ONLY=1 serves only the API (no HTML pages)
+app = create_app(web_pages=os.environ.get(API_ONLY_ENV, "") not in ("1", "true"))
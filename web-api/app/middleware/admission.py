@@ -0,0 +1,234 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UPLOAD_PATHS = ("/api/rides/upload", "/api/rides/ingest")
+LIMITED_METHODS = ("POST", "PUT")
+
+MAX_BODY_MB_ENV = "RIDE_MAX_BODY_MB"
+MAX_WAYPOINTS_ENV = "RIDE_MAX_WAYPOINTS"
+UPLOADS_PER_CLIENT_ENV = "RIDE_UPLOADS_PER_CLIENT"
+UPLOAD_RATE_ENV = "RIDE_UPLOAD_RATE"
+UPLOAD_BURST_ENV = "RIDE_UPLOAD_BURST"
+UPLOADS_IN_FLIGHT_ENV = "RIDE_UPLOADS_IN_FLIGHT"
+UPLOAD_QUEUE_ENV = "RIDE_UPLOAD_QUEUE"
+
+def settings_from_env() -> Dict[str, Any]:
+    """AdmissionMiddleware keyword arguments set in the environment (unset ones keep their defaults)"""
+    env = os.environ
+    settings: Dict[str, Any] = {}
+    if MAX_BODY_MB_ENV in env:
+        settings["max_body_size"] = int(float(env[MAX_BODY_MB_ENV]) * 1024 * 1024)
+    for name, key, cast in (
+        (MAX_WAYPOINTS_ENV, "max_waypoints", int),
+        (UPLOADS_PER_CLIENT_ENV, "max_concurrent_per_client", int),
+        (UPLOAD_RATE_ENV, "rate_per_client", float),
+        (UPLOAD_BURST_ENV, "burst_per_client", int),
+        (UPLOADS_IN_FLIGHT_ENV, "max_in_flight", int),
+        (UPLOAD_QUEUE_ENV, "max_queue", int),
+    ):
+        if name in env:
+            settings[key] = cast(env[name])
+    return settings
+
+class _WaypointCounter:
+    """
+    Count waypoints in a streamed body without parsing it.
+
+    JSON waypoints are counted by their ``"lat"`` keys (an escaped
+    ``\\"lat\\"`` inside a string does not match) and GPX ones by their
+    ``<trkpt`` elements; a few bytes of each chunk are carried over so
+    tokens split across chunks are still seen.
+    """
+
+    def __init__(self, token: bytes) -> None:
+        self.token = token
+        self.tail = b""
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> int:
+        data = self.tail + chunk
+        self.count += data.count(self.token)
+        # Keep a partial token, never a whole one (which would count twice)
+        self.tail = data[-(len(self.token) - 1):]
+        return self.count
+
+class AdmissionMiddleware:
+    """
+    Admission control for ride uploads.
+
+    Applies to POST/PUT requests under ``paths``:
+
+    - Bodies over ``max_body_size`` bytes are rejected with 413 from their
+      Content-Length or, when streamed, as soon as they grow past the
+      limit; bodies with more than ``max_waypoints`` waypoints are
+      rejected with 413 while streaming, before the JSON is parsed.
+    - Each client (by address) may run ``max_concurrent_per_client``
+      uploads at once and start ``rate_per_client`` per second (token
+      bucket of ``burst_per_client``; 0 disables the rate limit). Excess
+      requests get 429 with Retry-After.
+    - At most ``max_in_flight`` uploads are processed at once; up to
+      ``max_queue`` more wait (for at most ``max_queue_wait`` seconds) and
+      the rest are shed with 503 and a Retry-After estimated from recent
+      upload durations.
+
+    Installed inside CompressionMiddleware, so limits apply to the
+    decompressed body.
+    """
+
+    MAX_TRACKED_CLIENTS = 10000
+
+    def __init__(self, app: ASGIApp, paths: Tuple[str, ...] = UPLOAD_PATHS,
+                 max_body_size: int = 64 * 1024 * 1024, max_waypoints: int = 1_000_000,
+                 max_concurrent_per_client: int = 4, rate_per_client: float = 0.0, burst_per_client: int = 10,
+                 max_in_flight: int = 8, max_queue: int = 64, max_queue_wait: float = 30.0) -> None:
+        self.app = app
+        self.paths = paths
+        self.max_body_size = max_body_size
+        self.max_waypoints = max_waypoints
+        self.max_concurrent_per_client = max_concurrent_per_client
+        self.rate_per_client = rate_per_client
+        self.burst_per_client = burst_per_client
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self._client_uploads: Dict[str, int] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._average_duration = 1.0
+
+    def stats(self) -> Dict[str, int]:
+        """Uploads being processed and waiting for a slot"""
+        return {"in_flight": self._in_flight, "queued": len(self._waiters)}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in LIMITED_METHODS \
+                or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._reject(scope, receive, send, 413, f"Request body exceeds {self.max_body_size} bytes")
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        if self._client_uploads.get(client, 0) >= self.max_concurrent_per_client:
+            await self._reject(scope, receive, send, 429, "Too many concurrent uploads from this client", 1)
+            return
+        retry_after = self._take_token(client)
+        if retry_after:
+            await self._reject(scope, receive, send, 429, "Upload rate limit exceeded", retry_after)
+            return
+
+        self._client_uploads[client] = self._client_uploads.get(client, 0) + 1
+        try:
+            if not await self._acquire():
+                await self._reject(scope, receive, send, 503, "Server is busy; retry later", self._retry_after())
+                return
+            start = time.monotonic()
+            try:
+                is_gpx = "xml" in headers.get("content-type", "") or scope["path"].endswith("/gpx")
+                counter = _WaypointCounter(b"<trkpt" if is_gpx else b'"lat"')
+                await self.app(scope, self._limited_receive(receive, counter), send)
+            finally:
+                self._release()
+                # Exponentially weighted average, for Retry-After estimates
+                self._average_duration += 0.2 * (time.monotonic() - start - self._average_duration)
+        finally:
+            remaining = self._client_uploads[client] - 1
+            if remaining:
+                self._client_uploads[client] = remaining
+            else:
+                del self._client_uploads[client]
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str,
+                      retry_after: Optional[int] = None) -> None:
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
+
+    def _take_token(self, client: str) -> int:
+        """Take a token from the client's bucket, returning 0 or the seconds until one is available"""
+        if self.rate_per_client <= 0:
+            return 0
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.burst_per_client, now))
+        tokens = min(self.burst_per_client, tokens + (now - updated) * self.rate_per_client)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return max(1, math.ceil((1 - tokens) / self.rate_per_client))
+        if len(self._buckets) >= self.MAX_TRACKED_CLIENTS and client not in self._buckets:
+            # Full buckets carry no state worth keeping
+            self._buckets = {
+                key: (t, u) for key, (t, u) in self._buckets.items()
+                if t + (now - u) * self.rate_per_client < self.burst_per_client
+            }
+        self._buckets[client] = (tokens - 1, now)
+        return 0
+
+    async def _acquire(self) -> bool:
+        """Wait for a processing slot, or return False if the queue is full or the wait times out"""
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # A released slot is handed over by resolving the future
+            await asyncio.wait_for(waiter, self.max_queue_wait)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.TimeoutError):
+                    return True
+                self._release()
+                raise
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.TimeoutError):
+                return False
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue ahead of a new upload has likely drained"""
+        backlog = len(self._waiters) + self._in_flight
+        return max(1, math.ceil(self._average_duration * backlog / self.max_in_flight))
+
+    def _limited_receive(self, receive: Receive, counter: _WaypointCounter) -> Receive:
+        received = 0
+
+        async def wrapped() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {self.max_body_size} bytes")
+                if counter.feed(body) > self.max_waypoints:
+                    raise HTTPException(status_code=413, detail=f"Ride exceeds {self.max_waypoints} waypoints")
+            return message
+        return wrapped
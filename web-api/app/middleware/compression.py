@@ -0,0 +1,226 @@
+import zlib
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+_DECODE_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/gpx+xml", "text/")
+
+def _decoder(encoding: str):
+    """Return an incremental decompressor for a Content-Encoding, or None if unsupported"""
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj()
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+# zstd decompressobj has no output limit, so input is fed in small slices;
+# one slice can expand to at most a few MB before the size cap is checked
+ZSTD_FEED_SIZE = 64
+
+class _BodyDecoder:
+    """
+    Incremental request body decoder with a cap on the decompressed size.
+
+    Concatenated gzip members and zstd frames are decoded in turn, as their
+    specifications allow.
+    """
+
+    def __init__(self, encoding: str, max_size: int) -> None:
+        self.encoding = encoding
+        self.max_size = max_size
+        self.total = 0
+        self._obj = _decoder(encoding)
+        self._zlib = encoding != "zstd"
+
+    def _count(self, chunk: bytes) -> bytes:
+        self.total += len(chunk)
+        if self.total > self.max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Decompressed request body exceeds {self.max_size} bytes"
+            )
+        return chunk
+
+    def feed(self, data: bytes) -> bytes:
+        """Decode the next chunk of the compressed body"""
+        output = []
+        while data:
+            if self._obj.eof:
+                # Start of the next gzip member / zstd frame
+                self._obj = _decoder(self.encoding)
+            if self._zlib:
+                output.append(self._count(self._obj.decompress(data, self.max_size - self.total + 1)))
+                data = self._obj.unused_data if self._obj.eof else self._obj.unconsumed_tail
+            else:
+                piece, data = data[:ZSTD_FEED_SIZE], data[ZSTD_FEED_SIZE:]
+                output.append(self._count(self._obj.decompress(piece)))
+                if self._obj.eof:
+                    data = self._obj.unused_data + data
+        return b"".join(output)
+
+    def finish(self) -> bytes:
+        """Flush the decoder at the end of the body, rejecting truncated input"""
+        tail = self._count(self._obj.flush()) if self._zlib else b""
+        if not self._obj.eof:
+            raise HTTPException(status_code=400, detail="Truncated compressed request body")
+        return tail
+
+def _encoder(encoding: str, level: Optional[int]):
+    """Return an incremental compressor for a negotiated Content-Encoding"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level or 3).compressobj()
+    return zlib.compressobj(level or 6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+def supported_encodings() -> List[str]:
+    """Response encodings this server can produce, in order of preference"""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        The preferred supported encoding with the highest q-value, or None
+        for identity
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class CompressionMiddleware:
+    """
+    Streaming request decompression and negotiated response compression.
+
+    Request bodies sent with ``Content-Encoding: gzip`` (or ``zstd`` when the
+    optional ``zstandard`` package is installed) are decompressed chunk by
+    chunk as the application reads them, and rejected with a 413 once they
+    expand beyond ``max_decompressed_size``. JSON and text responses are
+    compressed chunk by chunk according to ``Accept-Encoding``, so neither
+    direction buffers a whole body.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, level: Optional[int] = None,
+                 max_decompressed_size: int = 64 * 1024 * 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.max_decompressed_size = max_decompressed_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            if _decoder(content_encoding) is None:
+                response = PlainTextResponse(f"Unsupported Content-Encoding: {content_encoding}", status_code=415)
+                await response(scope, receive, send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"]
+                if name not in (b"content-encoding", b"content-length")
+            ]
+            receive = self._decompressing_receive(receive, _BodyDecoder(content_encoding, self.max_decompressed_size))
+
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is not None:
+            send = _CompressingSend(send, encoding, self.level, self.minimum_size)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _decompressing_receive(receive: Receive, decoder: _BodyDecoder) -> Receive:
+        async def wrapped() -> Message:
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = decoder.feed(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += decoder.finish()
+            except _DECODE_ERRORS as e:
+                raise HTTPException(status_code=400, detail=f"Invalid compressed request body: {e}")
+            return {**message, "body": body}
+        return wrapped
+
+class _CompressingSend:
+    """ASGI send wrapper compressing eligible response bodies as they stream out"""
+
+    def __init__(self, send: Send, encoding: str, level: Optional[int], minimum_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Hold the start message until the first body chunk shows
+                # whether compression is worthwhile
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.encoder = _encoder(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            del headers["Content-Length"]
+            await self.send(start)
+
+        chunk = self.encoder.compress(body)
+        if not more_body:
+            chunk += self.encoder.flush()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
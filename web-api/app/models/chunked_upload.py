@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class ChunkedUploadRequest(BaseModel):
+    """Ride header of a chunked upload; waypoints follow in chunk_count numbered chunks"""
+    name: str
+    start_time: str
+    end_time: str
+    number_waypoints: int = Field(..., ge=1)
+    chunk_count: int = Field(..., ge=1)
+
+class ChunkedUploadStatus(BaseModel):
+    """Progress of a chunked upload session"""
+    session_id: str
+    chunk_count: int
+    number_waypoints: int
+    received_waypoints: int
+    missing_chunks: List[int]
+    committed_ride_id: Optional[int] = None
@@ -0,0 +1,18 @@
+from typing import List
+from pydantic import BaseModel
+
+class RideComparison(BaseModel):
+    """Two rides resampled onto a shared distance axis; each list has one value per sample"""
+    a: int
+    b: int
+    step_mi: float
+    distance_mi: List[float]
+    time_a_s: List[float]
+    time_b_s: List[float]
+    time_gap_s: List[float]
+    speed_a_mph: List[float]
+    speed_b_mph: List[float]
+    speed_delta_mph: List[float]
+    elevation_a_ft: List[float]
+    elevation_b_ft: List[float]
+    elevation_delta_ft: List[float]
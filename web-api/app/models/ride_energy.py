@@ -0,0 +1,10 @@
+from typing import List
+from pydantic import BaseModel
+
+class RideEnergy(BaseModel):
+    """Estimated energy of a ride and the battery remaining (percent) at each waypoint"""
+    id: int
+    energy_model: str
+    energy_wh: float
+    battery_used_pct: float
+    battery_pct: List[float]
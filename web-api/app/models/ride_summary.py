@@ -7,6 +7,10 @@ class RideSummary(BaseModel):
     average_speed_mph: float = Field(..., ge=0)
     max_speed_mph: float = Field(..., ge=0)
     elapsed_time: str
+    # Estimated by EnergyModel; None for rides stored before it existed
+    energy_wh: Optional[float] = Field(None, ge=0)
+    battery_used_pct: Optional[float] = Field(None, ge=0)
+    energy_model: Optional[str] = None
 
     def format_elapsed_time(self) -> str:
         """Format elapsed time for display"""
@@ -0,0 +1,15 @@
+from typing import Any, Dict
+from .ride import Ride
+from .ride_summary import RideSummary
+from .waypoint import Waypoint
+
+class RideWithSummary(Ride):
+    summary: RideSummary
+
+    @classmethod
+    def from_trusted_dict(cls, data: Dict[str, Any]) -> 'RideWithSummary':
+        """Rebuild a ride from data this service serialized itself, skipping validation"""
+        fields = dict(data)
+        fields['waypoints'] = [Waypoint.model_construct(**w) for w in data.get('waypoints', [])]
+        fields['summary'] = RideSummary.model_construct(**data['summary'])
+        return cls.model_construct(**fields)
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class SimilarRide(BaseModel):
+    """A ride on the same route as another, with the estimated Jaccard similarity of their routes"""
+    id: int
+    similarity: float
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class TelemetryUpdate(BaseModel):
+    """Live telemetry sample, as produced by the desktop simulator's TelemetryUpdate"""
+    timestamp: str
+    lat: float
+    lon: float
+    elevation_ft: float
+    avg_speed_mph: float
+    battery_percentage: float
+    distance_miles: float
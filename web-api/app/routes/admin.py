@@ -0,0 +1,80 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Any, Dict, List, Literal
+from pydantic import BaseModel
+from app.auth import require_admin_token
+from app.services.memory_inspector import MemoryInspector
+from app.services.request_profiler import RequestProfiler
+from app.services.ride_service import RideService
+
+class ProfileInfo(BaseModel):
+    id: int
+    method: str
+    path: str
+    reason: str
+    started_at: str
+    duration_ms: float
+
+router = APIRouter(prefix="/api/admin", dependencies=[Depends(require_admin_token)])
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+def list_profiles():
+    """API endpoint listing the captured request profiles, newest first"""
+    return RequestProfiler.list_profiles()
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: int, format: Literal["pstats", "speedscope"] = "pstats"):
+    """
+    API endpoint to download a captured profile, either as a pstats file
+    (``python -m pstats``, snakeviz) or as speedscope JSON
+    """
+    profile = RequestProfiler.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "speedscope":
+        return Response(
+            content=json.dumps(RequestProfiler.to_speedscope(profile)),
+            media_type="application/json",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'}
+        )
+    return Response(
+        content=RequestProfiler.to_pstats(profile),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.pstats"'}
+    )
+
+@router.get("/memory")
+def memory_report(rides: int = Query(20, ge=0, le=1000)) -> Dict[str, Any]:
+    """
+    API endpoint reporting bytes held by stored rides (metadata, waypoints,
+    summaries, cached serializations) and service caches, with the largest rides
+    """
+    return RideService.memory_report(rides)
+
+@router.post("/memory/tracemalloc/start")
+def start_tracemalloc(frames: int = Query(1, ge=1, le=50)) -> Dict[str, Any]:
+    """API endpoint to start tracing allocations (slows the process while enabled)"""
+    return MemoryInspector.start_tracing(frames)
+
+@router.post("/memory/tracemalloc/stop")
+def stop_tracemalloc() -> Dict[str, Any]:
+    """API endpoint to stop tracing allocations and drop stored snapshots"""
+    return MemoryInspector.stop_tracing()
+
+@router.post("/memory/snapshots")
+def take_snapshot(limit: int = Query(20, ge=1, le=500)) -> Dict[str, Any]:
+    """API endpoint to take a tracemalloc snapshot and list its top allocations"""
+    return MemoryInspector.take_snapshot(limit)
+
+@router.get("/memory/snapshots/{old_id}/diff/{new_id}")
+def diff_snapshots(old_id: int, new_id: int, limit: int = Query(20, ge=1, le=500)) -> Dict[str, Any]:
+    """API endpoint listing the allocations that grew most between two snapshots"""
+    return MemoryInspector.diff_snapshots(old_id, new_id, limit)
+
+@router.post("/energy/reevaluate")
+def reevaluate_energy(force: bool = False) -> Dict[str, Any]:
+    """
+    API endpoint re-estimating the energy of stored rides with the current
+    energy model (rides already estimated by it are skipped unless force)
+    """
+    return RideService.reevaluate_energy(force)
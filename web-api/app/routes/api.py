@@ -1,12 +1,26 @@
-from fastapi import APIRouter
-from typing import List
-from pydantic import BaseModel
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
+from typing import Any, List, Optional
+from pydantic import BaseModel, ValidationError
+from app.auth import is_admin_token, require_ingest_token
+from app.models.chunked_upload import ChunkedUploadRequest, ChunkedUploadStatus
 from app.models.ride import Ride
+from app.models.ride_comparison import RideComparison
+from app.models.ride_energy import RideEnergy
+from app.models.similar_ride import SimilarRide
+from app.services.chunked_upload import ChunkedUploadService
+from app.services.gpx_ingest import GpxIngestPool
+from app.services.request_profiler import RequestProfiler
+from app.services.ride_exporter import RideExporter
 from app.services.ride_service import RideService, RideWithSummary
 
 class RideUploadResponse(BaseModel):
     ride: RideWithSummary
     id: int
+    duplicate: bool = False
 
 class RideListResponse(BaseModel):
     ride: RideWithSummary
@@ -19,17 +33,164 @@ class RideUpdateRequest(BaseModel):
 
 router = APIRouter(prefix="/api")
 
-@router.post("/rides/upload", response_model=RideUploadResponse)
-async def upload_ride(ride: Ride):
-    """API endpoint to upload a new ride"""
-    return RideService.upload_ride(ride)
+# Routes that read the raw body still document it as a Ride. Nested models
+# (Waypoint) are referenced from the components the response models register.
+_ride_schema = Ride.model_json_schema(ref_template="#/components/schemas/{model}")
+_ride_schema.pop("$defs", None)
+RIDE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _ride_schema}}
+    }
+}
+
+GPX_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/gpx+xml": {"schema": {"type": "string", "format": "binary"}}}
+    }
+}
+
+WAYPOINT_CHUNK_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {
+            "type": "array", "items": {"$ref": "#/components/schemas/Waypoint"}
+        }}}
+    }
+}
+
+async def read_json_body(request: Request) -> Any:
+    """Decode the request body as JSON, rejecting malformed bodies with a 422"""
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Request body must be valid JSON")
+
+async def profile_request(request: Request, x_profile: Optional[str] = Header(None),
+                          x_admin_token: Optional[str] = Header(None)):
+    """Profile the request if an admin sent X-Profile or it is sampled (see RequestProfiler)"""
+    requested = x_profile not in (None, "", "0") and is_admin_token(x_admin_token)
+    profile = RequestProfiler.start(request.method, request.url.path, requested)
+    try:
+        yield
+    finally:
+        if profile is not None:
+            RequestProfiler.finish(profile)
+
+@router.post("/rides/upload", response_model=RideUploadResponse, openapi_extra=RIDE_REQUEST_BODY,
+             dependencies=[Depends(profile_request)])
+async def upload_ride(request: Request, idempotency_key: Optional[str] = Header(None)):
+    """
+    API endpoint to upload a new ride (JSON body matching the Ride model).
+
+    Re-sending a ride, or repeating an Idempotency-Key, returns the stored
+    ride with duplicate set instead of creating a copy.
+    """
+    data = await read_json_body(request)
+    return await store_ride_payload(data, idempotency_key)
+
+async def store_ride_payload(data: Any, idempotency_key: Optional[str]):
+    """Validate and store decoded ride JSON, reporting validation errors as a 422"""
+    try:
+        return await run_in_threadpool(RequestProfiler.call, RideService.upload_ride_payload, data, idempotency_key)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=data)
+
+@router.post("/rides/upload/gpx", response_model=RideUploadResponse, openapi_extra=GPX_REQUEST_BODY,
+             dependencies=[Depends(profile_request)])
+async def upload_gpx(request: Request, name: Optional[str] = None, idempotency_key: Optional[str] = Header(None)):
+    """
+    API endpoint to upload a raw GPX file, converted with the utils-gpx logic
+    on a worker process pool (name overrides the GPX track name)
+    """
+    data = await GpxIngestPool.convert(await request.body(), name)
+    return await store_ride_payload(data, idempotency_key)
+
+@router.post("/rides/uploads", response_model=ChunkedUploadStatus)
+def create_upload_session(header: ChunkedUploadRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    API endpoint starting a resumable chunked upload: send the ride header,
+    then PUT chunk_count numbered waypoint chunks and commit
+    """
+    return ChunkedUploadService.create(header, idempotency_key).status()
+
+@router.get("/rides/uploads/{session_id}", response_model=ChunkedUploadStatus)
+def get_upload_session(session_id: str):
+    """API endpoint reporting a chunked upload's progress and missing chunks"""
+    return ChunkedUploadService.get(session_id).status()
+
+@router.put("/rides/uploads/{session_id}/chunks/{index}", response_model=ChunkedUploadStatus,
+            openapi_extra=WAYPOINT_CHUNK_BODY)
+async def upload_chunk(session_id: str, index: int, request: Request):
+    """API endpoint receiving chunk index (from 0) as a JSON array of waypoints"""
+    body = await request.body()
+    return await run_in_threadpool(ChunkedUploadService.put_chunk, session_id, index, body)
+
+@router.post("/rides/uploads/{session_id}/commit", response_model=RideUploadResponse)
+def commit_upload_session(session_id: str):
+    """API endpoint storing the ride once every chunk has been received"""
+    return RideService.commit_chunked_upload(session_id)
+
+@router.delete("/rides/uploads/{session_id}", status_code=204)
+def delete_upload_session(session_id: str):
+    """API endpoint aborting a chunked upload"""
+    ChunkedUploadService.delete(session_id)
+    return Response(status_code=204)
+
+@router.post("/rides/ingest", response_model=RideUploadResponse,
+             dependencies=[Depends(require_ingest_token), Depends(profile_request)], openapi_extra=RIDE_REQUEST_BODY)
+async def ingest_ride(request: Request, idempotency_key: Optional[str] = Header(None)):
+    """API endpoint for trusted bulk ingest (requires the X-Ingest-Token header)"""
+    data = await read_json_body(request)
+    return await run_in_threadpool(RequestProfiler.call, RideService.upload_trusted_ride, data, idempotency_key)
+
+@router.get("/rides/compare", response_model=RideComparison)
+def compare_rides(a: int, b: int, step_mi: float = Query(0.1, gt=0)):
+    """
+    API endpoint comparing two rides sampled every step_mi miles along their
+    cumulative distance (deltas are ride b minus ride a)
+    """
+    return RideService.compare_rides(a, b, step_mi)
+
+@router.get("/rides/export", response_class=StreamingResponse,
+            responses={200: {"content": {media_type: {} for media_type in RideExporter.MEDIA_TYPES.values()}}})
+def export_rides(format: str = Query("ndjson", pattern="^(ndjson|csv|gpx)$"),
+                 ids: Optional[List[int]] = Query(None), start: Optional[datetime] = None,
+                 end: Optional[datetime] = None):
+    """
+    API endpoint streaming rides as NDJSON, CSV (one row per waypoint) or
+    GPX, selected by repeated ids parameters or by start time in [start, end)
+    """
+    chunks = RideService.export_rides(format, ids, start, end)
+    return StreamingResponse(chunks, media_type=RideExporter.MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="rides.{format}"'})
+
+@router.get("/rides/routes", response_model=List[List[int]])
+def route_clusters(min_similarity: float = Query(0.5, gt=0, le=1)):
+    """API endpoint grouping rides that follow the same route, largest group first"""
+    return RideService.route_clusters(min_similarity)
+
+@router.get("/rides/{ride_id}/similar", response_model=List[SimilarRide])
+def similar_rides(ride_id: int, min_similarity: float = Query(0.5, gt=0, le=1), limit: int = Query(10, ge=1, le=100)):
+    """
+    API endpoint listing rides that follow the same route as a ride (in
+    either direction), most similar first
+    """
+    return RideService.similar_rides(ride_id, min_similarity, limit)
+
+@router.get("/rides/{ride_id}/energy", response_model=RideEnergy)
+def ride_energy(ride_id: int):
+    """API endpoint with a ride's estimated energy and battery level at each waypoint"""
+    return RideService.ride_energy(ride_id)
 
 @router.get("/rides/{ride_id}", response_model=RideWithSummary)
-async def get_ride(ride_id: int):
-    """API endpoint to get a specific ride"""
+def get_ride(ride_id: int):
+    """API endpoint to get a specific ride (sync, so store reads run in the threadpool)"""
     return RideService.get_ride(ride_id)
 
 @router.get("/rides/", response_model=List[RideListResponse])
-async def list_rides():
+def list_rides():
     """API endpoint to list all rides"""
     return RideService.list_rides()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import json
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from app.models.telemetry_update import TelemetryUpdate
+from app.services.telemetry_hub import TelemetryHub
+
+router = APIRouter(prefix="/api/telemetry")
+
+@router.get("/")
+def list_sessions():
+    """API endpoint listing live telemetry sessions on this worker"""
+    return TelemetryHub.sessions()
+
+@router.websocket("/{session_id}/publish")
+async def publish_telemetry(websocket: WebSocket, session_id: str):
+    """
+    WebSocket endpoint ingesting live telemetry: one TelemetryUpdate JSON
+    object per message. Invalid messages are answered with an error message
+    and skipped.
+    """
+    channel = TelemetryHub.attach_publisher(session_id)
+    try:
+        await websocket.accept()
+        while True:
+            message = await websocket.receive_text()
+            try:
+                update = TelemetryUpdate.model_validate_json(message)
+            except ValidationError as e:
+                await websocket.send_text(json.dumps({"type": "error", "detail": e.errors(include_url=False)},
+                                                     default=str))
+                continue
+            channel.publish(update.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        TelemetryHub.detach_publisher(session_id, channel)
+
+@router.websocket("/{session_id}")
+async def subscribe_telemetry(websocket: WebSocket, session_id: str):
+    """
+    WebSocket endpoint streaming a session's updates, starting with the latest.
+
+    Messages are {"type": "update", "seq", "data"}; a viewer too slow to
+    keep up skips ahead and is told how many updates it missed with
+    {"type": "dropped", "count"}. {"type": "end"} follows the last update
+    once the publisher disconnects.
+    """
+    # Attached before the handshake completes, so a viewer sees every update published once it is connected
+    channel = TelemetryHub.attach_subscriber(session_id)
+    cursor = channel.start_cursor()
+    try:
+        await websocket.accept()
+        while True:
+            update, cursor, dropped = await channel.read(cursor)
+            if dropped:
+                await websocket.send_text(json.dumps({"type": "dropped", "count": dropped}))
+            if update is None:
+                await websocket.send_text('{"type":"end"}')
+                await websocket.close()
+                break
+            await websocket.send_text(update[1])
+    except (WebSocketDisconnect, RuntimeError):
+        # The viewer went away (RuntimeError: sending after the socket closed)
+        pass
+    finally:
+        TelemetryHub.detach_subscriber(session_id, channel)
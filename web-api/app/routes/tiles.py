@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Path, Response
+from app.services.heatmap_tiles import HeatmapTiles
+
+router = APIRouter(prefix="/api/tiles")
+
+TILE_CACHE_CONTROL = "public, max-age=60"
+
+@router.get("/{z}/{x}/{y}", responses={200: {"content": {"image/png": {}, "application/octet-stream": {}}}})
+def get_tile(z: int = Path(..., ge=HeatmapTiles.MIN_ZOOM, le=HeatmapTiles.MAX_ZOOM), x: int = Path(..., ge=0),
+             y: int = Path(..., ge=0), format: Literal["png", "counts"] = "png",
+             if_none_match: Optional[str] = Header(None)):
+    """
+    API endpoint serving a fleet heatmap tile (Web Mercator, XYZ numbering)
+    as a PNG or as raw little-endian uint32 counts of rides per bin
+    """
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=404, detail="Tile outside the zoom level's grid")
+    if format == "counts":
+        data, digest = HeatmapTiles.counts(z, x, y)
+        if data is None:
+            data = bytes(4 * HeatmapTiles.TILE_BINS * HeatmapTiles.TILE_BINS)
+        media_type = "application/octet-stream"
+    else:
+        data, digest = HeatmapTiles.render_png(z, x, y)
+        media_type = "image/png"
+    etag = f'"{format}-{digest}"'
+    headers = {"ETag": etag, "Cache-Control": TILE_CACHE_CONTROL, "X-Tile-Bins": str(HeatmapTiles.TILE_BINS)}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
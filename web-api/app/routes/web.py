@@ -1,21 +1,52 @@
 from fastapi import APIRouter, Request, Form
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from functools import lru_cache
+from typing import TYPE_CHECKING, List
 from app.services import RideService
 from app.models.ride import Ride
 import json
 import os
 
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+TEMPLATE_CACHE_ENV = "RIDE_TEMPLATE_CACHE_DIR"
+
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+@lru_cache(maxsize=None)
+def get_templates() -> "Jinja2Templates":
+    """
+    Create the template renderer on the first page request, so API-only
+    workers never import Jinja2. Compiled templates are kept in a bytecode
+    cache (RIDE_TEMPLATE_CACHE_DIR, or a per-user temporary directory) shared
+    by every worker; precompile_templates fills it ahead of time.
+    """
+    import jinja2
+    from fastapi.templating import Jinja2Templates
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=jinja2.select_autoescape(),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(os.environ.get(TEMPLATE_CACHE_ENV))
+    )
+    return Jinja2Templates(env=env)
+
+def precompile_templates() -> List[str]:
+    """Compile every template into the bytecode cache, returning their names"""
+    env = get_templates().env
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return names
 
 @router.get("/")
 def read_root(request: Request, message: str = None, message_type: str = None):
     """Render the main page with all rides"""
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
+        request,
         "index.html",
         {
-            "request": request,
             "rides": RideService.list_rides(),
             "message": message,
             "message_type": message_type
@@ -27,10 +58,10 @@ def view_ride_details(request: Request, ride_id: int, message: str = None, messa
     """Render the detailed view for a ride"""
     try:
         ride = RideService.get_ride(ride_id)
-        return templates.TemplateResponse(
+        return get_templates().TemplateResponse(
+            request,
             "ride_details.html",
             {
-                "request": request,
                 "ride": ride,
                 "ride_id": ride_id,
                 "message": message,
@@ -78,4 +109,9 @@ async def load_sample_ride():
         return RedirectResponse(
             url=f"/?message=Error loading sample ride: {str(e)}&message_type=error",
             status_code=303
-        )
\ No newline at end of file
+        )
+
+if __name__ == "__main__":
+    # Run at deploy time (python -m app.routes.web) so workers start with compiled templates
+    for name in precompile_templates():
+        print(f"compiled {name}")
@@ -0,0 +1,268 @@
+import hashlib
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from app.models.chunked_upload import ChunkedUploadRequest, ChunkedUploadStatus
+from app.models.ride import Ride
+from app.models.ride_with_summary import RideWithSummary
+from app.models.waypoint import Waypoint
+from .ride_summary_calculator import RideSummaryAccumulator, RideSummaryCalculator
+
+_WAYPOINTS = TypeAdapter(List[Waypoint])
+
+class ChunkInfo:
+    """A received chunk: its body digest, size and time span"""
+
+    __slots__ = ('digest', 'count', 'first_epoch', 'last_epoch')
+
+    def __init__(self, digest: str, count: int, first_epoch: float, last_epoch: float) -> None:
+        self.digest = digest
+        self.count = count
+        self.first_epoch = first_epoch
+        self.last_epoch = last_epoch
+
+class UploadSession:
+    """
+    State of one chunked upload.
+
+    Chunks may arrive in any order. Each is validated on arrival; the
+    contiguous run of chunks from the start is folded into the summary
+    accumulator and moved to ``waypoints``, while chunks received ahead of
+    a gap wait in ``pending``.
+    """
+
+    def __init__(self, session_id: str, header: ChunkedUploadRequest, idempotency_key: Optional[str]) -> None:
+        self.id = session_id
+        self.header = header
+        self.idempotency_key = idempotency_key
+        self.chunks: Dict[int, ChunkInfo] = {}
+        self.pending: Dict[int, Tuple[List[Waypoint], List[float]]] = {}
+        self.folded = 0
+        self.waypoints: List[Waypoint] = []
+        self.accumulator = RideSummaryAccumulator()
+        self.received_waypoints = 0
+        self.committed_ride_id: Optional[int] = None
+        self.touched = time.monotonic()
+        self.lock = threading.Lock()
+
+    def status(self) -> ChunkedUploadStatus:
+        return ChunkedUploadStatus(
+            session_id=self.id,
+            chunk_count=self.header.chunk_count,
+            number_waypoints=self.header.number_waypoints,
+            received_waypoints=self.received_waypoints,
+            missing_chunks=[i for i in range(self.header.chunk_count) if i not in self.chunks],
+            committed_ride_id=self.committed_ride_id
+        )
+
+    def _check_order(self, index: int, first_epoch: float, last_epoch: float) -> None:
+        before = self.chunks.get(index - 1)
+        after = self.chunks.get(index + 1)
+        if (before is not None and first_epoch < before.last_epoch) or \
+                (after is not None and last_epoch > after.first_epoch):
+            raise HTTPException(
+                status_code=422,
+                detail="Waypoints must be in chronological order"
+            )
+
+    def add_chunk(self, index: int, digest: str, waypoints: List[Waypoint], epochs: List[float]) -> bool:
+        """
+        Record a validated chunk and fold every chunk that is now contiguous.
+
+        Returns:
+            False if the same chunk was already received
+
+        Raises:
+            HTTPException: 409 if a different chunk was received at this index,
+                422 if the chunk breaks chronological order with its neighbours
+                or exceeds the announced number of waypoints
+        """
+        received = self.chunks.get(index)
+        if received is not None:
+            if received.digest != digest:
+                raise HTTPException(status_code=409, detail=f"Chunk {index} was already received with different content")
+            return False
+        if self.received_waypoints + len(waypoints) > self.header.number_waypoints:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Chunks exceed the announced number_waypoints ({self.header.number_waypoints})"
+            )
+        self._check_order(index, epochs[0], epochs[-1])
+        self.chunks[index] = ChunkInfo(digest, len(waypoints), epochs[0], epochs[-1])
+        self.pending[index] = (waypoints, epochs)
+        self.received_waypoints += len(waypoints)
+        while self.folded in self.pending:
+            chunk_waypoints, chunk_epochs = self.pending.pop(self.folded)
+            self.accumulator.fold(chunk_waypoints, chunk_epochs)
+            self.waypoints.extend(chunk_waypoints)
+            self.folded += 1
+        return True
+
+    def build_ride(self) -> RideWithSummary:
+        """
+        Assemble the complete ride with its accumulated summary.
+
+        Raises:
+            HTTPException: 409 if chunks are missing or the waypoint count
+                does not match number_waypoints
+        """
+        missing = self.header.chunk_count - self.folded
+        if missing:
+            raise HTTPException(status_code=409, detail=f"{missing} chunk(s) still missing")
+        if len(self.waypoints) != self.header.number_waypoints:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Received {len(self.waypoints)} waypoints, expected {self.header.number_waypoints}"
+            )
+        header = self.header
+        return RideWithSummary.model_construct(
+            name=header.name, start_time=header.start_time, end_time=header.end_time,
+            number_waypoints=header.number_waypoints, waypoints=self.waypoints,
+            summary=self.accumulator.summary()
+        )
+
+class ChunkedUploadService:
+    """
+    Sessions of the resumable chunked upload protocol.
+
+    A client creates a session with the ride header, PUTs numbered chunks of
+    waypoints and commits. Every chunk is validated and folded into the
+    ride summary as it arrives, so a commit only assembles the ride, and a
+    client resuming after a dropped connection asks for the session's
+    missing chunks and re-sends just those. Sessions live in this worker
+    process and expire after SESSION_TTL_SECONDS without activity.
+    """
+
+    SESSION_TTL_SECONDS = 3600
+
+    _sessions: Dict[str, UploadSession] = {}
+    _keys: Dict[str, str] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _purge_expired(cls) -> None:
+        deadline = time.monotonic() - cls.SESSION_TTL_SECONDS
+        for session_id, session in list(cls._sessions.items()):
+            if session.touched < deadline:
+                cls._discard(session_id)
+
+    @classmethod
+    def _discard(cls, session_id: str) -> None:
+        session = cls._sessions.pop(session_id, None)
+        if session is not None and session.idempotency_key:
+            cls._keys.pop(session.idempotency_key, None)
+
+    @classmethod
+    def create(cls, header: ChunkedUploadRequest, idempotency_key: Optional[str] = None) -> UploadSession:
+        """
+        Open a session after validating the ride header.
+
+        Repeating a create with the same Idempotency-Key returns the existing
+        session, so a client whose create response was lost can resume.
+
+        Raises:
+            RequestValidationError: If the header fails Ride validation
+        """
+        try:
+            Ride.model_validate({**header.model_dump(exclude={'chunk_count'}), 'number_waypoints': 0})
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors)
+        with cls._lock:
+            cls._purge_expired()
+            if idempotency_key and idempotency_key in cls._keys:
+                session = cls._sessions[cls._keys[idempotency_key]]
+                if session.header != header:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="Idempotency-Key was already used for a different upload"
+                    )
+                session.touched = time.monotonic()
+                return session
+            session = UploadSession(secrets.token_urlsafe(16), header, idempotency_key)
+            cls._sessions[session.id] = session
+            if idempotency_key:
+                cls._keys[idempotency_key] = session.id
+            return session
+
+    @classmethod
+    def get(cls, session_id: str) -> UploadSession:
+        """
+        Raises:
+            HTTPException: 404 if the session does not exist or expired
+        """
+        with cls._lock:
+            cls._purge_expired()
+            session = cls._sessions.get(session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Upload session not found")
+            session.touched = time.monotonic()
+            return session
+
+    @classmethod
+    def put_chunk(cls, session_id: str, index: int, body: bytes) -> ChunkedUploadStatus:
+        """
+        Validate a chunk (a JSON array of waypoints) and add it to its session.
+
+        A re-sent chunk with the same content is acknowledged without being
+        parsed again.
+
+        Raises:
+            HTTPException: 404 for an unknown session, 409 for a committed
+                session or conflicting chunk, 422 for invalid waypoints
+            RequestValidationError: If a waypoint fails model validation
+        """
+        session = cls.get(session_id)
+        if not 0 <= index < session.header.chunk_count:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Chunk index must be between 0 and {session.header.chunk_count - 1}"
+            )
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        with session.lock:
+            if session.committed_ride_id is not None:
+                raise HTTPException(status_code=409, detail="Upload session was already committed")
+            received = session.chunks.get(index)
+            if received is not None and received.digest == digest:
+                return session.status()
+
+        # Parse and validate outside the session lock so chunks upload in parallel
+        try:
+            waypoints = _WAYPOINTS.validate_json(body)
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors)
+        if not waypoints:
+            raise HTTPException(status_code=422, detail="A chunk must contain at least one waypoint")
+        for w in waypoints:
+            RideSummaryCalculator.validate_coordinates(w.lat, w.lon)
+        epochs = RideSummaryCalculator.validate_timestamps(waypoints)
+
+        with session.lock:
+            if session.committed_ride_id is not None:
+                raise HTTPException(status_code=409, detail="Upload session was already committed")
+            session.add_chunk(index, digest, waypoints, epochs)
+            return session.status()
+
+    @classmethod
+    def delete(cls, session_id: str) -> None:
+        """
+        Abort a session, discarding its chunks.
+
+        Raises:
+            HTTPException: 404 if the session does not exist
+        """
+        with cls._lock:
+            if session_id not in cls._sessions:
+                raise HTTPException(status_code=404, detail="Upload session not found")
+            cls._discard(session_id)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._sessions.clear()
+            cls._keys.clear()
@@ -0,0 +1,86 @@
+from itertools import accumulate
+from typing import List, Sequence, Tuple
+
+METERS_PER_MILE = 1609.344
+METERS_PER_FOOT = 0.3048
+GRAVITY_M_S2 = 9.80665
+
+class EnergyModel:
+    """
+    Estimated battery energy an e-bike spends on a ride.
+
+    Each segment between consecutive waypoints costs the work against
+    rolling resistance, gravity (its grade) and air drag at its average
+    speed, divided by the battery-to-wheel efficiency; descents are not
+    regenerated, so a segment costs at least nothing. Energy is computed
+    from the distance, time and elevation columns of a ride in one pass,
+    and battery figures are relative to a full BATTERY_WH pack.
+
+    Stored summaries record VERSION; bump it when the model or its
+    parameters change so RideService.reevaluate_energy re-estimates the
+    stored rides.
+    """
+
+    VERSION = "1"
+    MASS_KG = 100.0  # rider and bike
+    ROLLING_RESISTANCE = 0.006
+    DRAG_AREA_M2 = 0.5
+    AIR_DENSITY_KG_M3 = 1.225
+    EFFICIENCY = 0.8
+    BATTERY_WH = 500.0
+    MAX_GRADE = 0.3
+    MIN_GRADE_DISTANCE_M = 5.0  # shorter segments are treated as flat (GPS elevation noise)
+
+    @classmethod
+    def segment_energy_wh(cls, distances_mi: Sequence[float], epochs: Sequence[float],
+                          elevations_ft: Sequence[float]) -> List[float]:
+        """
+        Energy of each segment of a ride.
+
+        Args:
+            distances_mi: Length of each segment (one fewer than the waypoints)
+            epochs: Epoch seconds of each waypoint
+            elevations_ft: Elevation of each waypoint
+
+        Returns:
+            Watt-hours per segment, each at least 0
+        """
+        rolling = cls.MASS_KG * GRAVITY_M_S2 * cls.ROLLING_RESISTANCE
+        climbing = cls.MASS_KG * GRAVITY_M_S2
+        drag = 0.5 * cls.AIR_DENSITY_KG_M3 * cls.DRAG_AREA_M2
+        max_grade = cls.MAX_GRADE
+        min_distance = cls.MIN_GRADE_DISTANCE_M
+        joules_to_wh = 1 / (3600 * cls.EFFICIENCY)
+        energy = []
+        for distance_mi, t0, t1, e0, e1 in zip(distances_mi, epochs, epochs[1:], elevations_ft, elevations_ft[1:]):
+            meters = distance_mi * METERS_PER_MILE
+            seconds = t1 - t0
+            speed = meters / seconds if seconds > 0 else 0.0
+            grade = 0.0
+            if meters >= min_distance:
+                grade = max(-max_grade, min(max_grade, (e1 - e0) * METERS_PER_FOOT / meters))
+            force = rolling + climbing * grade + drag * speed * speed
+            energy.append(force * meters * joules_to_wh if force > 0 else 0.0)
+        return energy
+
+    @classmethod
+    def estimate(cls, distances_mi: Sequence[float], epochs: Sequence[float],
+                 elevations_ft: Sequence[float]) -> Tuple[float, float]:
+        """
+        Total energy of a ride and the share of the battery it used.
+
+        Returns:
+            Tuple of Wh consumed and battery used in percent (may exceed 100)
+        """
+        energy_wh = sum(cls.segment_energy_wh(distances_mi, epochs, elevations_ft))
+        return energy_wh, cls.battery_used_pct(energy_wh)
+
+    @classmethod
+    def battery_used_pct(cls, energy_wh: float) -> float:
+        return energy_wh / cls.BATTERY_WH * 100
+
+    @classmethod
+    def battery_profile(cls, segment_energy_wh: Sequence[float]) -> List[float]:
+        """Battery remaining in percent at each waypoint, starting full (floored at 0)"""
+        used = accumulate(segment_energy_wh, initial=0.0)
+        return [max(0.0, 100 - cls.battery_used_pct(energy_wh)) for energy_wh in used]
@@ -0,0 +1,123 @@
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+
+UTILS_GPX_DIR = Path(__file__).resolve().parents[3] / 'utils-gpx'
+GPX_WORKERS_ENV = "RIDE_GPX_WORKERS"
+DEFAULT_RIDE_NAME = "Untitled ride"
+
+def _load_converter() -> ModuleType:
+    """Import utils-gpx's converter (main.py) under a name that cannot clash with app modules"""
+    module = sys.modules.get('utils_gpx_main')
+    if module is None:
+        # main.py imports its sibling modules (utils, models, ...) by plain name
+        if str(UTILS_GPX_DIR) not in sys.path:
+            sys.path.append(str(UTILS_GPX_DIR))
+        spec = importlib.util.spec_from_file_location('utils_gpx_main', UTILS_GPX_DIR / 'main.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['utils_gpx_main'] = module
+    return module
+
+def convert_gpx_bytes(data: bytes, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert a GPX document to Ride JSON with the utils-gpx converter.
+
+    Runs in the ingest pool's worker processes, so it only takes and
+    returns picklable builtins.
+
+    Args:
+        data: Raw GPX file contents
+        name: Ride name overriding the GPX track name
+
+    Returns:
+        The Ride fields (name, start_time, end_time, number_waypoints, waypoints)
+
+    Raises:
+        ValueError: If the document is not valid GPX
+    """
+    # Imported here, in the worker process, so the server does not load gpxpy at startup
+    import gpxpy
+    converter = _load_converter()
+    try:
+        gpx = gpxpy.parse(data)
+    except (gpxpy.gpx.GPXException, ValueError) as e:
+        raise ValueError(f"Invalid GPX file: {e}") from None
+    ride = converter.ride_from_gpx(gpx)
+    return {
+        'name': name or ride['name'] or DEFAULT_RIDE_NAME,
+        'start_time': ride['start_time'],
+        'end_time': ride['end_time'],
+        'number_waypoints': ride['number_waypoints'],
+        'waypoints': ride['waypoints']
+    }
+
+class GpxIngestPool:
+    """
+    Process pool converting uploaded GPX files off the event loop.
+
+    GPX parsing is CPU-bound pure Python, so conversions run in worker
+    processes (RIDE_GPX_WORKERS, default one per CPU) rather than in the
+    threadpool, where they would contend for the GIL with request handling.
+    The pool is started on first use.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether the optional gpxpy dependency is installed (checked without importing it)"""
+        return importlib.util.find_spec('gpxpy') is not None
+
+    @staticmethod
+    def worker_count() -> int:
+        return int(os.environ.get(GPX_WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                # Spawned (not forked) workers: the server process runs threads
+                cls._executor = ProcessPoolExecutor(cls.worker_count(), mp_context=multiprocessing.get_context('spawn'))
+            return cls._executor
+
+    @classmethod
+    async def convert(cls, data: bytes, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convert a GPX upload in a worker process.
+
+        Raises:
+            HTTPException: 415 if gpxpy is not installed, 422 for invalid GPX,
+                503 if a worker process died (the pool is restarted)
+        """
+        if not cls.available():
+            raise HTTPException(status_code=415, detail="GPX uploads require the gpxpy package on the server")
+        executor = cls.executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, convert_gpx_bytes, data, name)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except BrokenProcessPool:
+            with cls._lock:
+                if cls._executor is executor:
+                    cls._executor = None
+            executor.shutdown(wait=False)
+            raise HTTPException(status_code=503, detail="GPX conversion worker failed; retry the upload")
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the worker processes (they are started again on the next upload)"""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,203 @@
+import hashlib
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from math import ceil, cos, log, log1p, pi, radians, tan
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.models.ride_with_summary import RideWithSummary
+
+TileKey = Tuple[int, int, int]
+
+MAX_MERCATOR_LAT = 85.05112878
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(width: int, height: int, rows: List[bytes]) -> bytes:
+    """Encode 8-bit RGBA rows (width * 4 bytes each) as a PNG image"""
+    raw = b"".join(b"\x00" + row for row in rows)
+    return (b"\x89PNG\r\n\x1a\n"
+            + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + _png_chunk(b"IDAT", zlib.compress(raw, 6))
+            + _png_chunk(b"IEND", b""))
+
+def _heat_palette(levels: int = 256) -> List[bytes]:
+    """RGBA colours from transparent through blue and yellow to red"""
+    stops = [(0.0, (0, 0, 255, 0)), (0.15, (0, 80, 255, 140)), (0.5, (255, 220, 0, 200)), (1.0, (230, 0, 0, 235))]
+    palette = []
+    for level in range(levels):
+        t = level / (levels - 1)
+        for (t0, c0), (t1, c1) in zip(stops, stops[1:]):
+            if t <= t1:
+                f = (t - t0) / (t1 - t0)
+                palette.append(bytes(round(a + (b - a) * f) for a, b in zip(c0, c1)))
+                break
+    return palette
+
+class HeatmapTiles:
+    """
+    Fleet heatmap as per-zoom density tiles in the Web Mercator tile grid.
+
+    Each tile holds TILE_BINS x TILE_BINS counts of how many rides pass
+    through each bin. A ride's track is rasterized once, at MAX_ZOOM, by
+    walking every segment across the bins it crosses; the bins of lower
+    zoom levels are the same set shifted right, so adding or deleting a
+    ride only touches the tiles its track covers. Counts are per ride, not
+    per waypoint, so a rider standing still does not dominate a bin.
+    Rendered PNGs are kept in a small LRU cache keyed by tile content.
+
+    Tiles are built in this worker from the rides it stores or loads at
+    startup.
+    """
+
+    MIN_ZOOM = 0
+    MAX_ZOOM = 12
+    TILE_BINS = 64  # bins per tile side; a PNG tile is TILE_SIZE pixels
+    TILE_SIZE = 256
+    SATURATION_RIDES = 100  # rides at which a bin reaches full colour (log scale)
+    MAX_CACHED_PNGS = 512
+
+    _tiles: Dict[TileKey, array] = {}
+    _digests: Dict[TileKey, str] = {}
+    _pngs: 'OrderedDict[Tuple[TileKey, str], bytes]' = OrderedDict()
+    _lock = threading.Lock()
+    _palette = _heat_palette()
+    _empty_png: Optional[bytes] = None
+
+    @classmethod
+    def project(cls, lat: float, lon: float, zoom: int) -> Tuple[float, float]:
+        """Web Mercator position in bins of a zoom level (world is 2^zoom * TILE_BINS bins wide)"""
+        world = (1 << zoom) * cls.TILE_BINS
+        lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+        phi = radians(lat)
+        x = (lon + 180.0) / 360.0 * world
+        y = (1.0 - log(tan(phi) + 1.0 / cos(phi)) / pi) / 2.0 * world
+        return min(max(x, 0.0), world - 1e-9), min(max(y, 0.0), world - 1e-9)
+
+    @classmethod
+    def track_bins(cls, ride: RideWithSummary) -> Set[Tuple[int, int]]:
+        """Bins at MAX_ZOOM crossed by a ride's track"""
+        bins: Set[Tuple[int, int]] = set()
+        prev: Optional[Tuple[float, float]] = None
+        for w in ride.waypoints:
+            x, y = cls.project(w.lat, w.lon, cls.MAX_ZOOM)
+            if prev is not None:
+                dx, dy = x - prev[0], y - prev[1]
+                steps = ceil(max(abs(dx), abs(dy)))
+                if steps > 1:
+                    # Intermediate points one bin apart, so the line has no gaps
+                    for step in range(1, steps):
+                        f = step / steps
+                        bins.add((int(prev[0] + dx * f), int(prev[1] + dy * f)))
+            bins.add((int(x), int(y)))
+            prev = (x, y)
+        return bins
+
+    @classmethod
+    def _apply(cls, ride: RideWithSummary, delta: int) -> None:
+        bins = cls.track_bins(ride)
+        side = cls.TILE_BINS
+        with cls._lock:
+            for zoom in range(cls.MAX_ZOOM, cls.MIN_ZOOM - 1, -1):
+                touched = set()
+                for bx, by in bins:
+                    key = (zoom, bx // side, by // side)
+                    tile = cls._tiles.get(key)
+                    if tile is None:
+                        if delta < 0:
+                            continue
+                        tile = cls._tiles[key] = array('I', bytes(4 * side * side))
+                    index = (by % side) * side + bx % side
+                    tile[index] = max(0, tile[index] + delta)
+                    touched.add(key)
+                for key in touched:
+                    if delta < 0 and not any(cls._tiles[key]):
+                        del cls._tiles[key]
+                    cls._digests.pop(key, None)
+                bins = {(bx >> 1, by >> 1) for bx, by in bins}
+
+    @classmethod
+    def add_ride(cls, ride: RideWithSummary) -> None:
+        """Count a newly stored ride in every tile its track crosses"""
+        cls._apply(ride, 1)
+
+    @classmethod
+    def remove_ride(cls, ride: RideWithSummary) -> None:
+        """Remove a deleted ride's counts"""
+        cls._apply(ride, -1)
+
+    @classmethod
+    def rebuild(cls, rides: Iterable[Tuple[int, RideWithSummary]]) -> None:
+        """Recompute every tile from a ride store's rides"""
+        cls.clear()
+        for _, ride in rides:
+            cls.add_ride(ride)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._tiles.clear()
+            cls._digests.clear()
+            cls._pngs.clear()
+
+    @classmethod
+    def counts(cls, z: int, x: int, y: int) -> Tuple[Optional[bytes], str]:
+        """
+        A tile's counts as little-endian uint32 bytes (row-major, TILE_BINS
+        square) and a content digest for ETags; None for an empty tile.
+        """
+        key = (z, x, y)
+        with cls._lock:
+            tile = cls._tiles.get(key)
+            if tile is None:
+                return None, "empty"
+            data = tile.tobytes() if sys.byteorder == "little" else cls._swapped(tile)
+            digest = cls._digests.get(key)
+            if digest is None:
+                digest = cls._digests[key] = hashlib.blake2b(data, digest_size=8).hexdigest()
+            return data, digest
+
+    @staticmethod
+    def _swapped(tile: array) -> bytes:
+        copy = array('I', tile)
+        copy.byteswap()
+        return copy.tobytes()
+
+    @classmethod
+    def render_png(cls, z: int, x: int, y: int) -> Tuple[bytes, str]:
+        """Render a tile as a TILE_SIZE square PNG, returning it with its content digest"""
+        data, digest = cls.counts(z, x, y)
+        if data is None:
+            if cls._empty_png is None:
+                cls._empty_png = encode_png(cls.TILE_SIZE, cls.TILE_SIZE,
+                                            [bytes(4 * cls.TILE_SIZE)] * cls.TILE_SIZE)
+            return cls._empty_png, digest
+        cache_key = ((z, x, y), digest)
+        with cls._lock:
+            png = cls._pngs.get(cache_key)
+            if png is not None:
+                cls._pngs.move_to_end(cache_key)
+                return png, digest
+
+        side = cls.TILE_BINS
+        scale = cls.TILE_SIZE // side
+        counts = array('I')
+        counts.frombytes(data)
+        if sys.byteorder != "little":
+            counts.byteswap()
+        top = len(cls._palette) - 1
+        norm = top / log1p(cls.SATURATION_RIDES)
+        colours = [cls._palette[min(top, int(log1p(count) * norm))] * scale for count in counts]
+        rows = []
+        for row in range(side):
+            pixels = b"".join(colours[row * side:(row + 1) * side])
+            rows.extend([pixels] * scale)
+        png = encode_png(cls.TILE_SIZE, cls.TILE_SIZE, rows)
+        with cls._lock:
+            cls._pngs[cache_key] = png
+            while len(cls._pngs) > cls.MAX_CACHED_PNGS:
+                cls._pngs.popitem(last=False)
+        return png, digest
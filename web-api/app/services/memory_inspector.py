@@ -0,0 +1,190 @@
+import sys
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+from fastapi import HTTPException
+from pydantic import BaseModel
+from app.models.ride_with_summary import RideWithSummary
+from app.storage import RideStore
+from .ride_comparator import RideComparator
+
+class MemoryInspector:
+    """
+    Memory accounting for stored rides and tracemalloc snapshots of the process.
+
+    Ride sizes are deep ``sys.getsizeof`` totals over the model objects.
+    Field-name strings are interned and shared by every model, so they are
+    not charged to individual rides.
+    """
+
+    MAX_SNAPSHOTS = 5
+
+    _snapshots: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+    _next_snapshot_id = 1
+    _lock = threading.Lock()
+
+    @classmethod
+    def deep_size(cls, obj: Any, seen: Optional[Set[int]] = None) -> int:
+        """Size in bytes of an object and everything it references (each object counted once)"""
+        if seen is None:
+            seen = set()
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, BaseModel):
+            size += sys.getsizeof(obj.__dict__) + sys.getsizeof(obj.__pydantic_fields_set__)
+            size += sum(cls.deep_size(value, seen) for value in obj.__dict__.values())
+        elif isinstance(obj, dict):
+            size += sum(cls.deep_size(key, seen) + cls.deep_size(value, seen) for key, value in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sum(cls.deep_size(item, seen) for item in obj)
+        return size
+
+    @classmethod
+    def ride_size(cls, ride: RideWithSummary) -> Dict[str, int]:
+        """Bytes held by a ride's metadata (header fields), waypoints and summary"""
+        seen: Set[int] = set()
+        waypoints = cls.deep_size(ride.waypoints, seen)
+        summary = cls.deep_size(ride.summary, seen)
+        total = cls.deep_size(ride, seen) + waypoints + summary
+        return {
+            "metadata_bytes": total - waypoints - summary,
+            "waypoints_bytes": waypoints,
+            "summary_bytes": summary,
+            "total_bytes": total
+        }
+
+    @classmethod
+    def store_report(cls, store: RideStore, per_ride_limit: int = 20) -> Dict[str, Any]:
+        """
+        Account for the memory held by a ride store and the services' caches.
+
+        Args:
+            store: Ride store to inspect
+            per_ride_limit: Number of largest rides to list individually
+
+        Returns:
+            Totals by category and tier, the largest rides, and cache sizes
+        """
+        totals = {"metadata_bytes": 0, "waypoints_bytes": 0, "summary_bytes": 0, "serialized_bytes": 0}
+        tiers: Dict[str, int] = {}
+        rides: List[Dict[str, Any]] = []
+        for ride_id, tier, held in store.resident():
+            tiers[tier] = tiers.get(tier, 0) + 1
+            if isinstance(held, RideWithSummary):
+                entry = cls.ride_size(held)
+            elif isinstance(held, bytes):
+                entry = {"serialized_bytes": len(held), "total_bytes": len(held)}
+            else:
+                entry = {"total_bytes": 0}
+            for key in totals:
+                totals[key] += entry.get(key, 0)
+            rides.append({"id": ride_id, "tier": tier, **entry})
+
+        rides.sort(key=lambda entry: entry["total_bytes"], reverse=True)
+        return {
+            "store": type(store).__name__,
+            "resident_rides": len(rides),
+            "tiers": tiers,
+            "totals": {**totals, "total_bytes": sum(totals.values())},
+            "caches": {"comparison_profiles_bytes": RideComparator.cached_bytes()},
+            "largest_rides": rides[:per_ride_limit],
+            "tracemalloc": cls.tracemalloc_status()
+        }
+
+    @staticmethod
+    def tracemalloc_status() -> Dict[str, Any]:
+        """Whether tracemalloc is tracing, with its current and peak traced bytes"""
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "traced_bytes": current, "peak_bytes": peak}
+
+    @classmethod
+    def start_tracing(cls, frames: int = 1) -> Dict[str, Any]:
+        """Start tracemalloc (restarting it if the frame count changes)"""
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            tracemalloc.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return cls.tracemalloc_status()
+
+    @classmethod
+    def stop_tracing(cls) -> Dict[str, Any]:
+        """Stop tracemalloc and drop the stored snapshots"""
+        tracemalloc.stop()
+        with cls._lock:
+            cls._snapshots.clear()
+        return cls.tracemalloc_status()
+
+    @staticmethod
+    def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    @staticmethod
+    def _format_stats(stats: List[Any], limit: int) -> List[Dict[str, Any]]:
+        top = []
+        for stat in stats[:limit]:
+            entry = {
+                "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size_bytes": stat.size,
+                "count": stat.count
+            }
+            if isinstance(stat, tracemalloc.StatisticDiff):
+                entry.update(size_diff_bytes=stat.size_diff, count_diff=stat.count_diff)
+            top.append(entry)
+        return top
+
+    @classmethod
+    def take_snapshot(cls, limit: int = 20) -> Dict[str, Any]:
+        """
+        Take a tracemalloc snapshot, keep it for diffs and return its top allocations.
+
+        Raises:
+            HTTPException: 409 if tracemalloc is not tracing
+        """
+        if not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="tracemalloc is not tracing; start it first")
+        snapshot = cls._filtered(tracemalloc.take_snapshot())
+        with cls._lock:
+            snapshot_id = cls._next_snapshot_id
+            cls._next_snapshot_id += 1
+            cls._snapshots[snapshot_id] = {
+                "snapshot": snapshot,
+                "taken_at": datetime.now(timezone.utc).isoformat()
+            }
+            while len(cls._snapshots) > cls.MAX_SNAPSHOTS:
+                cls._snapshots.popitem(last=False)
+        return {
+            "id": snapshot_id,
+            "taken_at": cls._snapshots[snapshot_id]["taken_at"],
+            "total_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+            "top": cls._format_stats(snapshot.statistics("lineno"), limit)
+        }
+
+    @classmethod
+    def diff_snapshots(cls, old_id: int, new_id: int, limit: int = 20) -> Dict[str, Any]:
+        """
+        Compare two stored snapshots, largest growth first.
+
+        Raises:
+            HTTPException: 404 if either snapshot is unknown (or was evicted)
+        """
+        with cls._lock:
+            old, new = cls._snapshots.get(old_id), cls._snapshots.get(new_id)
+        if old is None or new is None:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        stats = new["snapshot"].compare_to(old["snapshot"], "lineno")
+        return {
+            "old": old_id,
+            "new": new_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": cls._format_stats(stats, limit)
+        }
@@ -0,0 +1,188 @@
+import cProfile
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+SAMPLE_RATE_ENV = "RIDE_PROFILE_SAMPLE_RATE"
+BUFFER_SIZE_ENV = "RIDE_PROFILE_BUFFER_SIZE"
+
+# pstats function key: (filename, line number, function name)
+FunctionKey = Tuple[str, int, str]
+
+class RequestProfile:
+    """cProfile capture of one request's ride handling"""
+
+    def __init__(self, method: str, path: str, reason: str) -> None:
+        self.id: Optional[int] = None
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.duration_ms = 0.0
+        self.profiler = cProfile.Profile()
+
+    def stats(self) -> pstats.Stats:
+        return pstats.Stats(self.profiler)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3)
+        }
+
+class RequestProfiler:
+    """
+    Opt-in cProfile capture of ride uploads, kept in a ring buffer.
+
+    A request is profiled when an admin sends ``X-Profile: 1`` or when it
+    is picked by the RIDE_PROFILE_SAMPLE_RATE sampling rate (0 by default).
+    Unprofiled requests only pay for that check: ``call`` runs the handler
+    directly unless the request's context carries a profile.
+    """
+
+    _current: ContextVar[Optional[RequestProfile]] = ContextVar("ride_request_profile", default=None)
+    _profiles: Deque[RequestProfile] = deque(maxlen=int(os.environ.get(BUFFER_SIZE_ENV, 20)))
+    _ids = itertools.count(1)
+    _lock = threading.Lock()
+    sample_rate = float(os.environ.get(SAMPLE_RATE_ENV, 0))
+
+    @classmethod
+    def configure(cls, sample_rate: Optional[float] = None, buffer_size: Optional[int] = None) -> None:
+        """Change the sampling rate or ring buffer size (clearing stored profiles on resize)"""
+        if sample_rate is not None:
+            cls.sample_rate = sample_rate
+        if buffer_size is not None:
+            with cls._lock:
+                cls._profiles = deque(maxlen=buffer_size)
+
+    @classmethod
+    def start(cls, method: str, path: str, requested: bool) -> Optional[RequestProfile]:
+        """
+        Decide whether to profile the current request and attach a profile to its context.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            requested: Whether an admin explicitly asked for a profile
+
+        Returns:
+            The new profile, or None if the request is not profiled
+        """
+        if requested:
+            reason = "requested"
+        elif cls.sample_rate > 0 and random.random() < cls.sample_rate:
+            reason = "sampled"
+        else:
+            return None
+        profile = RequestProfile(method, path, reason)
+        cls._current.set(profile)
+        return profile
+
+    @classmethod
+    def call(cls, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a handler, profiling it if the current request is being profiled"""
+        profile = cls._current.get()
+        if profile is None:
+            return func(*args)
+        start = time.perf_counter()
+        profile.profiler.enable()
+        try:
+            return func(*args)
+        finally:
+            profile.profiler.disable()
+            profile.duration_ms += (time.perf_counter() - start) * 1000
+
+    @classmethod
+    def finish(cls, profile: RequestProfile) -> None:
+        """Store a finished profile in the ring buffer, evicting the oldest"""
+        with cls._lock:
+            profile.id = next(cls._ids)
+            cls._profiles.append(profile)
+
+    @classmethod
+    def list_profiles(cls) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first"""
+        with cls._lock:
+            return [profile.metadata() for profile in reversed(cls._profiles)]
+
+    @classmethod
+    def get_profile(cls, profile_id: int) -> Optional[RequestProfile]:
+        with cls._lock:
+            return next((p for p in cls._profiles if p.id == profile_id), None)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._profiles.clear()
+
+    @staticmethod
+    def to_pstats(profile: RequestProfile) -> bytes:
+        """Serialize a profile in the pstats format written by ``Stats.dump_stats``"""
+        return marshal.dumps(profile.stats().stats)
+
+    @staticmethod
+    def to_speedscope(profile: RequestProfile) -> Dict[str, Any]:
+        """
+        Convert a profile to a speedscope "sampled" profile.
+
+        cProfile records caller/callee edges rather than full stacks, so each
+        function's own time is attributed to one stack, built by following
+        its most expensive caller up to a root. Weights are in seconds.
+        """
+        stats = profile.stats().stats
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[FunctionKey, int] = {}
+
+        def index(key: FunctionKey) -> int:
+            if key not in frame_index:
+                filename, line, name = key
+                frame_index[key] = len(frames)
+                frames.append({"name": name, "file": filename, "line": line})
+            return frame_index[key]
+
+        def stack(key: FunctionKey) -> List[int]:
+            path = [key]
+            seen = {key}
+            callers = stats[key][4]
+            while callers:
+                caller = max(callers, key=lambda k: callers[k][3])
+                if caller in seen or caller not in stats:
+                    break
+                path.append(caller)
+                seen.add(caller)
+                callers = stats[caller][4]
+            return [index(k) for k in reversed(path)]
+
+        samples, weights = [], []
+        for key, (_, _, own_time, _, _) in stats.items():
+            if own_time > 0:
+                samples.append(stack(key))
+                weights.append(own_time)
+        total = sum(weights)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{profile.method} {profile.path} #{profile.id}",
+            "exporter": "web-api RequestProfiler",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{profile.method} {profile.path}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights
+            }]
+        }
@@ -0,0 +1,177 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple
+from fastapi import HTTPException
+from app import geo
+from app.models.ride_comparison import RideComparison
+from app.models.ride_with_summary import RideWithSummary
+from .ride_summary_calculator import RideSummaryCalculator
+
+class RideProfile(NamedTuple):
+    """Waypoint columns of a ride indexed by cumulative distance"""
+    distances: array  # cumulative miles, non-decreasing
+    seconds: array  # elapsed seconds since the first waypoint
+    elevations: array  # feet
+
+class RideComparator:
+    """
+    Distance-aligned comparison of two rides.
+
+    Each ride's cumulative-distance profile is computed once and kept in a
+    small LRU cache, so comparing the same rides again only pays for the
+    resampling.
+    """
+
+    MAX_CACHED_PROFILES = 256
+    MAX_SAMPLES = 10000
+
+    _profiles: 'OrderedDict[int, RideProfile]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def build_profile(ride: RideWithSummary) -> RideProfile:
+        """
+        Compute the cumulative distance, elapsed time and elevation columns of a ride.
+
+        Args:
+            ride: Stored ride (its waypoints are already validated)
+
+        Returns:
+            RideProfile with one entry per waypoint
+        """
+        waypoints = ride.waypoints
+        epochs = RideSummaryCalculator.to_epochs(waypoints)
+        distances = array('d', [0.0])
+        total = 0.0
+        for segment in geo.segment_distances([w.lat for w in waypoints], [w.lon for w in waypoints]):
+            total += segment
+            distances.append(total)
+        start = epochs[0] if epochs else 0.0
+        return RideProfile(
+            distances,
+            array('d', [epoch - start for epoch in epochs]),
+            array('d', [w.elevation_ft for w in waypoints])
+        )
+
+    @classmethod
+    def profile(cls, ride_id: int, ride: RideWithSummary) -> RideProfile:
+        """Return the cached profile of a ride, computing it on first use"""
+        with cls._lock:
+            profile = cls._profiles.get(ride_id)
+            if profile is not None:
+                cls._profiles.move_to_end(ride_id)
+                return profile
+        profile = cls.build_profile(ride)
+        with cls._lock:
+            cls._profiles[ride_id] = profile
+            while len(cls._profiles) > cls.MAX_CACHED_PROFILES:
+                cls._profiles.popitem(last=False)
+        return profile
+
+    @classmethod
+    def invalidate(cls, ride_id: int) -> None:
+        """Drop the cached profile of a changed or deleted ride"""
+        with cls._lock:
+            cls._profiles.pop(ride_id, None)
+
+    @classmethod
+    def cached_bytes(cls) -> int:
+        """Memory held by the cached profiles' column buffers"""
+        with cls._lock:
+            return sum(column.buffer_info()[1] * column.itemsize
+                       for profile in cls._profiles.values() for column in profile)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop every cached profile (ride IDs may be reused by a new store)"""
+        with cls._lock:
+            cls._profiles.clear()
+
+    @staticmethod
+    def resample(profile: RideProfile, axis: List[float]) -> Dict[str, List[float]]:
+        """
+        Linearly interpolate a profile onto increasing distances in one merge pass.
+
+        Speed at a sample is the average speed of the segment containing it
+        (0 for segments without elapsed time).
+
+        Args:
+            profile: Ride profile
+            axis: Increasing distances in miles, within the ride's total distance
+
+        Returns:
+            Dictionary of seconds, speed_mph and elevation_ft columns
+        """
+        distances, seconds, elevations = profile
+        last = len(distances) - 1
+        out_seconds, out_speeds, out_elevations = [], [], []
+        i = 0
+        for x in axis:
+            # Advance to the first segment [i, i + 1] reaching x; a stop is a
+            # zero-length segment, so a sample at the stop takes the arrival time
+            while i < last - 1 and distances[i + 1] < x:
+                i += 1
+            d0, d1 = distances[i], distances[min(i + 1, last)]
+            span = d1 - d0
+            fraction = (x - d0) / span if span > 0 else 0.0
+            fraction = min(max(fraction, 0.0), 1.0)
+            t0, t1 = seconds[i], seconds[min(i + 1, last)]
+            e0, e1 = elevations[i], elevations[min(i + 1, last)]
+            out_seconds.append(t0 + (t1 - t0) * fraction)
+            out_elevations.append(e0 + (e1 - e0) * fraction)
+            out_speeds.append(span / ((t1 - t0) / 3600) if t1 > t0 else 0.0)
+        return {"seconds": out_seconds, "speed_mph": out_speeds, "elevation_ft": out_elevations}
+
+    @classmethod
+    def compare(cls, a_id: int, a: RideProfile, b_id: int, b: RideProfile,
+                step_mi: float) -> RideComparison:
+        """
+        Resample two ride profiles onto a shared distance axis and compute deltas.
+
+        The axis runs from 0 to the shorter ride's distance in steps of
+        step_mi. Deltas are ride B minus ride A, so a positive time gap means
+        B reached that distance later than A.
+
+        Args:
+            a_id: ID of the reference ride
+            a: Profile of the reference ride
+            b_id: ID of the compared ride
+            b: Profile of the compared ride
+            step_mi: Distance between samples in miles
+
+        Returns:
+            RideComparison with one entry per sample in each column
+
+        Raises:
+            HTTPException: If a ride covers no distance or the step gives too many samples
+        """
+        shared = min(a.distances[-1], b.distances[-1])
+        if shared <= 0:
+            raise HTTPException(status_code=422, detail="Both rides must cover some distance to be compared")
+        count = int(shared / step_mi) + 1
+        if count > cls.MAX_SAMPLES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"step_mi too small: {count} samples exceeds the limit of {cls.MAX_SAMPLES}"
+            )
+        axis = [i * step_mi for i in range(count)]
+        if axis[-1] < shared:
+            axis.append(shared)
+
+        sa, sb = cls.resample(a, axis), cls.resample(b, axis)
+        return RideComparison(
+            a=a_id,
+            b=b_id,
+            step_mi=step_mi,
+            distance_mi=axis,
+            time_a_s=sa["seconds"],
+            time_b_s=sb["seconds"],
+            time_gap_s=[tb - ta for ta, tb in zip(sa["seconds"], sb["seconds"])],
+            speed_a_mph=sa["speed_mph"],
+            speed_b_mph=sb["speed_mph"],
+            speed_delta_mph=[vb - va for va, vb in zip(sa["speed_mph"], sb["speed_mph"])],
+            elevation_a_ft=sa["elevation_ft"],
+            elevation_b_ft=sb["elevation_ft"],
+            elevation_delta_ft=[eb - ea for ea, eb in zip(sa["elevation_ft"], sb["elevation_ft"])]
+        )
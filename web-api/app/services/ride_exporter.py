@@ -0,0 +1,96 @@
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from xml.sax.saxutils import escape
+from app.models.ride_with_summary import RideWithSummary
+from .ride_summary_calculator import RideSummaryCalculator
+
+FEET_PER_METER = 3.28084
+
+Rides = Iterable[Tuple[int, RideWithSummary]]
+
+class RideExporter:
+    """
+    Streaming serializers for bulk ride export.
+
+    Each format is a generator yielding encoded chunks of at most
+    CHUNK_WAYPOINTS waypoints, so memory use is bounded by the largest
+    ride being exported rather than by the number of rides.
+    """
+
+    CHUNK_WAYPOINTS = 1000
+    CSV_COLUMNS = ("ride_id", "ride_name", "timestamp", "lat", "lon", "elevation_ft")
+    MEDIA_TYPES = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+        "gpx": "application/gpx+xml"
+    }
+
+    @staticmethod
+    def in_time_range(ride: RideWithSummary, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        """Whether a ride starts at or after start and before end (naive bounds are UTC)"""
+        if start is None and end is None:
+            return True
+        started = RideSummaryCalculator.parse_timestamp(ride.start_time)
+        if started.tzinfo is None:
+            started = started.replace(tzinfo=timezone.utc)
+        if start is not None and started < (start if start.tzinfo else start.replace(tzinfo=timezone.utc)):
+            return False
+        if end is not None and started >= (end if end.tzinfo else end.replace(tzinfo=timezone.utc)):
+            return False
+        return True
+
+    @classmethod
+    def ndjson_chunks(cls, rides: Rides) -> Iterator[bytes]:
+        """One {"id", "ride"} JSON object per line, as in the ride list"""
+        for ride_id, ride in rides:
+            yield b'{"id":%d,"ride":%s}\n' % (ride_id, ride.model_dump_json().encode("utf-8"))
+
+    @classmethod
+    def csv_chunks(cls, rides: Rides) -> Iterator[bytes]:
+        """One row per waypoint, led by the ride ID and name"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+
+        def drain() -> bytes:
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writerow(cls.CSV_COLUMNS)
+        yield drain()
+        for ride_id, ride in rides:
+            for start in range(0, len(ride.waypoints), cls.CHUNK_WAYPOINTS):
+                writer.writerows(
+                    (ride_id, ride.name, w.timestamp, w.lat, w.lon, w.elevation_ft)
+                    for w in ride.waypoints[start:start + cls.CHUNK_WAYPOINTS]
+                )
+                yield drain()
+
+    @classmethod
+    def gpx_chunks(cls, rides: Rides) -> Iterator[bytes]:
+        """A GPX 1.1 document with one track per ride (elevations in meters)"""
+        yield (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+               b'<gpx version="1.1" creator="web-api" xmlns="http://www.topografix.com/GPX/1/1">\n')
+        for ride_id, ride in rides:
+            yield (f'<trk><name>{escape(ride.name)}</name><number>{ride_id}</number>'
+                   f'<trkseg>\n').encode("utf-8")
+            for start in range(0, len(ride.waypoints), cls.CHUNK_WAYPOINTS):
+                yield "".join(
+                    f'<trkpt lat="{w.lat!r}" lon="{w.lon!r}">'
+                    f'<ele>{w.elevation_ft / FEET_PER_METER:.2f}</ele>'
+                    f'<time>{escape(w.timestamp)}</time></trkpt>\n'
+                    for w in ride.waypoints[start:start + cls.CHUNK_WAYPOINTS]
+                ).encode("utf-8")
+            yield b'</trkseg></trk>\n'
+        yield b'</gpx>\n'
+
+    @classmethod
+    def serializer(cls, export_format: str) -> Callable[[Rides], Iterator[bytes]]:
+        """The chunk generator for an export format (ndjson, csv or gpx)"""
+        serializers: Dict[str, Callable[[Rides], Iterator[bytes]]] = {
+            "ndjson": cls.ndjson_chunks, "csv": cls.csv_chunks, "gpx": cls.gpx_chunks
+        }
+        return serializers[export_format]
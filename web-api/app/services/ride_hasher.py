@@ -0,0 +1,80 @@
+import hashlib
+import struct
+from typing import Any, Dict, List, Optional
+from app.models.ride import Ride
+
+class RideHasher:
+    """Content hashing of rides over their canonical waypoint columns."""
+
+    HEADER_FIELDS = ('name', 'start_time', 'end_time', 'number_waypoints')
+
+    @staticmethod
+    def hash_columns(header: tuple, timestamps: List[str], lats: List[float], lons: List[float],
+                     elevations: List[float]) -> str:
+        """
+        Hash ride header fields and waypoint columns into a hex digest.
+        
+        Coordinates are hashed as packed doubles and timestamps as their
+        strings, so the same ride hashes identically whether it comes from
+        raw JSON or from validated models. The header is included so a
+        re-sent ride only matches when it is the same ride, not just the
+        same track.
+        
+        Args:
+            header: Values of HEADER_FIELDS
+            timestamps: Waypoint timestamps
+            lats: Waypoint latitudes
+            lons: Waypoint longitudes
+            elevations: Waypoint elevations in feet
+            
+        Returns:
+            Hex digest identifying the waypoint content
+        """
+        count = len(timestamps)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(header).encode('utf-8'))
+        digest.update(struct.pack('<Q', count))
+        digest.update(struct.pack(f'<{count}d', *lats))
+        digest.update(struct.pack(f'<{count}d', *lons))
+        digest.update(struct.pack(f'<{count}d', *elevations))
+        digest.update('\x1f'.join(timestamps).encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def hash_ride(cls, ride: Ride) -> str:
+        """Hash a validated ride"""
+        waypoints = ride.waypoints
+        return cls.hash_columns(
+            tuple(getattr(ride, field) for field in cls.HEADER_FIELDS),
+            [w.timestamp for w in waypoints],
+            [w.lat for w in waypoints],
+            [w.lon for w in waypoints],
+            [w.elevation_ft for w in waypoints]
+        )
+
+    @classmethod
+    def hash_payload(cls, data: Any) -> Optional[str]:
+        """
+        Hash a raw ride payload without validating it.
+        
+        Args:
+            data: Decoded ride JSON
+            
+        Returns:
+            Hex digest, or None if the payload is too malformed to hash
+            (validation will reject it later)
+        """
+        try:
+            waypoints: List[Dict[str, Any]] = data['waypoints']
+            timestamps = [w['timestamp'] for w in waypoints]
+            if not all(isinstance(ts, str) for ts in timestamps):
+                return None
+            return cls.hash_columns(
+                tuple(data.get(field) for field in cls.HEADER_FIELDS),
+                timestamps,
+                [float(w['lat']) for w in waypoints],
+                [float(w['lon']) for w in waypoints],
+                [float(w['elevation_ft']) for w in waypoints]
+            )
+        except (AttributeError, KeyError, TypeError, ValueError, struct.error):
+            return None
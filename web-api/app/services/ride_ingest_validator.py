@@ -0,0 +1,147 @@
+from typing import Any, Dict, List, Tuple
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from app.models.ride import Ride
+from app.models.waypoint import Waypoint
+from .ride_summary_calculator import RideSummaryCalculator
+
+class RideIngestValidator:
+    """
+    Columnar validator for trusted ride ingest.
+
+    Builds rides with ``model_construct`` (skipping per-field pydantic
+    validation) and instead checks the whole payload in one pass over the
+    waypoint columns. Rejections have the same shape as the regular upload
+    path: model errors are raised as RequestValidationError entries with
+    the ``type``/``loc``/``msg`` pydantic would produce, and summary errors
+    as the calculator's HTTPException. Unlike pydantic, only the first
+    error is reported.
+    """
+
+    @staticmethod
+    def _invalid(loc: Tuple, error_type: str, msg: str, value: Any, **ctx: Any) -> RequestValidationError:
+        error = {"type": error_type, "loc": ("body", *loc), "msg": msg, "input": value}
+        if ctx:
+            error["ctx"] = ctx
+        return RequestValidationError([error])
+
+    @classmethod
+    def _value_error(cls, loc: Tuple, message: str, value: Any) -> RequestValidationError:
+        return cls._invalid(loc, "value_error", f"Value error, {message}", value, error=ValueError(message))
+
+    @classmethod
+    def _parse_timestamp(cls, ts: Any, loc: Tuple) -> datetime:
+        if not isinstance(ts, str):
+            raise cls._invalid(loc, "string_type", "Input should be a valid string", ts)
+        try:
+            return datetime.fromisoformat(ts.replace('Z', '+00:00'))
+        except ValueError as e:
+            raise cls._value_error(loc, f"Invalid timestamp format. Expected ISO format: {str(e)}", ts)
+
+    @classmethod
+    def _column(cls, waypoints: List[Any], field: str) -> List[Any]:
+        try:
+            return [w[field] for w in waypoints]
+        except (KeyError, TypeError):
+            index, waypoint = next(
+                (i, w) for i, w in enumerate(waypoints) if not isinstance(w, dict) or field not in w
+            )
+            if not isinstance(waypoint, dict):
+                raise cls._invalid(("waypoints", index), "model_type",
+                                   "Input should be a valid dictionary or instance of Waypoint", waypoint)
+            raise cls._invalid(("waypoints", index, field), "missing", "Field required", waypoint)
+
+    @classmethod
+    def _float_column(cls, waypoints: List[Dict[str, Any]], field: str) -> List[float]:
+        values = cls._column(waypoints, field)
+        try:
+            return list(map(float, values))
+        except (TypeError, ValueError):
+            for index, value in enumerate(values):
+                try:
+                    float(value)
+                except (TypeError, ValueError):
+                    loc = ("waypoints", index, field)
+                    if isinstance(value, str):
+                        raise cls._invalid(loc, "float_parsing",
+                                           "Input should be a valid number, unable to parse string as a number", value)
+                    raise cls._invalid(loc, "float_type", "Input should be a valid number", value)
+            raise
+
+    @classmethod
+    def validate_columns(cls, data: Dict[str, Any]) -> Tuple[Ride, List[float]]:
+        """
+        Validate a raw ride payload and build an unvalidated Ride from it.
+
+        Args:
+            data: Decoded ride JSON
+
+        Returns:
+            Tuple of the Ride built without per-field validation and the
+            waypoint epoch seconds (to hand to RideSummaryCalculator)
+
+        Raises:
+            RequestValidationError: If the payload does not satisfy the Ride model
+            HTTPException: If the waypoints cannot be summarized
+        """
+        if not isinstance(data, dict):
+            raise cls._invalid((), "model_attributes_type",
+                               "Input should be a valid dictionary or object to extract fields from", data)
+        for field in ('name', 'start_time', 'end_time', 'number_waypoints'):
+            if field not in data:
+                raise cls._invalid((field,), "missing", "Field required", data)
+
+        name = data['name']
+        if not isinstance(name, str):
+            raise cls._invalid(('name',), "string_type", "Input should be a valid string", name)
+        number_waypoints = data['number_waypoints']
+        if not isinstance(number_waypoints, int) or isinstance(number_waypoints, bool):
+            raise cls._invalid(('number_waypoints',), "int_type", "Input should be a valid integer", number_waypoints)
+        if number_waypoints < 0:
+            raise cls._invalid(('number_waypoints',), "greater_than_equal",
+                               "Input should be greater than or equal to 0", number_waypoints, ge=0)
+        waypoints = data.get('waypoints', [])
+        if not isinstance(waypoints, list):
+            raise cls._invalid(('waypoints',), "list_type", "Input should be a valid list", waypoints)
+
+        start_time, end_time = data['start_time'], data['end_time']
+        start = cls._parse_timestamp(start_time, ('start_time',))
+        end = cls._parse_timestamp(end_time, ('end_time',))
+
+        timestamps = cls._column(waypoints, 'timestamp')
+        lats = cls._float_column(waypoints, 'lat')
+        lons = cls._float_column(waypoints, 'lon')
+        elevations = cls._float_column(waypoints, 'elevation_ft')
+        datetimes = [cls._parse_timestamp(ts, ('waypoints', i, 'timestamp')) for i, ts in enumerate(timestamps)]
+
+        if len(waypoints) != number_waypoints:
+            raise cls._value_error((), f'number_waypoints ({number_waypoints}) must match length of waypoints list ({len(waypoints)})', data)
+        if RideSummaryCalculator.to_epoch(end) < RideSummaryCalculator.to_epoch(start):
+            raise cls._value_error((), f'end_time ({end_time}) must be after start_time ({start_time})', data)
+
+        # Model checks passed; the rest mirrors RideSummaryCalculator's checks
+        if not waypoints:
+            raise HTTPException(status_code=422, detail="At least one waypoint is required to calculate ride summary")
+
+        bad_lat = next((lat for lat in lats if not -90 <= lat <= 90), None)
+        if bad_lat is not None:
+            raise HTTPException(status_code=422, detail=f"Invalid latitude: {bad_lat}. Must be between -90 and 90 degrees.")
+        bad_lon = next((lon for lon in lons if not -180 <= lon <= 180), None)
+        if bad_lon is not None:
+            raise HTTPException(status_code=422, detail=f"Invalid longitude: {bad_lon}. Must be between -180 and 180 degrees.")
+
+        epochs = [RideSummaryCalculator.to_epoch(dt) for dt in datetimes]
+        RideSummaryCalculator.validate_chronological(epochs)
+
+        ride = Ride.model_construct(
+            name=name,
+            start_time=start_time,
+            end_time=end_time,
+            number_waypoints=number_waypoints,
+            waypoints=[
+                Waypoint.model_construct(timestamp=ts, lat=lat, lon=lon, elevation_ft=elev)
+                for ts, lat, lon, elev in zip(timestamps, lats, lons, elevations)
+            ]
+        )
+        return ride, epochs
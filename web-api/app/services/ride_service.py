@@ -1,40 +1,172 @@
-from typing import Dict, List, Any
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from fastapi import HTTPException
 from app.models.ride import Ride
-from app.models.ride_summary import RideSummary
+from app.models.ride_comparison import RideComparison
+from app.models.ride_with_summary import RideWithSummary
+from app.storage import ContentHashConflict, MemoryRideStore, RideStore
 from .ride_summary_calculator import RideSummaryCalculator
-
-class RideWithSummary(Ride):
-    summary: RideSummary
+from .ride_ingest_validator import RideIngestValidator
+from .ride_hasher import RideHasher
+from .ride_comparator import RideComparator
+from .memory_inspector import MemoryInspector
+from .ride_exporter import RideExporter
+from .chunked_upload import ChunkedUploadService
+from .heatmap_tiles import HeatmapTiles
+from .route_index import RouteIndex
+from .energy_model import EnergyModel
 
 class RideService:
-    _rides: Dict[int, RideWithSummary] = {}
-    _current_id: int = 0
+    # Replaced at application startup by the store configured in the environment
+    _store: RideStore = MemoryRideStore()
+
+    @classmethod
+    def use_store(cls, store: RideStore) -> None:
+        """Replace the backing ride store, closing the previous one"""
+        cls._store.close()
+        cls._store = store
+        RideComparator.clear()
+        HeatmapTiles.rebuild(store.items())
+        RouteIndex.rebuild(store.items())
 
     @classmethod
-    def upload_ride(cls, ride: Ride) -> Dict[str, Any]:
+    def _duplicate(cls, ride_id: int) -> Optional[Dict[str, Any]]:
+        ride = cls._store.get(ride_id)
+        if ride is None:
+            return None
+        return {"ride": ride, "id": ride_id, "duplicate": True}
+
+    @classmethod
+    def find_duplicate(cls, content_hash: Optional[str], idempotency_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored ride for a repeated idempotency key or known content hash, if any.
+
+        Raises:
+            HTTPException: 409 if the idempotency key was first used for different content
+        """
+        if idempotency_key:
+            entry = cls._store.find_idempotency_key(idempotency_key)
+            if entry is not None:
+                ride_id, key_hash = entry
+                if key_hash != content_hash:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="Idempotency-Key was already used for a different ride"
+                    )
+                return cls._duplicate(ride_id)
+        if content_hash is None:
+            return None
+        ride_id = cls._store.find_by_hash(content_hash)
+        if ride_id is None:
+            return None
+        duplicate = cls._duplicate(ride_id)
+        if duplicate and idempotency_key:
+            cls._store.link_idempotency_key(idempotency_key, ride_id, content_hash)
+        return duplicate
+
+    @classmethod
+    def _store_ride(cls, ride_with_summary: RideWithSummary, content_hash: str,
+                    idempotency_key: Optional[str]) -> Dict[str, Any]:
+        """Store a new ride and index it for duplicate detection"""
+        ride_id, created = cls._store.add(ride_with_summary, content_hash, idempotency_key)
+        if not created:
+            # A concurrent upload of the same ride (possibly in another worker) won
+            return cls.find_duplicate(content_hash, idempotency_key) or {
+                "ride": ride_with_summary, "id": ride_id, "duplicate": True
+            }
+        HeatmapTiles.add_ride(ride_with_summary)
+        RouteIndex.add(ride_id, ride_with_summary)
+        return {"ride": ride_with_summary, "id": ride_id, "duplicate": False}
+
+    @classmethod
+    def upload_ride(cls, ride: Ride, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Upload a new ride, calculate its summary, and return its data with ID"""
+        content_hash = RideHasher.hash_ride(ride)
+        duplicate = cls.find_duplicate(content_hash, idempotency_key)
+        if duplicate:
+            return duplicate
+
         summary = RideSummaryCalculator.calculate_summary(ride.waypoints)
         ride_with_summary = RideWithSummary(**ride.model_dump(), summary=summary)
-        
-        cls._current_id += 1
-        cls._rides[cls._current_id] = ride_with_summary
-        return {"ride": ride_with_summary, "id": cls._current_id}
+        return cls._store_ride(ride_with_summary, content_hash, idempotency_key)
+
+    @classmethod
+    def upload_ride_payload(cls, data: Any, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Upload a ride from decoded JSON.
+
+        Re-sent rides are detected by idempotency key or waypoint content hash
+        before validation, and the existing ride is returned without
+        recalculating its summary.
+
+        Raises:
+            pydantic.ValidationError: If a new ride fails model validation
+        """
+        content_hash = RideHasher.hash_payload(data)
+        duplicate = cls.find_duplicate(content_hash, idempotency_key)
+        if duplicate:
+            return duplicate
+
+        ride = Ride.model_validate(data)
+        summary = RideSummaryCalculator.calculate_summary(ride.waypoints)
+        ride_with_summary = RideWithSummary(**ride.model_dump(), summary=summary)
+        return cls._store_ride(ride_with_summary, content_hash or RideHasher.hash_ride(ride),
+                               idempotency_key)
+
+    @classmethod
+    def upload_trusted_ride(cls, data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Upload a ride from a trusted source using a single columnar validation pass"""
+        content_hash = RideHasher.hash_payload(data)
+        duplicate = cls.find_duplicate(content_hash, idempotency_key)
+        if duplicate:
+            return duplicate
+
+        ride, epochs = RideIngestValidator.validate_columns(data)
+        summary = RideSummaryCalculator.calculate_summary(ride.waypoints, validate=False, epochs=epochs)
+        ride_with_summary = RideWithSummary.model_construct(**dict(ride), summary=summary)
+        return cls._store_ride(ride_with_summary, content_hash or RideHasher.hash_ride(ride),
+                               idempotency_key)
+
+    @classmethod
+    def commit_chunked_upload(cls, session_id: str) -> Dict[str, Any]:
+        """
+        Store the ride assembled from a chunked upload session.
+
+        The summary was accumulated as chunks arrived, so committing only
+        hashes and stores the ride. Committing again returns the stored ride.
+
+        Raises:
+            HTTPException: 404 for an unknown session, 409 if chunks are missing
+        """
+        session = ChunkedUploadService.get(session_id)
+        with session.lock:
+            if session.committed_ride_id is not None:
+                duplicate = cls._duplicate(session.committed_ride_id)
+                if duplicate is None:
+                    raise HTTPException(status_code=404, detail="Ride not found")
+                return duplicate
+            ride_with_summary = session.build_ride()
+            content_hash = RideHasher.hash_ride(ride_with_summary)
+            result = cls.find_duplicate(content_hash, session.idempotency_key) or \
+                cls._store_ride(ride_with_summary, content_hash, session.idempotency_key)
+            session.committed_ride_id = result["id"]
+            # The session now only answers repeated commits
+            session.waypoints = []
+        return result
 
     @classmethod
     def get_ride(cls, ride_id: int) -> RideWithSummary:
         """Get a specific ride by ID"""
-        if ride_id not in cls._rides:
+        ride = cls._store.get(ride_id)
+        if ride is None:
             raise HTTPException(status_code=404, detail="Ride not found")
-        return cls._rides[ride_id]
+        return ride
 
     @classmethod
     def update_ride(cls, ride_id: int, name: str, start_time: str, end_time: str) -> RideWithSummary:
         """Update a ride's editable fields (excluding waypoints)"""
-        if ride_id not in cls._rides:
-            raise HTTPException(status_code=404, detail="Ride not found")
-        
-        ride = cls._rides[ride_id]
+        ride = cls.get_ride(ride_id)
         
         # Create updated ride data while preserving waypoints
         updated_data = ride.model_dump()
@@ -44,19 +176,129 @@ class RideService:
             "end_time": end_time
         })
         
-        # Validate and update the ride
+        # Validate and update the ride, re-indexing it since the header is part of its hash
         updated_ride = RideWithSummary(**updated_data)
-        cls._rides[ride_id] = updated_ride
+        try:
+            replaced = cls._store.replace(ride_id, updated_ride, RideHasher.hash_ride(updated_ride))
+        except ContentHashConflict as e:
+            raise HTTPException(status_code=409, detail=f"Ride {e.ride_id} already has the same content")
+        if not replaced:
+            raise HTTPException(status_code=404, detail="Ride not found")
+        RideComparator.invalidate(ride_id)
         return updated_ride
 
     @classmethod
     def list_rides(cls) -> List[Dict[str, Any]]:
         """List all rides with their IDs"""
-        return [{"ride": ride, "id": id} for id, ride in cls._rides.items()]
+        return [{"ride": ride, "id": id} for id, ride in cls._store.items()]
+
+    @classmethod
+    def select_rides(cls, ids: Optional[List[int]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Iterator[Tuple[int, RideWithSummary]]:
+        """
+        Lazily iterate over the rides selected for export.
+
+        Args:
+            ids: Ride IDs in the order to export them (unknown IDs are skipped),
+                or None for every ride in ID order
+            start: Only rides starting at or after this time
+            end: Only rides starting before this time
+
+        Returns:
+            Iterator of (ride ID, ride) tuples, loading one ride at a time
+        """
+        store = cls._store
+        if ids is None:
+            rides = store.items()
+        else:
+            rides = ((ride_id, store.get(ride_id)) for ride_id in dict.fromkeys(ids))
+        return ((ride_id, ride) for ride_id, ride in rides
+                if ride is not None and RideExporter.in_time_range(ride, start, end))
+
+    @classmethod
+    def export_rides(cls, export_format: str, ids: Optional[List[int]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Iterator[bytes]:
+        """Stream the selected rides as ndjson, csv or gpx chunks (see RideExporter)"""
+        return RideExporter.serializer(export_format)(cls.select_rides(ids, start, end))
 
     @classmethod
     def delete_ride(cls, ride_id: int) -> None:
         """Delete a ride by ID"""
-        if ride_id not in cls._rides:
+        # Loaded first so its track can be removed from the heatmap
+        ride = cls._store.get(ride_id)
+        if ride is None or not cls._store.delete(ride_id):
             raise HTTPException(status_code=404, detail="Ride not found")
-        del cls._rides[ride_id]
\ No newline at end of file
+        RideComparator.invalidate(ride_id)
+        HeatmapTiles.remove_ride(ride)
+        RouteIndex.remove(ride_id)
+
+    @classmethod
+    def compare_rides(cls, a_id: int, b_id: int, step_mi: float) -> RideComparison:
+        """Compare two rides on a shared cumulative-distance axis (see RideComparator.compare)"""
+        a = RideComparator.profile(a_id, cls.get_ride(a_id))
+        b = RideComparator.profile(b_id, cls.get_ride(b_id))
+        return RideComparator.compare(a_id, a, b_id, b, step_mi)
+
+    @classmethod
+    def similar_rides(cls, ride_id: int, min_similarity: float = 0.5, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rides following the same route as a ride, in either direction (see RouteIndex.similar)"""
+        ride = cls.get_ride(ride_id)
+        return RouteIndex.similar(ride_id, ride, min_similarity, limit)
+
+    @classmethod
+    def route_clusters(cls, min_similarity: float = 0.5) -> List[List[int]]:
+        """Groups of stored rides that follow the same route (see RouteIndex.clusters)"""
+        return RouteIndex.clusters(min_similarity)
+
+    @classmethod
+    def ride_energy(cls, ride_id: int) -> Dict[str, Any]:
+        """A ride's estimated energy with its battery level at every waypoint (see EnergyModel)"""
+        ride = cls.get_ride(ride_id)
+        segments = EnergyModel.segment_energy_wh(*RideSummaryCalculator.energy_columns(ride.waypoints))
+        energy_wh = sum(segments)
+        return {
+            "id": ride_id,
+            "energy_model": EnergyModel.VERSION,
+            "energy_wh": round(energy_wh, 1),
+            "battery_used_pct": round(EnergyModel.battery_used_pct(energy_wh), 2),
+            "battery_pct": [round(pct, 2) for pct in EnergyModel.battery_profile(segments)]
+        }
+
+    @classmethod
+    def reevaluate_energy(cls, force: bool = False) -> Dict[str, Any]:
+        """
+        Re-estimate the stored summaries' energy with the current EnergyModel.
+
+        Rides are loaded and replaced one at a time. Rides already estimated
+        by this model version are skipped unless force is set.
+
+        Returns:
+            Counts of evaluated and skipped rides, the model version and the
+            job's duration
+        """
+        start = time.perf_counter()
+        evaluated = skipped = 0
+        for ride_id, ride in cls._store.items():
+            if not force and ride.summary.energy_model == EnergyModel.VERSION:
+                skipped += 1
+                continue
+            energy_wh, battery_used_pct = EnergyModel.estimate(*RideSummaryCalculator.energy_columns(ride.waypoints))
+            summary = ride.summary.model_copy(update={
+                "energy_wh": round(energy_wh, 1),
+                "battery_used_pct": round(battery_used_pct, 2),
+                "energy_model": EnergyModel.VERSION
+            })
+            # The summary is not part of the content hash
+            if cls._store.replace(ride_id, ride.model_copy(update={"summary": summary}), RideHasher.hash_ride(ride)):
+                evaluated += 1
+        return {
+            "energy_model": EnergyModel.VERSION,
+            "evaluated": evaluated,
+            "skipped": skipped,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    @classmethod
+    def memory_report(cls, per_ride_limit: int = 20) -> Dict[str, Any]:
+        """Memory held by the ride store and service caches (see MemoryInspector)"""
+        return MemoryInspector.store_report(cls._store, per_ride_limit)
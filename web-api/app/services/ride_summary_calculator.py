@@ -1,9 +1,11 @@
-from typing import List
-from datetime import datetime, timedelta
-from math import radians, sin, cos, sqrt, atan2
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from itertools import islice
 from fastapi import HTTPException
+from app import geo
 from app.models.waypoint import Waypoint
 from app.models.ride_summary import RideSummary
+from .energy_model import EnergyModel
 
 class RideSummaryCalculator:
     """Calculator for generating ride summaries from waypoint data."""
@@ -31,61 +33,98 @@ class RideSummaryCalculator:
                 detail=f"Invalid longitude: {lon}. Must be between -180 and 180 degrees."
             )
 
-    @staticmethod
-    def validate_timestamps(waypoints: List[Waypoint]) -> None:
+    @classmethod
+    def to_epochs(cls, waypoints: List[Waypoint]) -> List[float]:
         """
-        Validate that timestamps are properly formatted and in chronological order.
+        Parse waypoint timestamps once into epoch seconds.
+        
+        Naive timestamps are treated as UTC.
         
         Args:
-            waypoints: List of waypoints to validate
+            waypoints: List of waypoints
+            
+        Returns:
+            Epoch seconds for each waypoint, in input order
             
         Raises:
-            HTTPException: If timestamps are invalid or not chronological
+            HTTPException: If a timestamp is not valid ISO format
         """
-        if not waypoints:
-            return
-
         try:
-            timestamps = [datetime.fromisoformat(w.timestamp.replace('Z', '+00:00')) 
-                        for w in waypoints]
+            return [cls.to_epoch(cls.parse_timestamp(w.timestamp)) for w in waypoints]
         except ValueError as e:
             raise HTTPException(
                 status_code=422,
                 detail=f"Invalid timestamp format. Expected ISO format: {str(e)}"
             )
 
-        # Check chronological order
-        if sorted(timestamps) != timestamps:
+    @staticmethod
+    def to_epoch(dt: datetime) -> float:
+        """Convert a datetime to epoch seconds, treating naive values as UTC"""
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+    @staticmethod
+    def validate_chronological(epochs: List[float]) -> None:
+        """
+        Validate in a single linear scan that epoch values never decrease.
+        
+        Args:
+            epochs: Epoch seconds in waypoint order
+            
+        Raises:
+            HTTPException: If the values are not chronological
+        """
+        if any(curr < prev for prev, curr in zip(epochs, islice(epochs, 1, None))):
             raise HTTPException(
                 status_code=422,
                 detail="Waypoints must be in chronological order"
             )
 
+    @classmethod
+    def validate_timestamps(cls, waypoints: List[Waypoint]) -> List[float]:
+        """
+        Validate that timestamps are properly formatted and in chronological order.
+        
+        Args:
+            waypoints: List of waypoints to validate
+            
+        Returns:
+            Epoch seconds for each waypoint, reusable by calculate_summary
+            
+        Raises:
+            HTTPException: If timestamps are invalid or not chronological
+        """
+        epochs = cls.to_epochs(waypoints)
+        cls.validate_chronological(epochs)
+        return epochs
+
+    @classmethod
+    def energy_columns(cls, waypoints: List[Waypoint], epochs: Optional[List[float]] = None,
+                       distance_model: str = geo.DEFAULT_MODEL) -> Tuple[List[float], List[float], List[float]]:
+        """Segment distances, epochs and elevations of a ride: the inputs of EnergyModel"""
+        distances = geo.segment_distances([w.lat for w in waypoints], [w.lon for w in waypoints], distance_model)
+        if epochs is None:
+            epochs = cls.to_epochs(waypoints)
+        return distances, epochs, [w.elevation_ft for w in waypoints]
+
     @staticmethod
-    def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float,
+                           model: str = geo.DEFAULT_MODEL) -> float:
         """
-        Calculate the great circle distance between two points on earth in miles.
+        Calculate the distance between two points on earth in miles.
         
         Args:
             lat1: Latitude of first point in decimal degrees
             lon1: Longitude of first point in decimal degrees
             lat2: Latitude of second point in decimal degrees
             lon2: Longitude of second point in decimal degrees
+            model: Distance model from the shared geo kernel (see app.geo)
         
         Returns:
             Distance in miles between the two points
         """
-        R = 3959.87433  # Earth's radius in miles
-
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        distance = R * c
-
-        return distance
+        return geo.distance(lat1, lon1, lat2, lon2, model)
 
     @staticmethod
     def parse_timestamp(ts: str) -> datetime:
@@ -101,7 +140,9 @@ class RideSummaryCalculator:
         return datetime.fromisoformat(ts.replace('Z', '+00:00'))
 
     @classmethod
-    def calculate_summary(cls, waypoints: List[Waypoint]) -> RideSummary:
+    def calculate_summary(cls, waypoints: List[Waypoint], validate: bool = True,
+                          epochs: Optional[List[float]] = None,
+                          distance_model: str = geo.DEFAULT_MODEL) -> RideSummary:
         """
         Calculate a ride summary from a list of waypoints.
         
@@ -111,9 +152,19 @@ class RideSummaryCalculator:
         - Average speed in mph
         - Max speed in mph
         - Elapsed time as HH:MM:SS
+        - Estimated energy in Wh and battery used (see EnergyModel)
+        
+        Timestamps are parsed once into epoch seconds; the chronological
+        check is a single linear scan, so no sorting is needed.
         
         Args:
             waypoints: List of Waypoint objects in chronological order
+            validate: Set to False when the waypoints were already checked
+                (e.g. by RideIngestValidator) to skip re-validation
+            epochs: Precomputed epoch seconds for the waypoints, if available
+            distance_model: Distance model from the shared geo kernel; the
+                default measures short segments with the equirectangular
+                approximation (see app.geo)
             
         Returns:
             RideSummary object containing calculated statistics
@@ -128,22 +179,19 @@ class RideSummaryCalculator:
             )
 
         # Validate all waypoint data
-        for w in waypoints:
-            cls.validate_coordinates(w.lat, w.lon)
-        cls.validate_timestamps(waypoints)
+        if epochs is None:
+            epochs = cls.to_epochs(waypoints)
+        if validate:
+            for w in waypoints:
+                cls.validate_coordinates(w.lat, w.lon)
+            cls.validate_chronological(epochs)
 
         total_distance = 0
         total_elevation_gain = 0
-        segment_speeds: List[float] = []
+        max_speed = 0
 
-        # Sort waypoints by timestamp
-        sorted_waypoints = sorted(waypoints, key=lambda w: cls.parse_timestamp(w.timestamp))
-        
         # Calculate elapsed time first as we need it for single waypoint case
-        start_time = cls.parse_timestamp(sorted_waypoints[0].timestamp)
-        end_time = cls.parse_timestamp(sorted_waypoints[-1].timestamp)
-        elapsed_delta: timedelta = end_time - start_time
-        elapsed_seconds = elapsed_delta.total_seconds()
+        elapsed_seconds = epochs[-1] - epochs[0]
         hours = int(elapsed_seconds // 3600)
         minutes = int((elapsed_seconds % 3600) // 60)
         seconds = int(elapsed_seconds % 60)
@@ -156,19 +204,17 @@ class RideSummaryCalculator:
                 total_elevation_gain_ft=0,
                 average_speed_mph=0,
                 max_speed_mph=0,
-                elapsed_time=elapsed_time
+                elapsed_time=elapsed_time,
+                energy_wh=0,
+                battery_used_pct=0,
+                energy_model=EnergyModel.VERSION
             )
 
         # Calculate metrics for multiple waypoints
-        for i in range(1, len(sorted_waypoints)):
-            prev = sorted_waypoints[i-1]
-            curr = sorted_waypoints[i]
-            
-            # Distance calculation
-            distance = cls.calculate_distance(
-                prev.lat, prev.lon,
-                curr.lat, curr.lon
-            )
+        distances = geo.segment_distances([w.lat for w in waypoints], [w.lon for w in waypoints], distance_model)
+        prev = waypoints[0]
+        prev_epoch = epochs[0]
+        for curr, curr_epoch, distance in zip(islice(waypoints, 1, None), islice(epochs, 1, None), distances):
             total_distance += distance
 
             # Elevation gain (only positive changes)
@@ -177,21 +223,118 @@ class RideSummaryCalculator:
                 total_elevation_gain += elev_change
 
             # Speed calculation for segment
-            time_diff = (cls.parse_timestamp(curr.timestamp) - 
-                        cls.parse_timestamp(prev.timestamp)).total_seconds() / 3600  # Convert to hours
+            time_diff = (curr_epoch - prev_epoch) / 3600  # Convert to hours
             if time_diff > 0:
                 speed = distance / time_diff
-                segment_speeds.append(speed)
+                if speed > max_speed:
+                    max_speed = speed
+
+            prev, prev_epoch = curr, curr_epoch
 
         # Calculate average speed from total distance and total time
         total_time_hours = elapsed_seconds / 3600
         average_speed = total_distance / total_time_hours if total_time_hours > 0 else 0
-        max_speed = max(segment_speeds) if segment_speeds else 0
+
+        energy_wh, battery_used_pct = EnergyModel.estimate(distances, epochs, [w.elevation_ft for w in waypoints])
 
         return RideSummary(
             total_distance_mi=round(total_distance, 2),
             total_elevation_gain_ft=round(total_elevation_gain, 1),
             average_speed_mph=round(average_speed, 1),
             max_speed_mph=round(max_speed, 1),
-            elapsed_time=elapsed_time
-        )
\ No newline at end of file
+            elapsed_time=elapsed_time,
+            energy_wh=round(energy_wh, 1),
+            battery_used_pct=round(battery_used_pct, 2),
+            energy_model=EnergyModel.VERSION
+        )
+
+class RideSummaryAccumulator:
+    """
+    Incremental form of RideSummaryCalculator.calculate_summary.
+
+    Waypoints are folded in chronological batches (e.g. the chunks of a
+    chunked upload); segments spanning two batches are measured from the
+    last folded waypoint, so the finished summary equals calculate_summary
+    over the whole ride.
+    """
+
+    def __init__(self, distance_model: str = geo.DEFAULT_MODEL) -> None:
+        self.distance_model = distance_model
+        self.count = 0
+        self.first_epoch: Optional[float] = None
+        self.last: Optional[Waypoint] = None
+        self.last_epoch: Optional[float] = None
+        self.total_distance = 0
+        self.total_elevation_gain = 0
+        self.max_speed = 0
+        self.energy_wh = 0
+
+    def fold(self, waypoints: List[Waypoint], epochs: List[float]) -> None:
+        """
+        Add the next batch of waypoints.
+
+        Args:
+            waypoints: Validated waypoints following the previously folded ones
+            epochs: Their epoch seconds (non-decreasing, and not before the
+                last folded waypoint)
+        """
+        if not waypoints:
+            return
+        if self.last is None:
+            self.first_epoch = epochs[0]
+            self.last, self.last_epoch = waypoints[0], epochs[0]
+            self.count = 1
+            waypoints, epochs = waypoints[1:], epochs[1:]
+        points = [self.last, *waypoints]
+        distances = geo.segment_distances([w.lat for w in points], [w.lon for w in points], self.distance_model)
+        self.energy_wh += sum(EnergyModel.segment_energy_wh(
+            distances, [self.last_epoch, *epochs], [w.elevation_ft for w in points]
+        ))
+        prev, prev_epoch = self.last, self.last_epoch
+        for curr, curr_epoch, distance in zip(waypoints, epochs, distances):
+            self.total_distance += distance
+            elev_change = curr.elevation_ft - prev.elevation_ft
+            if elev_change > 0:
+                self.total_elevation_gain += elev_change
+            time_diff = (curr_epoch - prev_epoch) / 3600
+            if time_diff > 0:
+                speed = distance / time_diff
+                if speed > self.max_speed:
+                    self.max_speed = speed
+            prev, prev_epoch = curr, curr_epoch
+        self.last, self.last_epoch = prev, prev_epoch
+        self.count += len(waypoints)
+
+    def summary(self) -> RideSummary:
+        """
+        The summary of every waypoint folded so far.
+
+        Raises:
+            HTTPException: If no waypoints were folded
+        """
+        if self.last is None:
+            raise HTTPException(
+                status_code=422,
+                detail="At least one waypoint is required to calculate ride summary"
+            )
+        elapsed_seconds = self.last_epoch - self.first_epoch
+        hours = int(elapsed_seconds // 3600)
+        minutes = int((elapsed_seconds % 3600) // 60)
+        seconds = int(elapsed_seconds % 60)
+        elapsed_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        if self.count == 1:
+            return RideSummary(total_distance_mi=0, total_elevation_gain_ft=0, average_speed_mph=0,
+                               max_speed_mph=0, elapsed_time=elapsed_time, energy_wh=0, battery_used_pct=0,
+                               energy_model=EnergyModel.VERSION)
+        total_time_hours = elapsed_seconds / 3600
+        average_speed = self.total_distance / total_time_hours if total_time_hours > 0 else 0
+        return RideSummary(
+            total_distance_mi=round(self.total_distance, 2),
+            total_elevation_gain_ft=round(self.total_elevation_gain, 1),
+            average_speed_mph=round(average_speed, 1),
+            max_speed_mph=round(self.max_speed, 1),
+            elapsed_time=elapsed_time,
+            energy_wh=round(self.energy_wh, 1),
+            battery_used_pct=round(EnergyModel.battery_used_pct(self.energy_wh), 2),
+            energy_model=EnergyModel.VERSION
+        )
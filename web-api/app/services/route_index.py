@@ -0,0 +1,201 @@
+import random
+import threading
+from collections import defaultdict
+from math import cos, floor, radians
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app import geo
+from app.models.ride_with_summary import RideWithSummary
+
+Signature = Tuple[int, ...]
+
+MILES_PER_DEGREE_LAT = 69.05
+_PRIME = (1 << 61) - 1
+
+def _hash_coefficients(count: int, seed: int = 0x5EED) -> List[Tuple[int, int]]:
+    """Fixed (a, b) pairs of the MinHash functions h -> (a * h + b) mod _PRIME"""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count)]
+
+class RouteIndex:
+    """
+    Locality-sensitive index of ride routes.
+
+    A route's fingerprint is the set of grid cells (about CELL_SIZE_MI
+    square) its track passes through, sampled every half cell along the
+    track so sparse waypoints do not skip cells. Being a set, it is the
+    same whichever direction a loop is ridden. Fingerprints are reduced to
+    MinHash signatures whose agreement estimates the Jaccard similarity of
+    the cell sets, and the signatures are split into BANDS bands of ROWS
+    values hashed into buckets: rides sharing any bucket are candidates,
+    so a query only verifies the rides in its own buckets instead of
+    comparing against every stored ride.
+    """
+
+    CELL_SIZE_MI = 0.1
+    BANDS = 24
+    ROWS = 3
+
+    _coefficients = _hash_coefficients(BANDS * ROWS)
+
+    _signatures: Dict[int, Signature] = {}
+    _buckets: List[Dict[Signature, Set[int]]] = [defaultdict(set) for _ in range(BANDS)]
+    _lock = threading.Lock()
+
+    @classmethod
+    def cell(cls, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell of a point; cells in each latitude row are CELL_SIZE_MI wide"""
+        cell_lat = cls.CELL_SIZE_MI / MILES_PER_DEGREE_LAT
+        row = floor(lat / cell_lat)
+        cell_lon = cell_lat / max(cos(radians((row + 0.5) * cell_lat)), 0.01)
+        return row, floor(lon / cell_lon)
+
+    @classmethod
+    def route_cells(cls, ride: RideWithSummary) -> Set[Tuple[int, int]]:
+        """Cells crossed by a ride's track, sampled at least every half cell"""
+        waypoints = ride.waypoints
+        if not waypoints:
+            return set()
+        lats = [w.lat for w in waypoints]
+        lons = [w.lon for w in waypoints]
+        cells = {cls.cell(lats[0], lons[0])}
+        step = cls.CELL_SIZE_MI / 2
+        for i, distance in enumerate(geo.segment_distances(lats, lons)):
+            samples = int(distance / step)
+            for k in range(1, samples + 1):
+                f = k / (samples + 1)
+                cells.add(cls.cell(lats[i] + (lats[i + 1] - lats[i]) * f, lons[i] + (lons[i + 1] - lons[i]) * f))
+            cells.add(cls.cell(lats[i + 1], lons[i + 1]))
+        return cells
+
+    @classmethod
+    def signature(cls, ride: RideWithSummary) -> Signature:
+        """MinHash signature of a ride's route cells"""
+        hashes = [((row * 0x9E3779B1) ^ (col * 0x85EBCA77)) & 0xFFFFFFFFFFFF for row, col in cls.route_cells(ride)]
+        if not hashes:
+            return ()
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in cls._coefficients)
+
+    @classmethod
+    def _bands(cls, signature: Signature) -> Iterable[Tuple[int, Signature]]:
+        for band in range(cls.BANDS):
+            yield band, signature[band * cls.ROWS:(band + 1) * cls.ROWS]
+
+    @staticmethod
+    def similarity(a: Signature, b: Signature) -> float:
+        """Estimated Jaccard similarity of two routes' cell sets"""
+        if not a or not b:
+            return 0.0
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    @classmethod
+    def add(cls, ride_id: int, ride: RideWithSummary) -> None:
+        """Index a ride's route (computed once, at upload)"""
+        signature = cls.signature(ride)
+        if not signature:
+            return
+        with cls._lock:
+            cls._remove(ride_id)
+            cls._signatures[ride_id] = signature
+            for band, key in cls._bands(signature):
+                cls._buckets[band][key].add(ride_id)
+
+    @classmethod
+    def _remove(cls, ride_id: int) -> None:
+        signature = cls._signatures.pop(ride_id, None)
+        if signature is None:
+            return
+        for band, key in cls._bands(signature):
+            bucket = cls._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(ride_id)
+                if not bucket:
+                    del cls._buckets[band][key]
+
+    @classmethod
+    def remove(cls, ride_id: int) -> None:
+        with cls._lock:
+            cls._remove(ride_id)
+
+    @classmethod
+    def rebuild(cls, rides: Iterable[Tuple[int, RideWithSummary]]) -> None:
+        """Re-index every ride of a store"""
+        cls.clear()
+        for ride_id, ride in rides:
+            cls.add(ride_id, ride)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._signatures.clear()
+            for buckets in cls._buckets:
+                buckets.clear()
+
+    @classmethod
+    def similar(cls, ride_id: int, ride: Optional[RideWithSummary] = None, min_similarity: float = 0.5,
+                limit: int = 10) -> List[Dict[str, float]]:
+        """
+        Rides whose routes resemble a ride's, most similar first.
+
+        Args:
+            ride_id: Ride to match (excluded from the results)
+            ride: The ride, used to compute its signature if it is not indexed
+            min_similarity: Smallest estimated Jaccard similarity to return
+            limit: Maximum number of rides to return
+
+        Returns:
+            List of {"id", "similarity"} dictionaries
+        """
+        with cls._lock:
+            signature = cls._signatures.get(ride_id)
+        if signature is None:
+            signature = cls.signature(ride) if ride is not None else ()
+        if not signature:
+            return []
+        with cls._lock:
+            candidates: Set[int] = set()
+            for band, key in cls._bands(signature):
+                candidates.update(cls._buckets[band].get(key, ()))
+            candidates.discard(ride_id)
+            scored = [(cls.similarity(signature, cls._signatures[other]), other) for other in candidates]
+        scored = [(score, other) for score, other in scored if score >= min_similarity]
+        scored.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [{"id": other, "similarity": round(score, 3)} for score, other in scored[:limit]]
+
+    @classmethod
+    def clusters(cls, min_similarity: float = 0.5) -> List[List[int]]:
+        """
+        Group indexed rides into routes: connected components of the
+        candidate pairs at or above min_similarity (single linkage).
+
+        Returns:
+            Clusters of two or more ride IDs, largest first
+        """
+        with cls._lock:
+            parent: Dict[int, int] = {ride_id: ride_id for ride_id in cls._signatures}
+
+            def find(ride_id: int) -> int:
+                while parent[ride_id] != ride_id:
+                    parent[ride_id] = parent[parent[ride_id]]
+                    ride_id = parent[ride_id]
+                return ride_id
+
+            checked: Set[Tuple[int, int]] = set()
+            for buckets in cls._buckets:
+                for members in buckets.values():
+                    if len(members) < 2:
+                        continue
+                    ordered = sorted(members)
+                    for i, a in enumerate(ordered):
+                        for b in ordered[i + 1:]:
+                            if (a, b) in checked:
+                                continue
+                            checked.add((a, b))
+                            if cls.similarity(cls._signatures[a], cls._signatures[b]) >= min_similarity:
+                                parent[find(a)] = find(b)
+
+            groups: Dict[int, List[int]] = defaultdict(list)
+            for ride_id in parent:
+                groups[find(ride_id)].append(ride_id)
+        clusters = [sorted(members) for members in groups.values() if len(members) > 1]
+        clusters.sort(key=lambda members: (-len(members), members[0]))
+        return clusters
@@ -0,0 +1,128 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+class TelemetryChannel:
+    """
+    Broadcast ring for one live ride session.
+
+    Each update is serialized once and appended to a bounded ring shared by
+    every subscriber, so publishing costs the same however many viewers are
+    connected. Subscribers read the ring at their own cursor; the ring size
+    bounds how far any one of them can fall behind, and a subscriber that
+    falls further skips ahead to the oldest update still buffered.
+    """
+
+    def __init__(self, buffer_size: int) -> None:
+        self.buffer: Deque[Tuple[int, str]] = deque(maxlen=buffer_size)
+        self.next_seq = 1
+        self.publishers = 0
+        self.subscribers = 0
+        self.closed = False
+        self._updated = asyncio.Event()
+
+    def publish(self, data_json: str) -> int:
+        """
+        Append an update and wake the subscribers.
+
+        Args:
+            data_json: The update serialized as JSON
+
+        Returns:
+            The update's sequence number
+        """
+        seq = self.next_seq
+        self.next_seq += 1
+        self.buffer.append((seq, f'{{"type":"update","seq":{seq},"data":{data_json}}}'))
+        self._notify()
+        return seq
+
+    def close(self) -> None:
+        """Mark the session as ended once its last publisher disconnects"""
+        self.closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        # Waiters hold the old event; a fresh one collects the next round
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    def start_cursor(self) -> int:
+        """Cursor for a new subscriber: the latest update, so viewers see the current position at once"""
+        return max(1, self.next_seq - 1)
+
+    async def read(self, cursor: int) -> Tuple[Optional[Tuple[int, str]], int, int]:
+        """
+        Wait for the first update at or after a subscriber's cursor.
+
+        Args:
+            cursor: Sequence number the subscriber wants next
+
+        Returns:
+            Tuple of the (sequence number, message) update or None if the
+            session ended, the subscriber's next cursor, and the number of
+            updates it missed because it fell behind the ring
+        """
+        while cursor >= self.next_seq:
+            if self.closed:
+                return None, cursor, 0
+            await self._updated.wait()
+        oldest = self.buffer[0][0]
+        dropped = max(0, oldest - cursor)
+        cursor = max(cursor, oldest)
+        update = self.buffer[cursor - oldest]
+        return update, cursor + 1, dropped
+
+class TelemetryHub:
+    """Live telemetry channels of this worker process, keyed by session ID"""
+
+    BUFFER_SIZE = 256
+
+    _channels: Dict[str, TelemetryChannel] = {}
+
+    @classmethod
+    def channel(cls, session_id: str) -> TelemetryChannel:
+        """Return the channel for a session, creating it (or reopening an ended one)"""
+        channel = cls._channels.get(session_id)
+        if channel is None:
+            channel = cls._channels[session_id] = TelemetryChannel(cls.BUFFER_SIZE)
+        return channel
+
+    @classmethod
+    def attach_publisher(cls, session_id: str) -> TelemetryChannel:
+        channel = cls.channel(session_id)
+        channel.publishers += 1
+        channel.closed = False
+        return channel
+
+    @classmethod
+    def detach_publisher(cls, session_id: str, channel: TelemetryChannel) -> None:
+        channel.publishers -= 1
+        if channel.publishers == 0:
+            channel.close()
+        cls._discard_if_idle(session_id, channel)
+
+    @classmethod
+    def attach_subscriber(cls, session_id: str) -> TelemetryChannel:
+        channel = cls.channel(session_id)
+        channel.subscribers += 1
+        return channel
+
+    @classmethod
+    def detach_subscriber(cls, session_id: str, channel: TelemetryChannel) -> None:
+        channel.subscribers -= 1
+        cls._discard_if_idle(session_id, channel)
+
+    @classmethod
+    def _discard_if_idle(cls, session_id: str, channel: TelemetryChannel) -> None:
+        if channel.publishers == 0 and channel.subscribers == 0 and cls._channels.get(session_id) is channel:
+            del cls._channels[session_id]
+
+    @classmethod
+    def sessions(cls) -> Dict[str, Dict[str, int]]:
+        """Publisher and subscriber counts of the active sessions"""
+        return {
+            session_id: {"publishers": channel.publishers, "subscribers": channel.subscribers,
+                         "updates": channel.next_seq - 1}
+            for session_id, channel in cls._channels.items()
+        }
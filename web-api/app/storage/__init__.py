@@ -0,0 +1,27 @@
+import os
+from .base import ContentHashConflict, RideStore
+from .memory import MemoryRideStore
+from .sqlite import SqliteRideStore
+from .tiered import RideCache, TieredRideStore
+
+STORE_PATH_ENV = "RIDE_STORE_PATH"
+MEMORY_BUDGET_ENV = "RIDE_MEMORY_BUDGET_MB"
+SPILL_DIR_ENV = "RIDE_SPILL_DIR"
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+def create_store() -> RideStore:
+    """
+    Create the ride store configured in the environment.
+
+    RIDE_STORE_PATH selects the shared SQLite store; otherwise rides are kept
+    in a tiered in-process cache bounded by RIDE_MEMORY_BUDGET_MB, spilling
+    to RIDE_SPILL_DIR (a temporary directory if unset).
+    """
+    path = os.environ.get(STORE_PATH_ENV)
+    if path:
+        return SqliteRideStore(path)
+    budget_mb = float(os.environ.get(MEMORY_BUDGET_ENV, DEFAULT_MEMORY_BUDGET_MB))
+    return TieredRideStore(int(budget_mb * 1024 * 1024), spill_dir=os.environ.get(SPILL_DIR_ENV))
+
+__all__ = ['ContentHashConflict', 'RideStore', 'MemoryRideStore', 'SqliteRideStore', 'RideCache',
+           'TieredRideStore', 'create_store']
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple, Union
+from app.models.ride_with_summary import RideWithSummary
+
+class ContentHashConflict(Exception):
+    """Raised when a ride would take a content hash already owned by another ride"""
+
+    def __init__(self, ride_id: int) -> None:
+        super().__init__(f"Content hash already belongs to ride {ride_id}")
+        self.ride_id = ride_id
+
+class RideStore(ABC):
+    """
+    Storage backend for rides and their deduplication indexes.
+
+    Implementations assign ride IDs, so IDs stay unique across every
+    process sharing the same store. Idempotency keys are stored with the
+    content hash of the upload that first used them.
+    """
+
+    @abstractmethod
+    def add(self, ride: RideWithSummary, content_hash: str,
+            idempotency_key: Optional[str] = None) -> Tuple[int, bool]:
+        """
+        Store a new ride unless its idempotency key or content hash is already known.
+
+        Returns:
+            Tuple of the ride ID and whether a new ride was created (False
+            when the key or hash already refers to a stored ride, e.g.
+            because another upload of the same ride won the race)
+        """
+
+    @abstractmethod
+    def get(self, ride_id: int) -> Optional[RideWithSummary]:
+        """Return a ride by ID, or None if it does not exist"""
+
+    @abstractmethod
+    def replace(self, ride_id: int, ride: RideWithSummary, content_hash: str) -> bool:
+        """
+        Replace an existing ride and re-index it under its new content hash.
+
+        Returns:
+            False if the ride does not exist
+
+        Raises:
+            ContentHashConflict: If another ride already has the content hash
+        """
+
+    @abstractmethod
+    def delete(self, ride_id: int) -> bool:
+        """Delete a ride and its index entries, returning False if it does not exist"""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[int, RideWithSummary]]:
+        """Iterate over all rides in ID order"""
+
+    @abstractmethod
+    def find_by_hash(self, content_hash: str) -> Optional[int]:
+        """Return the ID of the ride with a content hash"""
+
+    @abstractmethod
+    def find_idempotency_key(self, idempotency_key: str) -> Optional[Tuple[int, str]]:
+        """Return the ride ID and content hash recorded for an idempotency key"""
+
+    @abstractmethod
+    def link_idempotency_key(self, idempotency_key: str, ride_id: int, content_hash: str) -> None:
+        """Record that an idempotency key refers to an existing ride with a content hash"""
+
+    def resident(self) -> Iterator[Tuple[int, str, Union[RideWithSummary, bytes, None]]]:
+        """
+        Iterate over the rides this process holds, for memory accounting.
+
+        Yields:
+            Tuples of ride ID, tier name, and the materialized ride, its
+            cached serialization (bytes), or None if it is not in memory
+        """
+        return iter(())
+
+    def close(self) -> None:
+        """Release any resources held by the store"""
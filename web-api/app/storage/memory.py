@@ -0,0 +1,74 @@
+from typing import Dict, Iterator, Optional, Set, Tuple, Union
+from app.models.ride_with_summary import RideWithSummary
+from .base import ContentHashConflict, RideStore
+
+class MemoryRideStore(RideStore):
+    """Process-local store backed by dictionaries (single worker only)"""
+
+    def __init__(self) -> None:
+        self._rides: Dict[int, RideWithSummary] = {}
+        self._current_id = 0
+        self._hash_index: Dict[str, int] = {}
+        self._idempotency_keys: Dict[str, Tuple[int, str]] = {}
+        # Reverse maps so deletes and updates touch only the ride's own entries
+        self._ride_hashes: Dict[int, str] = {}
+        self._ride_keys: Dict[int, Set[str]] = {}
+
+    def add(self, ride: RideWithSummary, content_hash: str,
+            idempotency_key: Optional[str] = None) -> Tuple[int, bool]:
+        existing = self.find_idempotency_key(idempotency_key) if idempotency_key else None
+        if existing is not None:
+            return existing[0], False
+        existing_id = self.find_by_hash(content_hash)
+        if existing_id is not None:
+            return existing_id, False
+        self._current_id += 1
+        self._rides[self._current_id] = ride
+        self._hash_index[content_hash] = self._current_id
+        self._ride_hashes[self._current_id] = content_hash
+        if idempotency_key:
+            self.link_idempotency_key(idempotency_key, self._current_id, content_hash)
+        return self._current_id, True
+
+    def get(self, ride_id: int) -> Optional[RideWithSummary]:
+        return self._rides.get(ride_id)
+
+    def replace(self, ride_id: int, ride: RideWithSummary, content_hash: str) -> bool:
+        if ride_id not in self._rides:
+            return False
+        owner = self._hash_index.get(content_hash)
+        if owner is not None and owner != ride_id:
+            raise ContentHashConflict(owner)
+        self._hash_index.pop(self._ride_hashes[ride_id], None)
+        self._hash_index[content_hash] = ride_id
+        self._ride_hashes[ride_id] = content_hash
+        self._rides[ride_id] = ride
+        return True
+
+    def delete(self, ride_id: int) -> bool:
+        if ride_id not in self._rides:
+            return False
+        del self._rides[ride_id]
+        self._hash_index.pop(self._ride_hashes.pop(ride_id), None)
+        for key in self._ride_keys.pop(ride_id, ()):
+            del self._idempotency_keys[key]
+        return True
+
+    def items(self) -> Iterator[Tuple[int, RideWithSummary]]:
+        return iter(list(self._rides.items()))
+
+    def resident(self) -> Iterator[Tuple[int, str, Union[RideWithSummary, bytes, None]]]:
+        for ride_id, ride in self.items():
+            yield ride_id, "hot", ride
+
+    def find_by_hash(self, content_hash: str) -> Optional[int]:
+        return self._hash_index.get(content_hash)
+
+    def find_idempotency_key(self, idempotency_key: str) -> Optional[Tuple[int, str]]:
+        return self._idempotency_keys.get(idempotency_key)
+
+    def link_idempotency_key(self, idempotency_key: str, ride_id: int, content_hash: str) -> None:
+        if idempotency_key in self._idempotency_keys or ride_id not in self._rides:
+            return
+        self._idempotency_keys[idempotency_key] = (ride_id, content_hash)
+        self._ride_keys.setdefault(ride_id, set()).add(idempotency_key)
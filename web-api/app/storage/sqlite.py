@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Tuple
+from app.models.ride_with_summary import RideWithSummary
+from .base import ContentHashConflict, RideStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rides (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    ride_id INTEGER NOT NULL REFERENCES rides(id) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_ride_id ON idempotency_keys (ride_id);
+"""
+
+class SqliteRideStore(RideStore):
+    """
+    Store backed by a SQLite database in WAL mode.
+
+    Every worker process opens the same file, so rides, IDs and the
+    deduplication indexes are shared: readers never block the single
+    writer, and AUTOINCREMENT keeps IDs unique across workers. Each thread
+    gets its own connection; all of them are tracked so close() can release
+    connections opened by threadpool threads too.
+    """
+
+    SCAN_BATCH_SIZE = 16
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000) -> None:
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self) -> '_WriteTransaction':
+        return _WriteTransaction(self._connection())
+
+    @staticmethod
+    def _load(data: str) -> RideWithSummary:
+        return RideWithSummary.from_trusted_dict(json.loads(data))
+
+    def add(self, ride: RideWithSummary, content_hash: str,
+            idempotency_key: Optional[str] = None) -> Tuple[int, bool]:
+        with self._write() as conn:
+            if idempotency_key:
+                existing = self._find_idempotency_key(conn, idempotency_key)
+                if existing is not None:
+                    return existing[0], False
+            existing_id = self._find_by_hash(conn, content_hash)
+            if existing_id is not None:
+                return existing_id, False
+            cursor = conn.execute(
+                "INSERT INTO rides (content_hash, data) VALUES (?, ?)",
+                (content_hash, ride.model_dump_json())
+            )
+            ride_id = cursor.lastrowid
+            if idempotency_key:
+                conn.execute(
+                    "INSERT INTO idempotency_keys (key, ride_id, content_hash) VALUES (?, ?, ?)",
+                    (idempotency_key, ride_id, content_hash)
+                )
+            return ride_id, True
+
+    def get(self, ride_id: int) -> Optional[RideWithSummary]:
+        row = self._connection().execute("SELECT data FROM rides WHERE id = ?", (ride_id,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def replace(self, ride_id: int, ride: RideWithSummary, content_hash: str) -> bool:
+        with self._write() as conn:
+            owner = self._find_by_hash(conn, content_hash)
+            if owner is not None and owner != ride_id:
+                raise ContentHashConflict(owner)
+            cursor = conn.execute(
+                "UPDATE rides SET data = ?, content_hash = ? WHERE id = ?",
+                (ride.model_dump_json(), content_hash, ride_id)
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, ride_id: int) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM rides WHERE id = ?", (ride_id,))
+            return cursor.rowcount > 0
+
+    def items(self) -> Iterator[Tuple[int, RideWithSummary]]:
+        # Read in short keyset-paginated batches: a slow consumer (e.g. a
+        # streaming export resumed on another thread) never holds a cursor
+        # or read snapshot open between batches
+        last_id = 0
+        while True:
+            rows = self._connection().execute(
+                "SELECT id, data FROM rides WHERE id > ? ORDER BY id LIMIT ?", (last_id, self.SCAN_BATCH_SIZE)
+            ).fetchall()
+            for ride_id, data in rows:
+                yield ride_id, self._load(data)
+            if len(rows) < self.SCAN_BATCH_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _find_by_hash(conn: sqlite3.Connection, content_hash: str) -> Optional[int]:
+        row = conn.execute("SELECT id FROM rides WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _find_idempotency_key(conn: sqlite3.Connection, idempotency_key: str) -> Optional[Tuple[int, str]]:
+        row = conn.execute(
+            "SELECT ride_id, content_hash FROM idempotency_keys WHERE key = ?", (idempotency_key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def find_by_hash(self, content_hash: str) -> Optional[int]:
+        return self._find_by_hash(self._connection(), content_hash)
+
+    def find_idempotency_key(self, idempotency_key: str) -> Optional[Tuple[int, str]]:
+        return self._find_idempotency_key(self._connection(), idempotency_key)
+
+    def link_idempotency_key(self, idempotency_key: str, ride_id: int, content_hash: str) -> None:
+        with self._write() as conn:
+            # The ride may have been deleted concurrently; the foreign key would reject it
+            if conn.execute("SELECT 1 FROM rides WHERE id = ?", (ride_id,)).fetchone():
+                conn.execute(
+                    "INSERT OR IGNORE INTO idempotency_keys (key, ride_id, content_hash) VALUES (?, ?, ?)",
+                    (idempotency_key, ride_id, content_hash)
+                )
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            # Threads re-connect lazily if the store is used after closing
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+class _WriteTransaction:
+    """Context manager running statements in a BEGIN IMMEDIATE transaction"""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
@@ -0,0 +1,262 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from app.models.ride_with_summary import RideWithSummary
+from app.models.waypoint import Waypoint
+from app.models.ride_summary import RideSummary
+from .memory import MemoryRideStore
+
+# Rough resident size of a materialized ride, measured with tracemalloc on
+# pydantic Waypoint models (about 490 bytes each)
+WAYPOINT_BYTES = 500
+RIDE_OVERHEAD_BYTES = 1024
+
+class RideCache:
+    """
+    Ride mapping split into hot, warm and cold tiers under a memory budget.
+
+    Hot rides are kept as ``RideWithSummary`` objects, warm rides as
+    zlib-compressed packed blobs (header JSON plus packed waypoint columns)
+    and cold rides as blob files in a spill directory. Both in-memory tiers
+    are LRU ordered: when the hot tier exceeds its share of the budget its
+    least recently used rides are packed into the warm tier, and when the
+    warm tier exceeds the rest of the budget its oldest blobs are spilled
+    to disk. Reading a warm or cold ride promotes it back to the hot tier.
+    """
+
+    def __init__(self, memory_budget: int, hot_fraction: float = 0.75,
+                 spill_dir: Optional[str] = None, compression_level: int = 1) -> None:
+        self.hot_budget = int(memory_budget * hot_fraction)
+        self.warm_budget = memory_budget - self.hot_budget
+        self.compression_level = compression_level
+        self._owns_spill_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="ride-spill-")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._hot: 'OrderedDict[int, Tuple[RideWithSummary, int]]' = OrderedDict()
+        self._warm: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._cold = set()
+        self._hot_bytes = 0
+        self._warm_bytes = 0
+        self._lock = threading.RLock()
+        self.counters = {"hot_hits": 0, "warm_hits": 0, "cold_hits": 0, "misses": 0,
+                         "demotions": 0, "spills": 0}
+
+    @staticmethod
+    def estimate_size(ride: RideWithSummary) -> int:
+        """Approximate memory held by a materialized ride"""
+        return RIDE_OVERHEAD_BYTES + WAYPOINT_BYTES * len(ride.waypoints)
+
+    @staticmethod
+    def pack(ride: RideWithSummary, level: int = 1) -> bytes:
+        """
+        Serialize a ride into a compressed blob.
+
+        Coordinates are stored as packed doubles, so they round-trip exactly.
+        """
+        waypoints = ride.waypoints
+        count = len(waypoints)
+        header = json.dumps({
+            "name": ride.name,
+            "start_time": ride.start_time,
+            "end_time": ride.end_time,
+            "number_waypoints": ride.number_waypoints,
+            "summary": ride.summary.model_dump(),
+            "timestamps": [w.timestamp for w in waypoints]
+        }).encode('utf-8')
+        columns = struct.pack(
+            f'<{3 * count}d',
+            *[w.lat for w in waypoints],
+            *[w.lon for w in waypoints],
+            *[w.elevation_ft for w in waypoints]
+        )
+        return zlib.compress(struct.pack('<II', len(header), count) + header + columns, level)
+
+    @staticmethod
+    def unpack(blob: bytes) -> RideWithSummary:
+        """Rebuild a ride packed by ``pack`` without re-validating it"""
+        data = zlib.decompress(blob)
+        header_length, count = struct.unpack_from('<II', data)
+        offset = 8 + header_length
+        header = json.loads(data[8:offset])
+        values = struct.unpack_from(f'<{3 * count}d', data, offset)
+        lats, lons, elevations = values[:count], values[count:2 * count], values[2 * count:]
+        waypoints = [
+            Waypoint.model_construct(timestamp=ts, lat=lat, lon=lon, elevation_ft=elev)
+            for ts, lat, lon, elev in zip(header.pop("timestamps"), lats, lons, elevations)
+        ]
+        summary = RideSummary.model_construct(**header.pop("summary"))
+        return RideWithSummary.model_construct(**header, waypoints=waypoints, summary=summary)
+
+    def _spill_path(self, ride_id: int) -> str:
+        return os.path.join(self.spill_dir, f"{ride_id}.ride")
+
+    def _read_cold(self, ride_id: int) -> bytes:
+        with open(self._spill_path(ride_id), 'rb') as f:
+            return f.read()
+
+    def _discard(self, ride_id: int) -> bool:
+        """Remove a ride from whichever tier holds it"""
+        entry = self._hot.pop(ride_id, None)
+        if entry is not None:
+            self._hot_bytes -= entry[1]
+            return True
+        blob = self._warm.pop(ride_id, None)
+        if blob is not None:
+            self._warm_bytes -= len(blob)
+            return True
+        if ride_id in self._cold:
+            self._cold.discard(ride_id)
+            os.remove(self._spill_path(ride_id))
+            return True
+        return False
+
+    def _put_hot(self, ride_id: int, ride: RideWithSummary) -> None:
+        size = self.estimate_size(ride)
+        self._hot[ride_id] = (ride, size)
+        self._hot_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        # The most recently used ride always stays hot, even if it alone exceeds the budget
+        while self._hot_bytes > self.hot_budget and len(self._hot) > 1:
+            ride_id, (ride, size) = self._hot.popitem(last=False)
+            self._hot_bytes -= size
+            blob = self.pack(ride, self.compression_level)
+            self._warm[ride_id] = blob
+            self._warm_bytes += len(blob)
+            self.counters["demotions"] += 1
+        while self._warm_bytes > self.warm_budget and self._warm:
+            ride_id, blob = self._warm.popitem(last=False)
+            self._warm_bytes -= len(blob)
+            with open(self._spill_path(ride_id), 'wb') as f:
+                f.write(blob)
+            self._cold.add(ride_id)
+            self.counters["spills"] += 1
+
+    def __contains__(self, ride_id: object) -> bool:
+        with self._lock:
+            return ride_id in self._hot or ride_id in self._warm or ride_id in self._cold
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hot) + len(self._warm) + len(self._cold)
+
+    def __setitem__(self, ride_id: int, ride: RideWithSummary) -> None:
+        with self._lock:
+            self._discard(ride_id)
+            self._put_hot(ride_id, ride)
+
+    def get(self, ride_id: int, default: Any = None) -> Optional[RideWithSummary]:
+        """Return a ride and promote it to the hot tier"""
+        with self._lock:
+            entry = self._hot.get(ride_id)
+            if entry is not None:
+                self._hot.move_to_end(ride_id)
+                self.counters["hot_hits"] += 1
+                return entry[0]
+            blob = self._warm.pop(ride_id, None)
+            if blob is not None:
+                self._warm_bytes -= len(blob)
+                self.counters["warm_hits"] += 1
+            elif ride_id in self._cold:
+                blob = self._read_cold(ride_id)
+                self._cold.discard(ride_id)
+                os.remove(self._spill_path(ride_id))
+                self.counters["cold_hits"] += 1
+            else:
+                self.counters["misses"] += 1
+                return default
+            ride = self.unpack(blob)
+            self._put_hot(ride_id, ride)
+            return ride
+
+    def peek(self, ride_id: int) -> Optional[RideWithSummary]:
+        """Return a ride without promoting it or counting a hit (for bulk scans)"""
+        with self._lock:
+            entry = self._hot.get(ride_id)
+            if entry is not None:
+                return entry[0]
+            blob = self._warm.get(ride_id)
+            if blob is None and ride_id in self._cold:
+                blob = self._read_cold(ride_id)
+        return self.unpack(blob) if blob is not None else None
+
+    def __delitem__(self, ride_id: int) -> None:
+        with self._lock:
+            if not self._discard(ride_id):
+                raise KeyError(ride_id)
+
+    def keys(self) -> Iterator[int]:
+        with self._lock:
+            return iter(sorted([*self._hot, *self._warm, *self._cold]))
+
+    def entries(self) -> Iterator[Tuple[int, str, Union[RideWithSummary, bytes, None]]]:
+        """Snapshot of (ride ID, tier, ride or blob or None) without promoting anything"""
+        with self._lock:
+            entries = [(ride_id, "hot", ride) for ride_id, (ride, _) in self._hot.items()]
+            entries += [(ride_id, "warm", blob) for ride_id, blob in self._warm.items()]
+            entries += [(ride_id, "cold", None) for ride_id in self._cold]
+        return iter(entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Tier sizes and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "hot_rides": len(self._hot),
+                "hot_bytes": self._hot_bytes,
+                "warm_rides": len(self._warm),
+                "warm_bytes": self._warm_bytes,
+                "cold_rides": len(self._cold),
+                **self.counters
+            }
+
+    def close(self) -> None:
+        """Drop every tier and remove the spill directory if the cache created it"""
+        with self._lock:
+            self._hot.clear()
+            self._warm.clear()
+            self._cold.clear()
+            self._hot_bytes = self._warm_bytes = 0
+            if self._owns_spill_dir:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+            else:
+                for name in os.listdir(self.spill_dir):
+                    if name.endswith(".ride"):
+                        os.remove(os.path.join(self.spill_dir, name))
+
+class TieredRideStore(MemoryRideStore):
+    """
+    Process-local store whose rides live in a ``RideCache`` (single worker only).
+
+    Deduplication indexes stay in plain dictionaries; only the rides
+    themselves are tiered, so memory stays within the configured budget
+    however many rides are uploaded.
+    """
+
+    def __init__(self, memory_budget: int, hot_fraction: float = 0.75,
+                 spill_dir: Optional[str] = None) -> None:
+        super().__init__()
+        self._rides = RideCache(memory_budget, hot_fraction, spill_dir)
+
+    def items(self) -> Iterator[Tuple[int, RideWithSummary]]:
+        # Scans must not flush the hot tier, so rides are read without promotion
+        for ride_id in list(self._rides.keys()):
+            ride = self._rides.peek(ride_id)
+            if ride is not None:
+                yield ride_id, ride
+
+    def resident(self) -> Iterator[Tuple[int, str, Union[RideWithSummary, bytes, None]]]:
+        return self._rides.entries()
+
+    def stats(self) -> Dict[str, int]:
+        """Cache tier sizes and counters"""
+        return self._rides.stats()
+
+    def close(self) -> None:
+        self._rides.close()
@@ -0,0 +1,48 @@
+"""
+Benchmark RideSummaryCalculator.calculate_summary on a 50k waypoint ride.
+
+Compares the current single-scan implementation against the previous one,
+which built a sorted copy of all datetimes to check the order and then
+sorted the waypoints again before re-parsing every timestamp per segment.
+
+    python -m benchmarks.bench_calculate_summary [--points 50000]
+"""
+
+import argparse
+from datetime import datetime
+from app.models.ride import Ride
+from app.services.ride_summary_calculator import RideSummaryCalculator
+from .common import best_of, synthetic_ride
+
+def legacy_ordering_work(waypoints):
+    """The ordering work removed from calculate_summary (validation sort + re-sort + re-parse)."""
+    timestamps = [datetime.fromisoformat(w.timestamp.replace('Z', '+00:00')) for w in waypoints]
+    if sorted(timestamps) != timestamps:
+        raise ValueError("not chronological")
+    parse = RideSummaryCalculator.parse_timestamp
+    ordered = sorted(waypoints, key=lambda w: parse(w.timestamp))
+    for i in range(1, len(ordered)):
+        (parse(ordered[i].timestamp) - parse(ordered[i - 1].timestamp)).total_seconds()
+    return ordered
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--points', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    waypoints = Ride(**synthetic_ride(args.points)).waypoints
+
+    legacy_time, _ = best_of(lambda: legacy_ordering_work(waypoints), args.repeat)
+    scan_time, _ = best_of(lambda: RideSummaryCalculator.validate_timestamps(waypoints), args.repeat)
+    summary_time, summary = best_of(lambda: RideSummaryCalculator.calculate_summary(waypoints), args.repeat)
+
+    print(f"waypoints:                          {args.points}")
+    print(f"legacy ordering work (2 sorts):     {legacy_time * 1000:8.1f} ms")
+    print(f"epoch parse + linear scan:          {scan_time * 1000:8.1f} ms")
+    print(f"calculate_summary (total):          {summary_time * 1000:8.1f} ms")
+    print(f"ordering work removed:              {(legacy_time - scan_time) * 1000:8.1f} ms")
+    print(f"summary: {summary.total_distance_mi} mi, {summary.elapsed_time}")
+
+if __name__ == "__main__":
+    main()
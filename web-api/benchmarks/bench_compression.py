@@ -0,0 +1,89 @@
+"""
+Benchmark bytes-on-the-wire and latency of compressed ride payloads.
+
+Uploads each bundled sample ride with identity, gzip and (if installed)
+zstd request bodies, then fetches it back with each Accept-Encoding.
+Runs in-process with TestClient by default, or against a running server
+with --url.
+
+    python -m benchmarks.bench_compression [--url http://127.0.0.1:8000]
+"""
+
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+from statistics import median
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+from app.middleware.compression import supported_encodings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SAMPLE_RIDES = [
+    Path(__file__).resolve().parents[1] / "app" / "samples" / "ride_simple.json",
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-chill.json",
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-hardcore.json",
+]
+
+def encode_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    client = httpx.Client(base_url=args.url) if args.url else TestClient(app)
+    encodings = ["identity"] + supported_encodings()[::-1]
+
+    print(f"{'ride':<20} {'direction':<9} {'encoding':<9} {'bytes':>10} {'ratio':>6} {'median ms':>10}")
+    for path in SAMPLE_RIDES:
+        if not path.exists():
+            continue
+        ride = json.loads(path.read_text())
+        ride_id = None
+
+        for encoding in encodings:
+            timings = []
+            body_size = raw_size = 0
+            for i in range(args.repeat):
+                # Rename each copy so uploads are not answered by deduplication
+                payload = json.dumps({**ride, "name": f"{ride['name']} {encoding} {i} {time.time()}"}).encode()
+                body = encode_body(payload, encoding)
+                headers = {"Content-Type": "application/json"}
+                if encoding != "identity":
+                    headers["Content-Encoding"] = encoding
+                start = time.perf_counter()
+                response = client.post("/api/rides/upload", content=body, headers=headers)
+                timings.append(time.perf_counter() - start)
+                response.raise_for_status()
+                ride_id = response.json()["id"]
+                body_size, raw_size = len(body), len(payload)
+            print(f"{path.stem:<20} {'upload':<9} {encoding:<9} {body_size:>10} "
+                  f"{raw_size / body_size:>6.1f} {median(timings) * 1000:>10.1f}")
+
+        for encoding in encodings:
+            timings = []
+            wire_bytes = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get(f"/api/rides/{ride_id}", headers={"Accept-Encoding": encoding})
+                response.read()
+                timings.append(time.perf_counter() - start)
+                wire_bytes = response.num_bytes_downloaded
+            print(f"{path.stem:<20} {'get':<9} {encoding:<9} {wire_bytes:>10} "
+                  f"{len(response.content) / wire_bytes:>6.1f} {median(timings) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark streaming ride export throughput and memory.
+
+Fills a SQLite store (in a temporary directory) with --rides synthetic
+rides of --points waypoints, then streams GET /api/rides/export in each
+format through the app in-process and reports waypoints/sec and bytes
+streamed. A second pass under tracemalloc reports the peak memory
+allocated while iterating the export generator for a quarter of the
+rides and for all of them (selected by id), and for a full-store scan:
+the peak should stay flat as the number of exported rides grows. (TestClient buffers whole response bodies, so memory is
+measured on the generator rather than through the client.)
+
+    python -m benchmarks.bench_export [--rides 200] [--points 5000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.ride_service import RideService
+from app.storage import MemoryRideStore, SqliteRideStore
+from .common import synthetic_ride
+
+FORMATS = ("ndjson", "csv", "gpx")
+
+def stream_export(client: TestClient, export_format: str, ids=None) -> int:
+    params = {"format": export_format}
+    if ids is not None:
+        params["ids"] = ids
+    size = 0
+    with client.stream("GET", "/api/rides/export", params=params, headers={"Accept-Encoding": "identity"}) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            size += len(chunk)
+    return size
+
+def peak_memory(export_format: str, ids) -> int:
+    tracemalloc.start()
+    try:
+        for _ in RideService.export_rides(export_format, ids):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rides', type=int, default=200)
+    parser.add_argument('--points', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        RideService.use_store(SqliteRideStore(os.path.join(tmp, "rides.db")))
+        try:
+            ids = [RideService.upload_trusted_ride(synthetic_ride(args.points, f"Export Ride {i}"))["id"]
+                   for i in range(args.rides)]
+            client = TestClient(app)
+            waypoints = args.rides * args.points
+            print(f"rides: {args.rides}, waypoints: {waypoints}")
+            print(f"{'format':<8} {'seconds':>8} {'waypoints/s':>12} {'MB':>8} "
+                  f"{'peak MB 1/4':>12} {'peak MB all':>12} {'peak MB scan':>13}")
+            for export_format in FORMATS:
+                start = time.perf_counter()
+                size = stream_export(client, export_format)
+                elapsed = time.perf_counter() - start
+                peaks = (peak_memory(export_format, ids[:max(1, len(ids) // 4)]),
+                         peak_memory(export_format, ids), peak_memory(export_format, None))
+                print(f"{export_format:<8} {elapsed:>8.2f} {waypoints / elapsed:>12,.0f} {size / 1e6:>8.1f} "
+                      f"{peaks[0] / 1e6:>12.1f} {peaks[1] / 1e6:>12.1f} {peaks[2] / 1e6:>13.1f}")
+        finally:
+            RideService.use_store(MemoryRideStore())
+
+if __name__ == "__main__":
+    main()
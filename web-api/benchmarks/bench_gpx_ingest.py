@@ -0,0 +1,55 @@
+"""
+Benchmark GPX conversion throughput on the ingest process pool.
+
+Converts the bundled utils-gpx sample files --files times, first serially
+in this process and then concurrently through GpxIngestPool with each
+--workers count, and reports files/sec and waypoints/sec. Throughput
+should scale with workers up to the number of CPU cores.
+
+    python -m benchmarks.bench_gpx_ingest [--files 40] [--workers 1 2 4]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+from app.services.gpx_ingest import GpxIngestPool, GPX_WORKERS_ENV, convert_gpx_bytes
+
+SAMPLE_GPX = [
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-chill.gpx",
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-hardcore.gpx",
+]
+
+async def convert_all(files):
+    rides = await asyncio.gather(*(GpxIngestPool.convert(data) for data in files))
+    return sum(ride["number_waypoints"] for ride in rides)
+
+def report(label: str, files: int, waypoints: int, elapsed: float) -> None:
+    print(f"{label:<16} {elapsed:>8.2f} s {files / elapsed:>10.1f} files/s {waypoints / elapsed:>12,.0f} waypoints/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=40)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    samples = [path.read_bytes() for path in SAMPLE_GPX]
+    files = [samples[i % len(samples)] for i in range(args.files)]
+    print(f"files: {args.files}, CPU cores: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    waypoints = sum(convert_gpx_bytes(data)["number_waypoints"] for data in files)
+    report("serial", len(files), waypoints, time.perf_counter() - start)
+
+    for workers in args.workers:
+        os.environ[GPX_WORKERS_ENV] = str(workers)
+        # Warm the pool so worker start-up is not measured
+        asyncio.run(convert_all(samples * workers))
+        start = time.perf_counter()
+        waypoints = asyncio.run(convert_all(files))
+        report(f"pool x{workers}", len(files), waypoints, time.perf_counter() - start)
+        GpxIngestPool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the route similarity index against pairwise comparison.
+
+Generates --routes random loops and --variants noisy copies of each
+(jittered GPS, a random start point and half of them ridden in reverse),
+indexes them all and reports the indexing rate, the latency of similar-ride
+queries, the number of candidates each query verifies, and recall and
+precision against the known route of every variant. The same queries are
+then answered by comparing every signature (the O(N) scan the index
+avoids) for a speedup figure.
+
+    python -m benchmarks.bench_route_index [--routes 500] [--variants 8]
+"""
+
+import argparse
+import random
+import time
+from math import cos, pi, sin
+from types import SimpleNamespace
+from typing import List, Tuple
+from app.models.waypoint import Waypoint
+from app.services.route_index import RouteIndex
+from .common import percentiles
+
+def loop_points(rng: random.Random) -> List[Tuple[float, float]]:
+    """A wobbly loop of 5 to 30 miles somewhere in a 2 x 2 degree region"""
+    lat, lon = 44.0 + rng.random() * 2, -104.5 + rng.random() * 2
+    radius = rng.uniform(0.01, 0.06)
+    harmonics = [(rng.randint(2, 6), rng.uniform(0.05, 0.3), rng.uniform(0, 2 * pi)) for _ in range(3)]
+    points = []
+    for i in range(300):
+        t = 2 * pi * i / 300
+        r = radius * (1 + sum(a * sin(k * t + phase) for k, a, phase in harmonics))
+        points.append((lat + r * sin(t), lon + 1.4 * r * cos(t)))
+    return points
+
+def variant(points: List[Tuple[float, float]], rng: random.Random):
+    shift = rng.randrange(len(points))
+    track = points[shift:] + points[:shift + 1]
+    if rng.random() < 0.5:
+        track.reverse()
+    return SimpleNamespace(waypoints=[
+        Waypoint.model_construct(lat=lat + rng.gauss(0, 0.00005), lon=lon + rng.gauss(0, 0.00005),
+                                 elevation_ft=0.0, timestamp="2024-03-15T10:00:00Z")
+        for lat, lon in track[::rng.choice((1, 2, 3))]
+    ])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--variants", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-similarity", type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rides, route_of = [], {}
+    for route in range(args.routes):
+        points = loop_points(rng)
+        for _ in range(args.variants):
+            route_of[len(rides)] = route
+            rides.append(variant(points, rng))
+    print(f"{len(rides)} rides on {args.routes} routes")
+
+    RouteIndex.clear()
+    start = time.perf_counter()
+    for ride_id, ride in enumerate(rides):
+        RouteIndex.add(ride_id, ride)
+    elapsed = time.perf_counter() - start
+    print(f"indexed in {elapsed:.2f}s ({len(rides) / elapsed:,.0f} rides/s)")
+
+    query_ids = rng.sample(range(len(rides)), min(args.queries, len(rides)))
+    latencies, candidates, found, relevant, returned = [], [], 0, 0, 0
+    for ride_id in query_ids:
+        signature = RouteIndex._signatures[ride_id]
+        seen = set()
+        for band, key in RouteIndex._bands(signature):
+            seen.update(RouteIndex._buckets[band].get(key, ()))
+        candidates.append(len(seen) - 1)
+
+        start = time.perf_counter()
+        similar = RouteIndex.similar(ride_id, min_similarity=args.min_similarity, limit=len(rides))
+        latencies.append(time.perf_counter() - start)
+        matches = {entry["id"] for entry in similar}
+        expected = {other for other, route in route_of.items() if route == route_of[ride_id]} - {ride_id}
+        found += len(matches & expected)
+        relevant += len(expected)
+        returned += len(matches)
+    lat = percentiles(latencies)
+    print(f"indexed query: p50 {lat['p50'] * 1000:.2f} ms, p99 {lat['p99'] * 1000:.2f} ms, "
+          f"{sum(candidates) / len(candidates):.1f} candidates verified of {len(rides) - 1}")
+    print(f"recall {found / max(relevant, 1):.3f}, precision {found / max(returned, 1):.3f}")
+
+    start = time.perf_counter()
+    for ride_id in query_ids:
+        signature = RouteIndex._signatures[ride_id]
+        sorted(
+            (RouteIndex.similarity(signature, other_signature), other)
+            for other, other_signature in RouteIndex._signatures.items()
+            if other != ride_id
+        )
+    scan = (time.perf_counter() - start) / len(query_ids)
+    mean = sum(latencies) / len(latencies)
+    print(f"full scan: {scan * 1000:.2f} ms per query ({scan / mean:.0f}x slower than the index)")
+
+if __name__ == "__main__":
+    main()
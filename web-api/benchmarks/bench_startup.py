@@ -0,0 +1,76 @@
+"""
+Benchmark web-api cold start: process launch through the first served request.
+
+Each run starts a fresh interpreter that imports app.main, builds the app
+and serves its first request in-process (lifespan startup included), and
+reports the import time, the time to that first response and the total
+wall time of the process as seen from outside. Runs are repeated for the
+full app and for the API-only app (RIDE_API_ONLY=1), and for the first
+page render with an empty and a precompiled template cache.
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    client.get({path!r}).raise_for_status()
+    served = time.perf_counter()
+print(json.dumps({{"import": imported - start, "startup": ready - imported, "first_request": served - ready,
+                  "to_first_response": served - start}}))
+"""
+
+def run_once(path: str, env: Dict[str, str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD.format(path=path)], env=env,
+                            capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+def report(label: str, runs: List[Dict[str, float]]) -> None:
+    columns = ("import", "startup", "first_request", "to_first_response", "process")
+    medians = {column: statistics.median(run[column] for run in runs) * 1000 for column in columns}
+    print(f"{label:<34}" + "".join(f"{medians[column]:>12.1f}" for column in columns))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    base = {**os.environ}
+    base.pop("RIDE_STORE_PATH", None)
+    print(f"{'median ms over ' + str(args.runs) + ' runs':<34}"
+          + "".join(f"{column:>12}" for column in ("import", "startup", "1st req", "to 1st resp", "process")))
+    report("full app, GET /api/rides/", [run_once("/api/rides/", base) for _ in range(args.runs)])
+    api_only = {**base, "RIDE_API_ONLY": "1"}
+    report("API-only app, GET /api/rides/", [run_once("/api/rides/", api_only) for _ in range(args.runs)])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pages = {**base, "RIDE_TEMPLATE_CACHE_DIR": cache_dir}
+        cold = []
+        for _ in range(args.runs):
+            for entry in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, entry))
+            cold.append(run_once("/", pages))
+        report("full app, GET / (empty cache)", cold)
+        subprocess.run([sys.executable, "-m", "app.routes.web"], env=pages, check=True, capture_output=True)
+        report("full app, GET / (precompiled)", [run_once("/", pages) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
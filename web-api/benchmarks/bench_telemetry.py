@@ -0,0 +1,119 @@
+"""
+Measure live telemetry fan-out to a swarm of WebSocket viewers.
+
+Starts a local uvicorn (one worker, since telemetry sessions live in the
+worker process) unless --url points at a running server, connects
+--viewers subscribers to one session and publishes --updates telemetry
+updates at --rate per second. Reports how long each update took to reach
+the viewers (p50/p90/p99 over every delivery), how many updates viewers
+missed and the publisher's send rate. --slow viewers sleep --slow-ms per
+message; they fall behind without holding up the rest, and skip ahead
+once the socket buffers between them and the server are full.
+
+    python -m benchmarks.bench_telemetry [--viewers 1000] [--updates 200] [--rate 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+import httpx
+import websockets
+from .bench_workers import free_port, start_server, wait_ready
+from .common import percentiles
+
+def telemetry_update(n: int) -> str:
+    return json.dumps({
+        "timestamp": f"2024-03-15T10:{n // 60 % 60:02d}:{n % 60:02d}Z",
+        "lat": 44.5 + n * 0.00001,
+        "lon": -103.9,
+        "elevation_ft": 3600.0,
+        "avg_speed_mph": 14.2,
+        "battery_percentage": 100.0 - n * 0.01,
+        "distance_miles": n * 0.004
+    })
+
+async def viewer(url: str, ready: asyncio.Event, connected: List[int], total: int, sent_at: Dict[int, float],
+                 latencies: List[float], dropped: List[int], slow_s: float) -> None:
+    async with websockets.connect(url, max_queue=None) as ws:
+        connected[0] += 1
+        if connected[0] == total:
+            ready.set()
+        async for raw in ws:
+            message = json.loads(raw)
+            if message["type"] == "update":
+                latencies.append(time.perf_counter() - sent_at[message["seq"]])
+                if slow_s:
+                    await asyncio.sleep(slow_s)
+            elif message["type"] == "dropped":
+                dropped.append(message["count"])
+            elif message["type"] == "end":
+                return
+
+async def run(base_url: str, args) -> None:
+    ws_url = base_url.replace("http", "ws", 1) + "/api/telemetry/bench"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await wait_ready(client)
+    ready = asyncio.Event()
+    connected = [0]
+    sent_at: Dict[int, float] = {}
+    fast: List[float] = []
+    slow: List[float] = []
+    dropped: List[int] = []
+    viewers = []
+    for i in range(args.viewers):
+        is_slow = i < args.slow
+        viewers.append(asyncio.create_task(viewer(
+            ws_url, ready, connected, args.viewers, sent_at, slow if is_slow else fast, dropped,
+            args.slow_ms / 1000 if is_slow else 0
+        )))
+        if i % 100 == 99:
+            await asyncio.sleep(0)  # let the handshakes progress
+    await asyncio.wait_for(ready.wait(), timeout=120)
+    print(f"{args.viewers} viewers connected")
+
+    interval = 1 / args.rate
+    async with websockets.connect(ws_url + "/publish") as publisher:
+        start = time.perf_counter()
+        for n in range(1, args.updates + 1):
+            sent_at[n] = time.perf_counter()
+            await publisher.send(telemetry_update(n))
+            await asyncio.sleep(max(0.0, start + n * interval - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+    await asyncio.gather(*viewers)
+
+    print(f"published {args.updates} updates in {elapsed:.2f}s ({args.updates / elapsed:.1f}/s)")
+    for label, samples in (("viewers", fast), ("slow viewers", slow)):
+        if samples:
+            p = percentiles(samples)
+            print(f"{label:<13} deliveries: {len(samples):>8}  p50 {p['p50'] * 1000:7.1f} ms  "
+                  f"p90 {p['p90'] * 1000:7.1f} ms  p99 {p['p99'] * 1000:7.1f} ms")
+    print(f"updates skipped by slow viewers: {sum(dropped)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='Base URL of a running server (default: start a local uvicorn)')
+    parser.add_argument('--viewers', type=int, default=1000, help='Subscribed viewers')
+    parser.add_argument('--updates', type=int, default=200, help='Updates to publish')
+    parser.add_argument('--rate', type=float, default=20, help='Updates per second')
+    parser.add_argument('--slow', type=int, default=0, help='How many viewers are slow consumers')
+    parser.add_argument('--slow-ms', type=float, default=500, help='Processing delay per message of a slow viewer')
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args))
+        return
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(1, os.path.join(tmp, "rides.db"), port)
+        try:
+            asyncio.run(run(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+if __name__ == "__main__":
+    main()
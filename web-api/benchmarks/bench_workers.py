@@ -0,0 +1,129 @@
+"""
+Load test upload and get throughput across uvicorn worker counts.
+
+Starts ``uvicorn app.main:app --workers N`` for each requested N against a
+fresh SQLite store (RIDE_STORE_PATH), then drives it with concurrent
+uploads of distinct rides followed by concurrent gets of random stored
+rides and a few full listings, and reports requests/sec per phase.
+Every get and list re-reads the stored ride JSON from SQLite, so those
+phases include the deserialization cost. Throughput should scale close
+to linearly with workers up to the number of CPU cores.
+
+    python -m benchmarks.bench_workers [--workers 1 2 4] [--points 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from .common import percentiles, synthetic_ride
+
+WEB_API_DIR = Path(__file__).resolve().parents[1]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, store_path: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "RIDE_STORE_PATH": store_path}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=WEB_API_DIR, env=env
+    )
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/api/rides/999999")).status_code == 404:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def run_phase(concurrency: int, total: int, make_request) -> dict:
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            await make_request(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"rps": total / elapsed, **{k: v * 1000 for k, v in percentiles(latencies).items()}}
+
+async def bench(workers: int, args) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(workers, os.path.join(tmp, "rides.db"), port)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_ready(client)
+                template = synthetic_ride(args.points)
+                bodies = [json.dumps({**template, "name": f"Ride {i}"}) for i in range(args.uploads)]
+                ids = []
+
+                async def upload(i):
+                    response = await client.post("/api/rides/upload", content=bodies[i],
+                                                 headers={"Content-Type": "application/json"})
+                    response.raise_for_status()
+                    ids.append(response.json()["id"])
+
+                async def get(_):
+                    response = await client.get(f"/api/rides/{random.choice(ids)}")
+                    response.raise_for_status()
+
+                async def list_all(_):
+                    response = await client.get("/api/rides/")
+                    response.raise_for_status()
+
+                return {
+                    "upload": await run_phase(args.concurrency, args.uploads, upload),
+                    "get": await run_phase(args.concurrency, args.gets, get),
+                    "list": await run_phase(min(args.concurrency, args.lists), args.lists, list_all),
+                }
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--points', type=int, default=500, help='Waypoints per ride')
+    parser.add_argument('--uploads', type=int, default=400)
+    parser.add_argument('--gets', type=int, default=2000)
+    parser.add_argument('--lists', type=int, default=10, help='Full GET /api/rides/ requests')
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}, waypoints/ride: {args.points}, concurrency: {args.concurrency}")
+    print(f"{'workers':>7} {'phase':<7} {'req/s':>8} {'scaling':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    baseline = {}
+    for workers in args.workers:
+        results = asyncio.run(bench(workers, args))
+        for phase, stats in results.items():
+            baseline.setdefault(phase, stats["rps"])
+            print(f"{workers:>7} {phase:<7} {stats['rps']:>8.1f} {stats['rps'] / baseline[phase]:>7.2f}x "
+                  f"{stats['p50']:>8.1f} {stats['p99']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Shared helpers for the web-api benchmark scripts.
+
+Run the benchmarks from the web-api directory, e.g.
+``python -m benchmarks.bench_calculate_summary``.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+def synthetic_ride(num_points: int, name: str = "Benchmark Ride") -> Dict[str, Any]:
+    """Build a chronological ride JSON payload with one waypoint per second."""
+    start = datetime(2024, 3, 15, 10, 0, 0, tzinfo=timezone.utc)
+    waypoints = []
+    for i in range(num_points):
+        waypoints.append({
+            "lat": 44.5 + i * 0.00001,
+            "lon": -103.9 + (i % 500) * 0.00001,
+            "elevation_ft": 3600.0 + (i % 200) * 0.5,
+            "timestamp": (start + timedelta(seconds=i)).isoformat()
+        })
+    return {
+        "name": name,
+        "start_time": waypoints[0]["timestamp"],
+        "end_time": waypoints[-1]["timestamp"],
+        "number_waypoints": num_points,
+        "waypoints": waypoints
+    }
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> Tuple[float, Any]:
+    """Return the best wall time in seconds over ``repeat`` runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def percentiles(samples: List[float], points=(50, 90, 99)) -> Dict[str, float]:
+    """Return the requested percentiles of ``samples`` keyed as ``p50`` etc."""
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
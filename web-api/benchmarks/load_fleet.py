@@ -0,0 +1,164 @@
+"""
+Simulate a fleet of desktop clients uploading rides and polling the ride list.
+
+Each virtual client loops for --duration seconds, picking an action from
+the --mix weights: upload a ride derived from the bundled
+ride-chill.json/ride-hardcore.json (renamed per upload so every upload is
+new content, except for the --duplicate-rate share that re-sends an
+earlier ride), list all rides, or fetch one stored ride. Clients pause
+--think-ms between actions, like an app polling in the background.
+Throughput and latency percentiles are reported per endpoint.
+
+Starts a local uvicorn (--workers, SQLite store in a temporary
+directory) unless --url points at a running server.
+
+    python -m benchmarks.load_fleet [--clients 200] [--duration 30] [--mix upload=1,list=4,get=5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import httpx
+from .bench_workers import free_port, start_server, wait_ready
+from .common import percentiles
+
+FLEET_RIDES = [
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-chill.json",
+    Path(__file__).resolve().parents[2] / "utils-gpx" / "ride-hardcore.json",
+]
+NAME_PLACEHOLDER = "__FLEET_RIDE_NAME__"
+
+class RideTemplates:
+    """Pre-serialized sample rides whose name can be swapped without re-encoding"""
+
+    def __init__(self, paths: List[Path]) -> None:
+        self.templates = []
+        for path in paths:
+            with open(path) as f:
+                ride = json.load(f)
+            base_name = ride["name"]
+            ride["name"] = NAME_PLACEHOLDER
+            self.templates.append((base_name, json.dumps(ride).encode("utf-8")))
+        self.uploaded = 0
+
+    def next_body(self) -> bytes:
+        """A ride body with a name no previous upload used"""
+        self.uploaded += 1
+        base_name, template = random.choice(self.templates)
+        return template.replace(NAME_PLACEHOLDER.encode(), f"{base_name} #{self.uploaded}".encode(), 1)
+
+class FleetStats:
+    """Latencies and error counts per endpoint"""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> None:
+        print(f"{'endpoint':<22} {'requests':>8} {'errors':>6} {'req/s':>8} "
+              f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for endpoint, samples in sorted(self.latencies.items()):
+            p = percentiles(samples)
+            print(f"{endpoint:<22} {len(samples):>8} {self.errors.get(endpoint, 0):>6} "
+                  f"{len(samples) / elapsed:>8.1f} {p['p50'] * 1000:>8.1f} {p['p90'] * 1000:>8.1f} "
+                  f"{p['p99'] * 1000:>8.1f}")
+        total = sum(len(samples) for samples in self.latencies.values())
+        print(f"{'total':<22} {total:>8} {sum(self.errors.values()):>6} {total / elapsed:>8.1f}")
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        if action not in ("upload", "list", "get"):
+            raise argparse.ArgumentTypeError(f"unknown action '{action}' (expected upload, list or get)")
+        mix[action] = float(weight or 1)
+    return mix
+
+async def client_loop(client: httpx.AsyncClient, args, templates: RideTemplates, ids: List[int],
+                      sent: List[bytes], stats: FleetStats, deadline: float) -> None:
+    actions, weights = zip(*args.mix.items())
+    # Spread client start-up so they do not all fire in the same instant
+    await asyncio.sleep(random.uniform(0, args.think_ms / 1000))
+    while time.monotonic() < deadline:
+        action = random.choices(actions, weights)[0]
+        if action == "get" and not ids:
+            action = "upload"
+        start = time.perf_counter()
+        try:
+            if action == "upload":
+                endpoint = "POST /api/rides/upload"
+                if sent and random.random() < args.duplicate_rate:
+                    body = random.choice(sent)
+                else:
+                    body = templates.next_body()
+                    sent.append(body)
+                response = await client.post("/api/rides/upload", content=body,
+                                             headers={"Content-Type": "application/json"})
+                if response.status_code == 200:
+                    ids.append(response.json()["id"])
+            elif action == "list":
+                endpoint = "GET /api/rides/"
+                response = await client.get("/api/rides/")
+            else:
+                endpoint = "GET /api/rides/{id}"
+                response = await client.get(f"/api/rides/{random.choice(ids)}")
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        stats.record(endpoint, time.perf_counter() - start, ok)
+        await asyncio.sleep(random.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0)
+
+async def run_fleet(base_url: str, args) -> None:
+    templates = RideTemplates(FLEET_RIDES)
+    stats = FleetStats()
+    ids: List[int] = []
+    sent: List[bytes] = []
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await wait_ready(client)
+        start = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        await asyncio.gather(*(
+            client_loop(client, args, templates, ids, sent, stats, deadline) for _ in range(args.clients)
+        ))
+        stats.report(time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='Base URL of a running server (default: start a local uvicorn)')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers for the local server')
+    parser.add_argument('--clients', type=int, default=200, help='Simulated desktop clients')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix("upload=1,list=4,get=5"),
+                        help='Relative action weights (default: upload=1,list=4,get=5)')
+    parser.add_argument('--think-ms', type=float, default=500, help='Mean pause between a client\'s actions')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help='Share of uploads that re-send an earlier ride')
+    args = parser.parse_args()
+
+    print(f"clients: {args.clients}, duration: {args.duration}s, mix: {args.mix}, think: {args.think_ms} ms")
+    if args.url:
+        asyncio.run(run_fleet(args.url, args))
+        return
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(args.workers, os.path.join(tmp, "rides.db"), port)
+        try:
+            asyncio.run(run_fleet(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+if __name__ == "__main__":
+    main()
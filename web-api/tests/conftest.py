@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.services.ride_service import RideService
+from app.storage import MemoryRideStore
 
 @pytest.fixture
 def client():
@@ -9,9 +10,8 @@ def client():
 
 @pytest.fixture
 def ride_service():
-    # Clear rides before each test
-    RideService._rides.clear()
-    RideService._current_id = 0
+    # Start each test with an empty store
+    RideService.use_store(MemoryRideStore())
     return RideService
 
 @pytest.fixture
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.middleware.admission import AdmissionMiddleware, _WaypointCounter, settings_from_env
+
+def _app(**settings):
+    inner = FastAPI()
+
+    @inner.post("/api/rides/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @inner.get("/api/rides/")
+    def list_rides():
+        return []
+
+    inner.add_middleware(AdmissionMiddleware, **settings)
+    return inner
+
+def _ride(count):
+    return json.dumps({"name": "Ride", "waypoints": [
+        {"lat": 1.0, "lon": 2.0, "elevation_ft": 3.0, "timestamp": "2024-03-15T10:00:00Z"} for _ in range(count)
+    ]}).encode()
+
+def test_waypoint_counter_across_chunks():
+    body = _ride(5)
+    counter = _WaypointCounter(b'"lat"')
+    for i in range(0, len(body), 3):
+        counter.feed(body[i:i + 3])
+    assert counter.count == 5
+    assert _WaypointCounter(b'"lat"').feed(b'{"name": "say \\"lat\\"", "waypoints": []}') == 0
+
+def test_body_and_waypoint_limits():
+    client = TestClient(_app(max_body_size=2000, max_waypoints=10))
+    assert client.post("/api/rides/upload", content=_ride(10)).json() == {"size": len(_ride(10))}
+
+    too_many = client.post("/api/rides/upload", content=_ride(11))
+    assert too_many.status_code == 413
+    assert "waypoints" in too_many.json()["detail"]
+
+    too_big = client.post("/api/rides/upload", content=b" " * 2001)
+    assert too_big.status_code == 413
+
+    def streamed():
+        for _ in range(5):
+            yield b" " * 500
+    # No Content-Length: the limit is enforced while the body streams in
+    assert client.post("/api/rides/upload", content=streamed()).status_code == 413
+    # Other routes are not limited
+    assert client.get("/api/rides/").status_code == 200
+
+def test_rate_limit_sets_retry_after():
+    client = TestClient(_app(rate_per_client=0.5, burst_per_client=2))
+    assert [client.post("/api/rides/upload", content=b"{}").status_code for _ in range(2)] == [200, 200]
+    limited = client.post("/api/rides/upload", content=b"{}")
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+
+def _scope(client_host):
+    return {"type": "http", "method": "POST", "path": "/api/rides/upload", "headers": [],
+            "client": (client_host, 1234)}
+
+def test_concurrency_queue_and_shedding():
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionMiddleware(slow_app, max_concurrent_per_client=1, max_in_flight=2, max_queue=1)
+
+    async def request(client_host):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+        await middleware(_scope(client_host), receive, send)
+        start = messages[0]
+        return start["status"], dict(start["headers"])
+
+    async def scenario():
+        running = [asyncio.create_task(request(host)) for host in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        assert middleware.stats() == {"in_flight": 2, "queued": 1}
+        # Same client as a running upload
+        assert (await request("a"))[0] == 429
+        shed_status, shed_headers = await request("d")
+        assert shed_status == 503 and int(shed_headers[b"retry-after"]) >= 1
+        release.set()
+        results = await asyncio.gather(*running)
+        assert [status for status, _ in results] == [200, 200, 200]
+        assert middleware.stats() == {"in_flight": 0, "queued": 0}
+
+    asyncio.run(scenario())
+
+def test_queue_wait_timeout():
+    async def scenario():
+        hold = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await hold.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = AdmissionMiddleware(slow_app, max_in_flight=1, max_queue=5, max_queue_wait=0.05)
+        statuses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        first = asyncio.create_task(middleware(_scope("a"), receive, send))
+        await asyncio.sleep(0)
+        await middleware(_scope("b"), receive, send)
+        assert statuses == [503]
+        hold.set()
+        await first
+        assert statuses == [503, 200]
+        assert middleware.stats() == {"in_flight": 0, "queued": 0}
+
+    asyncio.run(scenario())
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("RIDE_MAX_BODY_MB", "1.5")
+    monkeypatch.setenv("RIDE_UPLOAD_RATE", "2")
+    assert settings_from_env() == {"max_body_size": 1572864, "rate_per_client": 2.0}
@@ -0,0 +1,142 @@
+import gzip
+import json
+import pytest
+from app.middleware import compression
+from app.middleware.compression import negotiate_encoding
+
+@pytest.fixture
+def long_ride():
+    waypoints = [
+        {
+            "lat": 37.774929 + i * 0.0001,
+            "lon": -122.419416,
+            "elevation_ft": 100.0 + i,
+            "timestamp": f"2024-03-15T10:{i // 60:02d}:{i % 60:02d}Z"
+        }
+        for i in range(120)
+    ]
+    return {
+        "name": "Long Ride",
+        "start_time": waypoints[0]["timestamp"],
+        "end_time": waypoints[-1]["timestamp"],
+        "number_waypoints": len(waypoints),
+        "waypoints": waypoints
+    }
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("zstd, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("") is None
+
+def test_negotiate_prefers_zstd_when_available():
+    pytest.importorskip("zstandard")
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("gzip, zstd;q=0.1") == "gzip"
+
+def test_gzip_upload(client, ride_service, long_ride):
+    body = gzip.compress(json.dumps(long_ride).encode())
+    response = client.post("/api/rides/upload", content=body,
+                           headers={"Content-Encoding": "gzip", "Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["ride"]["number_waypoints"] == 120
+
+def test_zstd_upload(client, ride_service, long_ride):
+    zstandard = pytest.importorskip("zstandard")
+    body = zstandard.ZstdCompressor().compress(json.dumps(long_ride).encode())
+    response = client.post("/api/rides/upload", content=body,
+                           headers={"Content-Encoding": "zstd", "Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["ride"]["name"] == "Long Ride"
+
+def test_corrupt_body_rejected(client, long_ride):
+    body = gzip.compress(json.dumps(long_ride).encode())[:-20]
+    response = client.post("/api/rides/upload", content=body, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+def test_unsupported_encoding_rejected(client, test_ride):
+    response = client.post("/api/rides/upload", content=json.dumps(test_ride).encode(),
+                           headers={"Content-Encoding": "br"})
+    assert response.status_code == 415
+
+def test_get_ride_response_compressed(client, ride_service, long_ride):
+    ride_id = client.post("/api/rides/upload", json=long_ride).json()["id"]
+
+    response = client.get(f"/api/rides/{ride_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()["name"] == "Long Ride"
+
+    list_response = client.get("/api/rides/", headers={"Accept-Encoding": "gzip"})
+    assert list_response.headers["content-encoding"] == "gzip"
+    assert list_response.json()[0]["id"] == ride_id
+
+def test_identity_when_not_accepted(client, ride_service, long_ride):
+    ride_id = client.post("/api/rides/upload", json=long_ride).json()["id"]
+    response = client.get(f"/api/rides/{ride_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json()["name"] == "Long Ride"
+
+def test_small_responses_not_compressed(client):
+    response = client.get("/api/rides/999", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 404
+    assert "content-encoding" not in response.headers
+
+def _bomb_app(max_size):
+    """A tiny app behind CompressionMiddleware that reports the body length it read"""
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+    from app.middleware import CompressionMiddleware
+
+    bomb_app = FastAPI()
+
+    @bomb_app.post("/echo")
+    async def echo(request: Request):
+        return {"length": len(await request.body())}
+
+    bomb_app.add_middleware(CompressionMiddleware, max_decompressed_size=max_size)
+    return TestClient(bomb_app)
+
+def test_gzip_bomb_rejected():
+    client = _bomb_app(max_size=1024 * 1024)
+    bomb = gzip.compress(b"\0" * (50 * 1024 * 1024))
+    assert len(bomb) < 100 * 1024
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+
+def test_zstd_bomb_rejected():
+    zstandard = pytest.importorskip("zstandard")
+    client = _bomb_app(max_size=1024 * 1024)
+    bomb = zstandard.ZstdCompressor().compress(b"\0" * (50 * 1024 * 1024))
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": "zstd"})
+    assert response.status_code == 413
+
+def test_body_at_limit_accepted():
+    client = _bomb_app(max_size=4096)
+    response = client.post("/echo", content=gzip.compress(b"x" * 4096), headers={"Content-Encoding": "gzip"})
+    assert response.json() == {"length": 4096}
+    response = client.post("/echo", content=gzip.compress(b"x" * 4097), headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+
+def test_concatenated_gzip_members_decoded():
+    client = _bomb_app(max_size=1024)
+    body = gzip.compress(b"a" * 10) + gzip.compress(b"b" * 20)
+    response = client.post("/echo", content=body, headers={"Content-Encoding": "gzip"})
+    assert response.json() == {"length": 30}
+
+def test_concatenated_zstd_frames_decoded():
+    zstandard = pytest.importorskip("zstandard")
+    client = _bomb_app(max_size=1024)
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(b"a" * 10) + compressor.compress(b"b" * 200)
+    response = client.post("/echo", content=body, headers={"Content-Encoding": "zstd"})
+    assert response.json() == {"length": 210}
+
+def test_trailing_garbage_rejected():
+    client = _bomb_app(max_size=1024)
+    response = client.post("/echo", content=gzip.compress(b"a" * 10) + b"garbage!",
+                           headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
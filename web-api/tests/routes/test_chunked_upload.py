@@ -0,0 +1,95 @@
+import json
+import pytest
+from app.services.chunked_upload import ChunkedUploadService
+
+def _waypoints(count):
+    return [
+        {"lat": 37.77 + i * 0.0005, "lon": -122.42 + i * 0.0002, "elevation_ft": 100.0 + (i % 5) * 2.0,
+         "timestamp": f"2024-03-15T10:{i // 60:02d}:{i % 60:02d}Z"}
+        for i in range(count)
+    ]
+
+def _header(waypoints, chunk_count):
+    return {"name": "Tour", "start_time": waypoints[0]["timestamp"], "end_time": waypoints[-1]["timestamp"],
+            "number_waypoints": len(waypoints), "chunk_count": chunk_count}
+
+@pytest.fixture(autouse=True)
+def sessions():
+    ChunkedUploadService.clear()
+    yield
+    ChunkedUploadService.clear()
+
+def test_chunked_upload_matches_single_upload(client, ride_service):
+    waypoints = _waypoints(25)
+    chunks = [waypoints[i:i + 10] for i in range(0, 25, 10)]
+    status = client.post("/api/rides/uploads", json=_header(waypoints, 3)).json()
+    session_id = status["session_id"]
+    assert status["missing_chunks"] == [0, 1, 2]
+
+    # Out of order, with a re-sent chunk
+    for index in (2, 0, 2, 1):
+        response = client.put(f"/api/rides/uploads/{session_id}/chunks/{index}", json=chunks[index])
+        assert response.status_code == 200
+    status = client.get(f"/api/rides/uploads/{session_id}").json()
+    assert status["missing_chunks"] == [] and status["received_waypoints"] == 25
+
+    committed = client.post(f"/api/rides/uploads/{session_id}/commit")
+    assert committed.status_code == 200
+    body = committed.json()
+    assert body["duplicate"] is False
+    assert body["ride"]["waypoints"] == waypoints
+
+    ride = {key: value for key, value in _header(waypoints, 3).items() if key != "chunk_count"}
+    single = client.post("/api/rides/upload", json={**ride, "waypoints": waypoints}).json()
+    assert (single["id"], single["duplicate"]) == (body["id"], True)
+    assert single["ride"]["summary"] == body["ride"]["summary"]
+
+    # A retried commit returns the stored ride
+    again = client.post(f"/api/rides/uploads/{session_id}/commit").json()
+    assert again["id"] == body["id"]
+    assert client.put(f"/api/rides/uploads/{session_id}/chunks/0", json=chunks[0]).status_code == 409
+
+def test_resume_after_lost_create(client, ride_service):
+    waypoints = _waypoints(4)
+    headers = {"Idempotency-Key": "tour-1"}
+    first = client.post("/api/rides/uploads", json=_header(waypoints, 2), headers=headers).json()
+    client.put(f"/api/rides/uploads/{first['session_id']}/chunks/0", json=waypoints[:2])
+    resumed = client.post("/api/rides/uploads", json=_header(waypoints, 2), headers=headers).json()
+    assert resumed["session_id"] == first["session_id"]
+    assert resumed["missing_chunks"] == [1]
+
+    conflict = client.post("/api/rides/uploads", json={**_header(waypoints, 2), "name": "Other"}, headers=headers)
+    assert conflict.status_code == 409
+
+def test_invalid_chunks_are_rejected(client, ride_service):
+    waypoints = _waypoints(6)
+    session_id = client.post("/api/rides/uploads", json=_header(waypoints, 2)).json()["session_id"]
+    url = f"/api/rides/uploads/{session_id}/chunks"
+
+    bad = client.put(f"{url}/0", json=[{**waypoints[0], "lat": "north"}])
+    assert bad.status_code == 422
+    assert bad.json()["detail"][0]["loc"] == ["body", 0, "lat"]
+    assert client.put(f"{url}/0", json=[{**waypoints[0], "lat": 95}]).status_code == 422
+    assert client.put(f"{url}/0", json=list(reversed(waypoints[:3]))).status_code == 422
+    assert client.put(f"{url}/0", json=[]).status_code == 422
+    assert client.put(f"{url}/2", json=waypoints[:3]).status_code == 422
+
+    assert client.put(f"{url}/1", json=waypoints[:3]).status_code == 200
+    # Chunk 0 may not end after chunk 1 starts
+    assert client.put(f"{url}/0", json=waypoints[3:]).status_code == 422
+    assert client.put(f"{url}/1", json=waypoints[3:]).status_code == 409
+    assert client.post(f"/api/rides/uploads/{session_id}/commit").status_code == 409
+
+    assert client.delete(f"/api/rides/uploads/{session_id}").status_code == 204
+    assert client.get(f"/api/rides/uploads/{session_id}").status_code == 404
+
+def test_header_validation_and_counts(client, ride_service):
+    waypoints = _waypoints(3)
+    bad_time = client.post("/api/rides/uploads", json={**_header(waypoints, 1), "end_time": "yesterday"})
+    assert bad_time.status_code == 422
+    assert bad_time.json()["detail"][0]["loc"] == ["body", "end_time"]
+
+    session_id = client.post("/api/rides/uploads",
+                             json={**_header(waypoints, 1), "number_waypoints": 2}).json()["session_id"]
+    response = client.put(f"/api/rides/uploads/{session_id}/chunks/0", content=json.dumps(waypoints))
+    assert response.status_code == 422
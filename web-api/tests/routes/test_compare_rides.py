@@ -0,0 +1,36 @@
+def _slower(test_ride):
+    """The same route as test_ride, taking twice as long"""
+    return {
+        **test_ride,
+        "name": "Slower Ride",
+        "end_time": "2024-03-15T10:10:00Z",
+        "waypoints": [test_ride["waypoints"][0], {**test_ride["waypoints"][1], "timestamp": "2024-03-15T10:10:00Z"}]
+    }
+
+def test_compare_rides(client, ride_service, test_ride):
+    a = client.post("/api/rides/upload", json=test_ride).json()["id"]
+    b = client.post("/api/rides/upload", json=_slower(test_ride)).json()["id"]
+
+    response = client.get("/api/rides/compare", params={"a": a, "b": b, "step_mi": 0.1})
+    assert response.status_code == 200
+    comparison = response.json()
+    assert (comparison["a"], comparison["b"]) == (a, b)
+    samples = len(comparison["distance_mi"])
+    assert samples > 2
+    assert all(len(comparison[column]) == samples for column in ("time_gap_s", "speed_delta_mph", "elevation_delta_ft"))
+    assert comparison["time_gap_s"][-1] == 300.0
+    assert comparison["speed_delta_mph"][0] < 0
+
+def test_compare_missing_ride(client, ride_service, created_ride):
+    response = client.get("/api/rides/compare", params={"a": created_ride, "b": 999})
+    assert response.status_code == 404
+
+def test_compare_invalid_step(client, ride_service, created_ride):
+    response = client.get("/api/rides/compare", params={"a": created_ride, "b": created_ride, "step_mi": 0})
+    assert response.status_code == 422
+
+def test_deleted_ride_profile_is_dropped(client, ride_service, test_ride):
+    a = client.post("/api/rides/upload", json=test_ride).json()["id"]
+    assert client.get("/api/rides/compare", params={"a": a, "b": a}).status_code == 200
+    assert ride_service.delete_ride(a) is None
+    assert client.get("/api/rides/compare", params={"a": a, "b": a}).status_code == 404
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+from app.models.waypoint import Waypoint
+from app.services.ride_exporter import RideExporter
+
+GPX_NS = {"gpx": "http://www.topografix.com/GPX/1/1"}
+
+def _upload(client, test_ride, name, start_time):
+    ride = {**test_ride, "name": name, "start_time": start_time}
+    return client.post("/api/rides/upload", json=ride).json()["id"]
+
+def test_export_ndjson(client, ride_service, test_ride):
+    first = _upload(client, test_ride, "First", "2024-03-15T10:00:00Z")
+    second = _upload(client, test_ride, "Second", "2024-03-15T10:01:00Z")
+
+    response = client.get("/api/rides/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="rides.ndjson"'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["id"], line["ride"]["name"]) for line in lines] == [(first, "First"), (second, "Second")]
+    assert lines[0]["ride"] == client.get(f"/api/rides/{first}").json()
+
+def test_export_selected_ids_and_time_range(client, ride_service, test_ride):
+    first = _upload(client, test_ride, "First", "2024-03-15T10:00:00Z")
+    second = _upload(client, test_ride, "Second", "2024-03-15T10:01:00Z")
+
+    response = client.get("/api/rides/export", params={"ids": [second, 999, first, second]})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [second, first]
+
+    response = client.get("/api/rides/export", params={"start": "2024-03-15T10:00:30Z"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [second]
+    response = client.get("/api/rides/export", params={"end": "2024-03-15T10:01:00Z"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [first]
+
+def test_export_csv(client, ride_service, test_ride):
+    ride_id = _upload(client, test_ride, "Comma, \"Quoted\"", "2024-03-15T10:00:00Z")
+    response = client.get("/api/rides/export", params={"format": "csv"})
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(RideExporter.CSV_COLUMNS)
+    assert len(rows) == 1 + len(test_ride["waypoints"])
+    first = test_ride["waypoints"][0]
+    assert rows[1] == [str(ride_id), "Comma, \"Quoted\"", first["timestamp"], str(first["lat"]), str(first["lon"]),
+                       str(first["elevation_ft"])]
+
+def test_export_gpx(client, ride_service, test_ride):
+    ride_id = _upload(client, test_ride, "Tom & Jerry <3", "2024-03-15T10:00:00Z")
+    response = client.get("/api/rides/export", params={"format": "gpx"})
+    assert response.headers["content-type"] == "application/gpx+xml"
+    root = ET.fromstring(response.content)
+    track = root.find("gpx:trk", GPX_NS)
+    assert track.find("gpx:name", GPX_NS).text == "Tom & Jerry <3"
+    assert track.find("gpx:number", GPX_NS).text == str(ride_id)
+    points = track.findall("gpx:trkseg/gpx:trkpt", GPX_NS)
+    assert len(points) == len(test_ride["waypoints"])
+    assert float(points[0].get("lat")) == test_ride["waypoints"][0]["lat"]
+    assert float(points[0].find("gpx:ele", GPX_NS).text) == round(test_ride["waypoints"][0]["elevation_ft"] / 3.28084, 2)
+
+def test_export_invalid_format(client, ride_service):
+    assert client.get("/api/rides/export", params={"format": "xlsx"}).status_code == 422
+
+def test_export_streams_in_bounded_chunks(test_ride):
+    waypoints = [Waypoint.model_construct(**w) for w in test_ride["waypoints"]] * 1500
+    ride = SimpleNamespace(name="Long", waypoints=waypoints)
+    chunks = list(RideExporter.csv_chunks([(1, ride), (2, ride)]))
+    # Header, then ceil(3000 / CHUNK_WAYPOINTS) chunks per ride
+    assert len(chunks) == 1 + 2 * 3
+    assert max(chunk.count(b"\n") for chunk in chunks) == RideExporter.CHUNK_WAYPOINTS
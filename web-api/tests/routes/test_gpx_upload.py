@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+import pytest
+from app.services.gpx_ingest import GpxIngestPool, convert_gpx_bytes
+
+pytest.importorskip("gpxpy")
+
+UTILS_GPX_DIR = Path(__file__).resolve().parents[3] / "utils-gpx"
+
+GPX_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+<trk>{name}<trkseg>
+<trkpt lat="37.774929" lon="-122.419416"><ele>30.48</ele><time>2024-03-15T10:00:00Z</time></trkpt>
+<trkpt lat="37.775929" lon="-122.429416"><ele>33.53</ele><time>2024-03-15T10:05:00Z</time></trkpt>
+</trkseg></trk>
+</gpx>"""
+
+@pytest.fixture(scope="module", autouse=True)
+def gpx_pool():
+    yield
+    GpxIngestPool.shutdown()
+
+def test_convert_matches_utils_gpx():
+    data = (UTILS_GPX_DIR / "ride-chill.gpx").read_bytes()
+    ride = convert_gpx_bytes(data)
+    with open(UTILS_GPX_DIR / "ride-chill.json") as f:
+        expected = json.load(f)
+    assert {key: ride[key] for key in ("name", "start_time", "end_time", "number_waypoints")} == \
+        {key: expected[key] for key in ("name", "start_time", "end_time", "number_waypoints")}
+    assert ride["waypoints"] == expected["waypoints"]
+
+def test_upload_gpx(client, ride_service):
+    gpx = GPX_TEMPLATE.format(name="<name>Bay Loop</name>").encode()
+    response = client.post("/api/rides/upload/gpx", content=gpx, headers={"Content-Type": "application/gpx+xml"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["duplicate"] is False
+    assert body["ride"]["name"] == "Bay Loop"
+    assert body["ride"]["number_waypoints"] == 2
+    assert body["ride"]["waypoints"][0]["elevation_ft"] == pytest.approx(100.0, abs=0.01)
+    assert body["ride"]["summary"]["total_distance_mi"] > 0
+    assert client.get(f"/api/rides/{body['id']}").json()["name"] == "Bay Loop"
+
+    again = client.post("/api/rides/upload/gpx", content=gpx).json()
+    assert (again["id"], again["duplicate"]) == (body["id"], True)
+
+def test_upload_gpx_name_override_and_default(client, ride_service):
+    gpx = GPX_TEMPLATE.format(name="").encode()
+    assert client.post("/api/rides/upload/gpx", content=gpx).json()["ride"]["name"] == "Untitled ride"
+    named = client.post("/api/rides/upload/gpx", params={"name": "Commute"}, content=gpx).json()
+    assert named["ride"]["name"] == "Commute"
+
+def test_upload_invalid_gpx(client, ride_service):
+    response = client.post("/api/rides/upload/gpx", content=b"<gpx><trk>")
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Invalid GPX file")
+
+    empty = '<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1"></gpx>'
+    assert client.post("/api/rides/upload/gpx", content=empty.encode()).status_code == 422
+
+def test_upload_gpx_without_gpxpy(client, ride_service, monkeypatch):
+    monkeypatch.setattr(GpxIngestPool, "available", staticmethod(lambda: False))
+    response = client.post("/api/rides/upload/gpx", content=GPX_TEMPLATE.format(name="").encode())
+    assert response.status_code == 415
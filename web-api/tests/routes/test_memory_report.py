@@ -0,0 +1,56 @@
+import tracemalloc
+import pytest
+from app.services.ride_service import RideService
+from app.storage import MemoryRideStore, TieredRideStore
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setenv("RIDE_ADMIN_TOKEN", "admin-secret")
+
+def test_memory_report_accounts_for_rides(client, ride_service, test_ride):
+    client.post("/api/rides/upload", json=test_ride)
+    client.post("/api/rides/upload", json={**test_ride, "name": "Second Ride"})
+
+    report = client.get("/api/admin/memory", headers=ADMIN).json()
+    assert report["store"] == "MemoryRideStore"
+    assert report["resident_rides"] == 2
+    assert report["tiers"] == {"hot": 2}
+    totals = report["totals"]
+    assert totals["waypoints_bytes"] > 0 and totals["metadata_bytes"] > 0 and totals["summary_bytes"] > 0
+    assert totals["total_bytes"] == sum(report["largest_rides"][i]["total_bytes"] for i in range(2))
+    ride = report["largest_rides"][0]
+    assert ride["total_bytes"] == ride["metadata_bytes"] + ride["waypoints_bytes"] + ride["summary_bytes"]
+
+def test_memory_report_tiers(client, tmp_path, test_ride):
+    RideService.use_store(TieredRideStore(0, spill_dir=str(tmp_path)))
+    try:
+        for n in range(3):
+            client.post("/api/rides/upload", json={**test_ride, "name": f"Ride {n}"})
+        report = client.get("/api/admin/memory", params={"rides": 1}, headers=ADMIN).json()
+        assert report["tiers"] == {"hot": 1, "cold": 2}
+        assert len(report["largest_rides"]) == 1
+    finally:
+        RideService.use_store(MemoryRideStore())
+
+def test_tracemalloc_snapshots_and_diff(client, ride_service, test_ride):
+    assert client.post("/api/admin/memory/snapshots", headers=ADMIN).status_code == 409
+    try:
+        assert client.post("/api/admin/memory/tracemalloc/start", headers=ADMIN).json()["tracing"] is True
+        first = client.post("/api/admin/memory/snapshots", headers=ADMIN).json()
+        retained = [bytearray(10000) for _ in range(100)]
+        second = client.post("/api/admin/memory/snapshots", params={"limit": 5}, headers=ADMIN).json()
+        assert len(second["top"]) <= 5
+
+        diff = client.get(f"/api/admin/memory/snapshots/{first['id']}/diff/{second['id']}", headers=ADMIN).json()
+        assert diff["size_diff_bytes"] >= 1_000_000
+        assert any("test_memory_report.py" in entry["location"][0] for entry in diff["top"])
+        assert client.get(f"/api/admin/memory/snapshots/{first['id']}/diff/999", headers=ADMIN).status_code == 404
+        del retained
+    finally:
+        client.post("/api/admin/memory/tracemalloc/stop", headers=ADMIN)
+    assert not tracemalloc.is_tracing()
+
+def test_memory_endpoints_require_admin(client):
+    assert client.get("/api/admin/memory").status_code == 401
@@ -0,0 +1,55 @@
+import marshal
+import pytest
+from app.services.request_profiler import RequestProfiler
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+@pytest.fixture(autouse=True)
+def profiler(monkeypatch):
+    monkeypatch.setenv("RIDE_ADMIN_TOKEN", "admin-secret")
+    RequestProfiler.configure(sample_rate=0, buffer_size=3)
+    yield RequestProfiler
+    RequestProfiler.configure(sample_rate=0, buffer_size=20)
+
+def test_requested_profile_captured(client, ride_service, test_ride):
+    response = client.post("/api/rides/upload", json=test_ride, headers={"X-Profile": "1", **ADMIN})
+    assert response.status_code == 200
+
+    profiles = client.get("/api/admin/profiles", headers=ADMIN).json()
+    assert len(profiles) == 1
+    assert profiles[0]["path"] == "/api/rides/upload"
+    assert profiles[0]["reason"] == "requested"
+
+    download = client.get(f"/api/admin/profiles/{profiles[0]['id']}", headers=ADMIN)
+    assert download.status_code == 200
+    stats = marshal.loads(download.content)
+    assert any(name == "calculate_summary" for _, _, name in stats)
+
+    speedscope = client.get(f"/api/admin/profiles/{profiles[0]['id']}",
+                            params={"format": "speedscope"}, headers=ADMIN).json()
+    profile = speedscope["profiles"][0]
+    assert len(profile["samples"]) == len(profile["weights"]) > 0
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert "calculate_summary" in names
+
+def test_no_profile_without_admin_token(client, ride_service, test_ride):
+    client.post("/api/rides/upload", json=test_ride, headers={"X-Profile": "1"})
+    client.post("/api/rides/upload", json=test_ride, headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    client.post("/api/rides/upload", json=test_ride)
+    assert RequestProfiler.list_profiles() == []
+
+def test_sampling_and_ring_buffer(client, ride_service, test_ride):
+    RequestProfiler.configure(sample_rate=1.0)
+    for _ in range(5):
+        client.post("/api/rides/upload", json=test_ride)
+    profiles = client.get("/api/admin/profiles", headers=ADMIN).json()
+    assert [p["reason"] for p in profiles] == ["sampled"] * 3
+    # Newest first; the two oldest were evicted
+    assert [p["id"] for p in profiles] == sorted((p["id"] for p in profiles), reverse=True)
+    oldest = profiles[-1]["id"]
+    assert client.get(f"/api/admin/profiles/{oldest - 1}", headers=ADMIN).status_code == 404
+
+def test_admin_endpoints_require_token(client, monkeypatch):
+    assert client.get("/api/admin/profiles").status_code == 401
+    monkeypatch.delenv("RIDE_ADMIN_TOKEN")
+    assert client.get("/api/admin/profiles", headers=ADMIN).status_code == 403
@@ -0,0 +1,44 @@
+import pytest
+from app.services.energy_model import EnergyModel
+from app.services.ride_hasher import RideHasher
+from app.services.ride_service import RideService
+from app.storage import MemoryRideStore, SqliteRideStore
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setenv("RIDE_ADMIN_TOKEN", "admin-secret")
+
+def test_upload_estimates_energy(client, ride_service, test_ride):
+    result = client.post("/api/rides/upload", json=test_ride).json()
+    summary = result["ride"]["summary"]
+    assert summary["energy_model"] == EnergyModel.VERSION
+    assert summary["energy_wh"] > 0
+    assert summary["battery_used_pct"] == pytest.approx(summary["energy_wh"] / EnergyModel.BATTERY_WH * 100, abs=0.02)
+
+    energy = client.get(f"/api/rides/{result['id']}/energy").json()
+    assert energy["energy_wh"] == summary["energy_wh"]
+    assert energy["battery_pct"][0] == 100.0
+    assert len(energy["battery_pct"]) == test_ride["number_waypoints"]
+    assert client.get("/api/rides/999/energy").status_code == 404
+
+@pytest.mark.parametrize("store_type", ["memory", "sqlite"])
+def test_reevaluate_energy(client, ride_service, test_ride, tmp_path, store_type):
+    store = MemoryRideStore() if store_type == "memory" else SqliteRideStore(str(tmp_path / "rides.db"))
+    RideService.use_store(store)
+    current_id = client.post("/api/rides/upload", json=test_ride).json()["id"]
+    # A ride stored before energy was estimated
+    legacy = RideService.get_ride(current_id).model_copy(update={"name": "Legacy Ride"})
+    legacy.summary = legacy.summary.model_copy(update={"energy_wh": None, "battery_used_pct": None, "energy_model": None})
+    legacy_id, _ = store.add(legacy, RideHasher.hash_ride(legacy), None)
+
+    assert client.post("/api/admin/energy/reevaluate").status_code == 401
+    report = client.post("/api/admin/energy/reevaluate", headers=ADMIN).json()
+    assert (report["evaluated"], report["skipped"]) == (1, 1)
+    summary = client.get(f"/api/rides/{legacy_id}").json()["summary"]
+    assert summary["energy_model"] == EnergyModel.VERSION
+    assert summary["energy_wh"] == RideService.get_ride(current_id).summary.energy_wh
+
+    report = client.post("/api/admin/energy/reevaluate", params={"force": True}, headers=ADMIN).json()
+    assert (report["evaluated"], report["skipped"]) == (2, 0)
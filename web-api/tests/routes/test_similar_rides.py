@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+from math import cos, pi, sin
+from app.storage import MemoryRideStore
+
+def _loop_ride(lat, lon, reverse=False):
+    start = datetime(2024, 3, 15, 10, 0, 0, tzinfo=timezone.utc)
+    points = [(lat + 0.02 * sin(2 * pi * i / 120), lon + 0.03 * cos(2 * pi * i / 120)) for i in range(121)]
+    if reverse:
+        points.reverse()
+    waypoints = [
+        {"lat": p_lat, "lon": p_lon, "elevation_ft": 100.0, "timestamp": (start + timedelta(seconds=10 * i)).isoformat()}
+        for i, (p_lat, p_lon) in enumerate(points)
+    ]
+    return {
+        "name": "Loop", "start_time": waypoints[0]["timestamp"], "end_time": waypoints[-1]["timestamp"],
+        "number_waypoints": len(waypoints), "waypoints": waypoints
+    }
+
+def _upload(client, ride):
+    response = client.post("/api/rides/upload", json=ride)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_similar_rides(client, ride_service):
+    first = _upload(client, _loop_ride(37.77, -122.42))
+    reverse = _upload(client, _loop_ride(37.77, -122.42, reverse=True))
+    other = _upload(client, _loop_ride(37.90, -122.20))
+
+    response = client.get(f"/api/rides/{first}/similar")
+    assert response.status_code == 200
+    assert response.json() == [{"id": reverse, "similarity": 1.0}]
+    assert client.get(f"/api/rides/{other}/similar").json() == []
+    assert client.get("/api/rides/routes").json() == [[first, reverse]]
+
+    ride_service.delete_ride(reverse)
+    assert client.get(f"/api/rides/{first}/similar").json() == []
+
+def test_similar_rides_rebuilt_with_store(client, ride_service):
+    _upload(client, _loop_ride(37.77, -122.42))
+    _upload(client, _loop_ride(37.77, -122.42, reverse=True))
+    ride_service.use_store(MemoryRideStore())
+    assert client.get("/api/rides/routes").json() == []
+
+def test_similar_rides_unknown_ride(client, ride_service):
+    assert client.get("/api/rides/999/similar").status_code == 404
+    assert client.get("/api/rides/999/similar", params={"limit": 0}).status_code == 422
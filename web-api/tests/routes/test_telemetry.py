@@ -0,0 +1,32 @@
+import json
+from app.services.telemetry_hub import TelemetryHub
+
+def _telemetry(n):
+    return {"timestamp": f"2024-03-15T10:00:{n:02d}Z", "lat": 44.5, "lon": -103.9, "elevation_ft": 3600.0,
+            "avg_speed_mph": 12.0, "battery_percentage": 99.0 - n, "distance_miles": n * 0.01}
+
+def test_publish_fans_out_to_subscribers(client):
+    # One event loop for every connection, as in a server worker
+    with client:
+        with client.websocket_connect("/api/telemetry/ride-1/publish") as publisher:
+            with client.websocket_connect("/api/telemetry/ride-1") as first, \
+                    client.websocket_connect("/api/telemetry/ride-1") as second:
+                assert client.get("/api/telemetry/").json()["ride-1"]["subscribers"] == 2
+                for n in range(3):
+                    publisher.send_text(json.dumps(_telemetry(n)))
+                for viewer in (first, second):
+                    messages = [viewer.receive_json() for _ in range(3)]
+                    assert [m["seq"] for m in messages] == [1, 2, 3]
+                    assert messages[2]["data"]["battery_percentage"] == 97.0
+
+                publisher.send_text(json.dumps({"lat": "north"}))
+                error = publisher.receive_json()
+                assert error["type"] == "error"
+                assert {tuple(e["loc"]) for e in error["detail"]} >= {("lat",), ("timestamp",)}
+
+            # A late viewer starts at the latest update
+            with client.websocket_connect("/api/telemetry/ride-1") as late:
+                assert late.receive_json()["seq"] == 3
+                publisher.close()
+                assert late.receive_json() == {"type": "end"}
+        assert "ride-1" not in TelemetryHub.sessions()
@@ -0,0 +1,40 @@
+import struct
+from app.services.heatmap_tiles import HeatmapTiles
+from app.storage import MemoryRideStore
+
+def _tile_path(lat, lon, zoom):
+    x, y = HeatmapTiles.project(lat, lon, zoom)
+    return f"/api/tiles/{zoom}/{int(x) // HeatmapTiles.TILE_BINS}/{int(y) // HeatmapTiles.TILE_BINS}"
+
+def _count_sum(response):
+    return sum(struct.unpack(f"<{len(response.content) // 4}I", response.content))
+
+def test_tiles_follow_uploads_and_deletes(client, ride_service, test_ride):
+    path = _tile_path(37.774929, -122.419416, 10)
+    empty = client.get(path, params={"format": "counts"})
+    assert empty.status_code == 200 and _count_sum(empty) == 0
+
+    ride_id = client.post("/api/rides/upload", json=test_ride).json()["id"]
+    counts = client.get(path, params={"format": "counts"})
+    assert _count_sum(counts) > 0
+    assert counts.headers["cache-control"] == "public, max-age=60"
+
+    png = client.get(path)
+    assert png.headers["content-type"] == "image/png"
+    assert png.content.startswith(b"\x89PNG")
+    cached = client.get(path, headers={"If-None-Match": png.headers["etag"]})
+    assert cached.status_code == 304
+
+    ride_service.delete_ride(ride_id)
+    after = client.get(path, headers={"If-None-Match": png.headers["etag"]})
+    assert after.status_code == 200 and after.headers["etag"] != png.headers["etag"]
+    assert _count_sum(client.get(path, params={"format": "counts"})) == 0
+
+def test_tiles_rebuilt_when_store_changes(client, ride_service, test_ride):
+    client.post("/api/rides/upload", json=test_ride)
+    ride_service.use_store(MemoryRideStore())
+    assert _count_sum(client.get(_tile_path(37.774929, -122.419416, 5), params={"format": "counts"})) == 0
+
+def test_invalid_tiles(client):
+    assert client.get("/api/tiles/2/4/0").status_code == 404
+    assert client.get(f"/api/tiles/{HeatmapTiles.MAX_ZOOM + 1}/0/0").status_code == 422
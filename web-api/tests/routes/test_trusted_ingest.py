@@ -0,0 +1,65 @@
+import pytest
+
+INGEST_TOKEN = "test-ingest-token"
+
+@pytest.fixture
+def ingest_headers(monkeypatch):
+    monkeypatch.setenv("RIDE_INGEST_TOKEN", INGEST_TOKEN)
+    return {"X-Ingest-Token": INGEST_TOKEN}
+
+def _upload_error(client, ride):
+    """Return the error detail produced by the regular upload endpoint"""
+    response = client.post("/api/rides/upload", json=ride)
+    assert response.status_code == 422
+    return response.json()["detail"]
+
+def test_ingest_disabled_without_token(client, test_ride, monkeypatch):
+    monkeypatch.delenv("RIDE_INGEST_TOKEN", raising=False)
+    response = client.post("/api/rides/ingest", json=test_ride)
+    assert response.status_code == 403
+
+def test_ingest_rejects_wrong_token(client, test_ride, ingest_headers):
+    response = client.post("/api/rides/ingest", json=test_ride, headers={"X-Ingest-Token": "nope"})
+    assert response.status_code == 401
+
+def test_ingest_ride(client, ride_service, test_ride, ingest_headers):
+    response = client.post("/api/rides/ingest", json=test_ride, headers=ingest_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["ride"]["name"] == test_ride["name"]
+    assert len(result["ride"]["waypoints"]) == 2
+
+    # Trusted ingest must produce the same summary as a regular upload
+    regular = client.post("/api/rides/upload", json=test_ride).json()
+    assert result["ride"]["summary"] == regular["ride"]["summary"]
+
+    response = client.get(f"/api/rides/{result['id']}")
+    assert response.status_code == 200
+    assert response.json()["waypoints"] == regular["ride"]["waypoints"]
+
+@pytest.mark.parametrize("mutate", [
+    lambda r: r["waypoints"][1].update(lat=91.0),
+    lambda r: r["waypoints"][0].update(lon=-200.0),
+    lambda r: r["waypoints"][1].update(timestamp="2024-03-15T09:00:00Z"),
+    lambda r: r["waypoints"][1].update(timestamp="2024-13-45T25:00:00Z"),
+    lambda r: r.update(number_waypoints=3),
+    lambda r: r.update(end_time="2024-03-15T09:00:00Z"),
+    lambda r: r.update(start_time="not a time"),
+    lambda r: r["waypoints"][0].pop("lat"),
+    lambda r: r["waypoints"][1].update(elevation_ft="high"),
+    lambda r: r["waypoints"][1].update(lon=None),
+    lambda r: r.pop("end_time"),
+    lambda r: r.update(name=5),
+    lambda r: r.update(number_waypoints=-1),
+    lambda r: r.update(waypoints=5),
+])
+def test_ingest_rejects_like_upload(client, ride_service, test_ride, ingest_headers, mutate):
+    """Invalid data gets a 422 with exactly the same detail as the regular upload"""
+    mutate(test_ride)
+    response = client.post("/api/rides/ingest", json=test_ride, headers=ingest_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"] == _upload_error(client, test_ride)
+
+def test_ingest_rejects_invalid_json(client, ingest_headers):
+    response = client.post("/api/rides/ingest", content=b"{not json", headers=ingest_headers)
+    assert response.status_code == 422
@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+from app.services.ride_summary_calculator import RideSummaryCalculator
+
+def test_resent_ride_is_duplicate(client, ride_service, test_ride, monkeypatch):
+    first = client.post("/api/rides/upload", json=test_ride).json()
+    assert first["duplicate"] is False
+
+    # A duplicate must not recompute the summary
+    def fail(*args, **kwargs):
+        raise AssertionError("summary recalculated for a duplicate upload")
+    monkeypatch.setattr(RideSummaryCalculator, "calculate_summary", fail)
+
+    response = client.post("/api/rides/upload", json=test_ride)
+    assert response.status_code == 200
+    second = response.json()
+    assert second["duplicate"] is True
+    assert second["id"] == first["id"]
+    assert len(client.get("/api/rides/").json()) == 1
+
+def test_idempotency_key_returns_original_ride(client, ride_service, test_ride):
+    headers = {"Idempotency-Key": "upload-123"}
+    first = client.post("/api/rides/upload", json=test_ride, headers=headers).json()
+
+    # A retry with the same key and body is answered from the key
+    second = client.post("/api/rides/upload", json=test_ride, headers=headers).json()
+    assert second["duplicate"] is True
+    assert second["id"] == first["id"]
+
+def test_idempotency_key_reused_for_different_ride(client, ride_service, test_ride):
+    headers = {"Idempotency-Key": "upload-123"}
+    client.post("/api/rides/upload", json=test_ride, headers=headers)
+
+    # Reusing a key for a different body is a client bug, not a retry
+    different = {**test_ride, "name": "Another Ride"}
+    response = client.post("/api/rides/upload", json=different, headers=headers)
+    assert response.status_code == 409
+    assert len(client.get("/api/rides/").json()) == 1
+
+def test_key_linked_to_existing_ride(client, ride_service, test_ride):
+    first = client.post("/api/rides/upload", json=test_ride).json()
+    headers = {"Idempotency-Key": "late-key"}
+    assert client.post("/api/rides/upload", json=test_ride, headers=headers).json()["id"] == first["id"]
+
+    different = {**test_ride, "name": "Another Ride"}
+    assert client.post("/api/rides/upload", json=different, headers=headers).status_code == 409
+
+def test_updated_ride_is_reindexed(client, ride_service, test_ride):
+    first = client.post("/api/rides/upload", json=test_ride).json()
+    ride_service.update_ride(first["id"], "Edited Ride", test_ride["start_time"], test_ride["end_time"])
+
+    # The original payload no longer matches the edited ride
+    original = client.post("/api/rides/upload", json=test_ride).json()
+    assert original["duplicate"] is False
+    assert original["id"] != first["id"]
+
+    # The edited content does
+    edited = client.post("/api/rides/upload", json={**test_ride, "name": "Edited Ride"}).json()
+    assert edited["duplicate"] is True
+    assert edited["id"] == first["id"]
+
+def test_update_to_existing_content_conflicts(client, ride_service, test_ride):
+    first = client.post("/api/rides/upload", json=test_ride).json()
+    second = client.post("/api/rides/upload", json={**test_ride, "name": "Second Ride"}).json()
+    with pytest.raises(HTTPException) as exc_info:
+        ride_service.update_ride(second["id"], test_ride["name"], test_ride["start_time"], test_ride["end_time"])
+    assert exc_info.value.status_code == 409
+    assert ride_service.get_ride(second["id"]).name == "Second Ride"
+
+def test_upload_documents_ride_body(client):
+    body = client.get("/openapi.json").json()["paths"]["/api/rides/upload"]["post"]["requestBody"]
+    schema = body["content"]["application/json"]["schema"]
+    assert body["required"] is True
+    assert set(schema["required"]) == {"name", "start_time", "end_time", "number_waypoints"}
+    assert schema["properties"]["waypoints"]["items"] == {"$ref": "#/components/schemas/Waypoint"}
+
+def test_trusted_ingest_deduplicates_against_upload(client, ride_service, test_ride, monkeypatch):
+    monkeypatch.setenv("RIDE_INGEST_TOKEN", "token")
+    first = client.post("/api/rides/upload", json=test_ride).json()
+    second = client.post("/api/rides/ingest", json=test_ride, headers={"X-Ingest-Token": "token"}).json()
+    assert second["duplicate"] is True
+    assert second["id"] == first["id"]
+
+def test_deleted_ride_can_be_uploaded_again(client, ride_service, test_ride):
+    headers = {"Idempotency-Key": "upload-456"}
+    first = client.post("/api/rides/upload", json=test_ride, headers=headers).json()
+    ride_service.delete_ride(first["id"])
+
+    second = client.post("/api/rides/upload", json=test_ride, headers=headers).json()
+    assert second["duplicate"] is False
+    assert second["id"] != first["id"]
+
+def test_invalid_ride_still_rejected(client, ride_service, test_ride):
+    test_ride["number_waypoints"] = 3
+    response = client.post("/api/rides/upload", json=test_ride)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.routes import web
+
+def test_pages_render(client, ride_service, created_ride, tmp_path, monkeypatch):
+    monkeypatch.setenv(web.TEMPLATE_CACHE_ENV, str(tmp_path))
+    web.get_templates.cache_clear()
+    try:
+        assert sorted(web.precompile_templates()) == ["index.html", "ride_details.html"]
+        assert any(tmp_path.iterdir())
+
+        index = client.get("/")
+        assert index.status_code == 200
+        assert "Test Ride" in index.text
+        details = client.get(f"/rides/{created_ride}")
+        assert details.status_code == 200
+        assert "Test Ride" in details.text
+    finally:
+        web.get_templates.cache_clear()
+
+def test_api_only_app_has_no_pages(ride_service):
+    client = TestClient(create_app(web_pages=False))
+    assert client.get("/api/rides/").status_code == 200
+    assert client.get("/").status_code == 404
+
+def test_api_only_startup_skips_template_stack():
+    code = "import sys, app.main; print('jinja2' in sys.modules, 'gpxpy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={**os.environ, "RIDE_API_ONLY": "1"}, cwd=Path(__file__).resolve().parents[2])
+    assert result.stdout.split() == ["False", "False"]
@@ -0,0 +1,45 @@
+import pytest
+from app.services.energy_model import METERS_PER_MILE, EnergyModel
+
+MILE = 1.0
+
+def _segment_wh(distance_mi=MILE, seconds=360.0, climb_ft=0.0):
+    return EnergyModel.segment_energy_wh([distance_mi], [0.0, seconds], [0.0, climb_ft])[0]
+
+def test_flat_segment_costs_rolling_and_drag():
+    speed = METERS_PER_MILE / 360.0
+    force = EnergyModel.MASS_KG * 9.80665 * EnergyModel.ROLLING_RESISTANCE \
+        + 0.5 * EnergyModel.AIR_DENSITY_KG_M3 * EnergyModel.DRAG_AREA_M2 * speed ** 2
+    expected = force * METERS_PER_MILE / 3600 / EnergyModel.EFFICIENCY
+    assert _segment_wh() == pytest.approx(expected)
+
+def test_speed_and_grade_change_the_cost():
+    flat = _segment_wh()
+    assert _segment_wh(seconds=180.0) > flat
+    assert _segment_wh(climb_ft=100.0) > flat
+    # Descents are not regenerated
+    assert _segment_wh(climb_ft=-1000.0) == 0.0
+
+def test_grade_is_clamped_and_ignored_on_short_segments():
+    assert _segment_wh(climb_ft=5000.0) == _segment_wh(climb_ft=10000.0)
+    short = 3 / METERS_PER_MILE
+    assert _segment_wh(short, 1.0, 30.0) == _segment_wh(short, 1.0, 0.0)
+
+def test_stationary_segment_costs_nothing():
+    assert EnergyModel.segment_energy_wh([0.0], [0.0, 0.0], [100.0, 100.0]) == [0.0]
+
+def test_estimate_and_battery_profile():
+    distances = [MILE, MILE, MILE]
+    epochs = [0.0, 360.0, 720.0, 1080.0]
+    elevations = [0.0, 200.0, 200.0, 0.0]
+    segments = EnergyModel.segment_energy_wh(distances, epochs, elevations)
+    energy_wh, used = EnergyModel.estimate(distances, epochs, elevations)
+    assert energy_wh == pytest.approx(sum(segments))
+    assert used == pytest.approx(energy_wh / EnergyModel.BATTERY_WH * 100)
+
+    profile = EnergyModel.battery_profile(segments)
+    assert len(profile) == len(epochs)
+    assert profile[0] == 100.0
+    assert profile == sorted(profile, reverse=True)
+    assert profile[-1] == pytest.approx(100 - used)
+    assert EnergyModel.battery_profile([EnergyModel.BATTERY_WH * 2])[-1] == 0.0
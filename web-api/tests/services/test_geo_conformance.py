@@ -0,0 +1,73 @@
+"""
+Conformance of the shared geo kernel and of both projects that use it.
+
+The web-api (RideSummaryCalculator) and utils-gpx must report the same
+distances, so both are checked against the same reference cases.
+"""
+import importlib.util
+from pathlib import Path
+import pytest
+from app import geo
+from app.models.waypoint import Waypoint
+from app.services.ride_summary_calculator import RideSummaryCalculator
+
+UTILS_GPX = Path(__file__).resolve().parents[3] / 'utils-gpx' / 'utils.py'
+
+# (lat1, lon1, lat2, lon2, WGS-84 geodesic miles from GeographicLib)
+REFERENCE_CASES = [
+    # Vincenty's Flinders Peak to Buninyong test line: 54972.271 m
+    (-37.95103341666667, 144.42486788888888, -37.65282113888889, 143.92649552777778, 54972.271 / 1609.344),
+    # One-second samples a few feet apart
+    (44.50000, -103.90000, 44.50001, -103.90001, 0.000849099828),
+    (37.774929, -122.419416, 37.775929, -122.429416, 0.551753026564),
+    # Same point
+    (10.0, 20.0, 10.0, 20.0, 0.0),
+]
+
+@pytest.fixture(scope="module")
+def gpx_utils():
+    if not UTILS_GPX.exists():
+        pytest.skip("utils-gpx is not checked out next to web-api")
+    spec = importlib.util.spec_from_file_location("gpx_utils", UTILS_GPX)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.mark.parametrize("lat1,lon1,lat2,lon2,expected", REFERENCE_CASES)
+def test_models_within_documented_bounds(lat1, lon1, lat2, lon2, expected):
+    assert geo.distance(lat1, lon1, lat2, lon2, geo.VINCENTY) == pytest.approx(expected, rel=1e-6, abs=1e-6)
+    for model in (geo.HAVERSINE, geo.AUTO):
+        assert geo.distance(lat1, lon1, lat2, lon2, model) == pytest.approx(expected, rel=0.006, abs=1e-6)
+    haversine = geo.distance(lat1, lon1, lat2, lon2, geo.HAVERSINE)
+    if expected < 1:
+        assert geo.distance(lat1, lon1, lat2, lon2, geo.EQUIRECTANGULAR) == pytest.approx(haversine, rel=1e-7)
+        assert geo.distance(lat1, lon1, lat2, lon2, geo.AUTO) == pytest.approx(haversine, rel=1e-7)
+    else:
+        # Long segments are measured with haversine in auto mode
+        assert geo.distance(lat1, lon1, lat2, lon2, geo.AUTO) == haversine
+
+@pytest.mark.parametrize("lat1,lon1,lat2,lon2,expected", REFERENCE_CASES)
+@pytest.mark.parametrize("model", geo.MODELS)
+def test_projects_agree(gpx_utils, lat1, lon1, lat2, lon2, expected, model):
+    kernel = geo.distance(lat1, lon1, lat2, lon2, model)
+    assert RideSummaryCalculator.calculate_distance(lat1, lon1, lat2, lon2, model) == kernel
+    assert gpx_utils.calculate_distance(lat1, lon1, lat2, lon2, model) == kernel
+
+def test_default_models_agree(gpx_utils, test_waypoints):
+    waypoints = [Waypoint(**w) for w in test_waypoints]
+    summary = RideSummaryCalculator.calculate_summary(waypoints)
+    first, second = test_waypoints
+    converted = gpx_utils.calculate_distance(first["lat"], first["lon"], second["lat"], second["lon"])
+    assert summary.total_distance_mi == round(converted, 2)
+
+def test_batch_matches_pairwise():
+    lats = [44.5 + i * 0.00001 for i in range(50)] + [45.5]
+    lons = [-103.9 + (i % 7) * 0.00002 for i in range(50)] + [-103.0]
+    for model in geo.MODELS:
+        batch = geo.segment_distances(lats, lons, model)
+        pairwise = [geo.distance(lats[i], lons[i], lats[i + 1], lons[i + 1], model) for i in range(len(lats) - 1)]
+        assert batch == pytest.approx(pairwise, rel=1e-12)
+
+def test_unknown_model_rejected():
+    with pytest.raises(ValueError):
+        geo.distance(0, 0, 1, 1, "flat")
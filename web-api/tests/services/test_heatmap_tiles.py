@@ -0,0 +1,65 @@
+import struct
+import zlib
+from types import SimpleNamespace
+from app.models.waypoint import Waypoint
+from app.services.heatmap_tiles import HeatmapTiles
+
+def _ride(points):
+    return SimpleNamespace(waypoints=[
+        Waypoint.model_construct(lat=lat, lon=lon, elevation_ft=0.0, timestamp="2024-03-15T10:00:00Z")
+        for lat, lon in points
+    ])
+
+def _tile_of(lat, lon, zoom):
+    x, y = HeatmapTiles.project(lat, lon, zoom)
+    return int(x) // HeatmapTiles.TILE_BINS, int(y) // HeatmapTiles.TILE_BINS
+
+def _total(z, x, y):
+    data, _ = HeatmapTiles.counts(z, x, y)
+    return 0 if data is None else sum(struct.unpack(f"<{len(data) // 4}I", data))
+
+def test_project_known_tiles():
+    assert _tile_of(0.0, 0.0, 1) == (1, 1)
+    # San Francisco at zoom 12
+    assert _tile_of(37.7749, -122.4194, 12) == (655, 1583)
+
+def test_tracks_are_rasterized_without_gaps():
+    # Two points ~10 bins apart at MAX_ZOOM along a parallel
+    x0, y0 = HeatmapTiles.project(37.7749, -122.4194, HeatmapTiles.MAX_ZOOM)
+    bins = HeatmapTiles.track_bins(_ride([(37.7749, -122.4194), (37.7749, -122.4194 + 10 * 360 / (4096 * 64))]))
+    assert {bx for bx, _ in bins} == set(range(int(x0), int(x0) + 11))
+    assert {by for _, by in bins} == {int(y0)}
+
+def test_add_and_remove_update_every_zoom():
+    HeatmapTiles.clear()
+    ride = _ride([(37.7749 + i * 0.001, -122.4194) for i in range(20)])
+    other = _ride([(37.7749, -122.4194), (37.7750, -122.4194)])
+    HeatmapTiles.add_ride(ride)
+    HeatmapTiles.add_ride(other)
+    x, y = _tile_of(37.7749, -122.4194, 0)
+    top_bins = HeatmapTiles.counts(0, x, y)[0]
+    # Both rides share one bin at zoom 0, counted once per ride
+    assert max(struct.unpack(f"<{len(top_bins) // 4}I", top_bins)) == 2
+    for zoom in range(HeatmapTiles.MIN_ZOOM, HeatmapTiles.MAX_ZOOM + 1):
+        assert _total(zoom, *_tile_of(37.7749, -122.4194, zoom)) > 0
+
+    _, before = HeatmapTiles.counts(0, x, y)
+    HeatmapTiles.remove_ride(other)
+    assert HeatmapTiles.counts(0, x, y)[1] != before
+    HeatmapTiles.remove_ride(ride)
+    assert HeatmapTiles.counts(0, x, y) == (None, "empty")
+    assert HeatmapTiles._tiles == {}
+
+def test_render_png():
+    HeatmapTiles.clear()
+    HeatmapTiles.add_ride(_ride([(37.7749, -122.4194), (37.78, -122.41)]))
+    png, digest = HeatmapTiles.render_png(0, 0, 0)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (HeatmapTiles.TILE_SIZE, HeatmapTiles.TILE_SIZE)
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + idat_length])
+    assert len(raw) == height * (1 + width * 4)
+    assert any(raw[i] for i in range(4, len(raw), 4))  # some opaque pixels
+    assert HeatmapTiles.render_png(0, 0, 0) == (png, digest)
+    HeatmapTiles.clear()
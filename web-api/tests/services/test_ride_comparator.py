@@ -0,0 +1,72 @@
+import pytest
+from fastapi import HTTPException
+from app.models.ride import Ride
+from app.models.ride_with_summary import RideWithSummary
+from app.services.ride_comparator import RideComparator
+from app.services.ride_summary_calculator import RideSummaryCalculator
+
+def _ride(seconds_per_point, elevation_step=0.0, points=11):
+    """A ride heading due north, 0.01 degrees of latitude per waypoint"""
+    waypoints = [
+        {"lat": 40.0 + i * 0.01, "lon": -105.0, "elevation_ft": 100.0 + i * elevation_step,
+         "timestamp": f"2024-03-15T10:{i * seconds_per_point // 60:02d}:{i * seconds_per_point % 60:02d}Z"}
+        for i in range(points)
+    ]
+    ride = Ride(name="Ride", start_time=waypoints[0]["timestamp"], end_time=waypoints[-1]["timestamp"],
+                number_waypoints=points, waypoints=waypoints)
+    return RideWithSummary(**ride.model_dump(), summary=RideSummaryCalculator.calculate_summary(ride.waypoints))
+
+def test_profile_is_cumulative():
+    profile = RideComparator.build_profile(_ride(60))
+    segment = RideSummaryCalculator.calculate_distance(40.0, -105.0, 40.01, -105.0)
+    assert profile.distances[0] == 0.0
+    assert profile.distances[-1] == pytest.approx(10 * segment)
+    assert list(profile.seconds) == [i * 60.0 for i in range(11)]
+
+def test_half_speed_ride_falls_behind():
+    fast, slow = _ride(60), _ride(120, elevation_step=10.0)
+    a, b = RideComparator.build_profile(fast), RideComparator.build_profile(slow)
+    comparison = RideComparator.compare(1, a, 2, b, step_mi=0.25)
+
+    assert comparison.distance_mi[0] == 0.0
+    assert comparison.distance_mi[-1] == pytest.approx(a.distances[-1])
+    # B takes twice as long everywhere, so its gap equals A's elapsed time
+    for ta, gap in zip(comparison.time_a_s, comparison.time_gap_s):
+        assert gap == pytest.approx(ta)
+    for va, delta in zip(comparison.speed_a_mph, comparison.speed_delta_mph):
+        assert delta == pytest.approx(-va / 2)
+    assert comparison.elevation_delta_ft[-1] == pytest.approx(100.0)
+    assert comparison.elevation_delta_ft[0] == 0.0
+
+def test_axis_stops_at_shorter_ride():
+    a = RideComparator.build_profile(_ride(60, points=11))
+    b = RideComparator.build_profile(_ride(60, points=5))
+    comparison = RideComparator.compare(1, a, 2, b, step_mi=0.1)
+    assert comparison.distance_mi[-1] == pytest.approx(b.distances[-1])
+    assert all(gap == pytest.approx(0.0) for gap in comparison.time_gap_s)
+
+def test_zero_length_segments_interpolate():
+    ride = _ride(60, points=3)
+    # A stop: the second waypoint repeats the first position a minute later
+    ride.waypoints[1].lat = ride.waypoints[0].lat
+    profile = RideComparator.build_profile(ride)
+    resampled = RideComparator.resample(profile, [0.0, profile.distances[-1] / 2, profile.distances[-1]])
+    assert resampled["seconds"] == pytest.approx([0.0, 90.0, 120.0])
+
+def test_rejects_stationary_rides_and_tiny_steps():
+    moving = RideComparator.build_profile(_ride(60))
+    stationary = RideComparator.build_profile(_ride(60, points=1))
+    with pytest.raises(HTTPException) as exc_info:
+        RideComparator.compare(1, moving, 2, stationary, step_mi=0.1)
+    assert exc_info.value.status_code == 422
+    with pytest.raises(HTTPException) as exc_info:
+        RideComparator.compare(1, moving, 2, moving, step_mi=0.00001)
+    assert exc_info.value.status_code == 422
+
+def test_profiles_are_cached_until_invalidated():
+    ride = _ride(60)
+    first = RideComparator.profile(12345, ride)
+    assert RideComparator.profile(12345, ride) is first
+    RideComparator.invalidate(12345)
+    assert RideComparator.profile(12345, ride) is not first
+    RideComparator.invalidate(12345)
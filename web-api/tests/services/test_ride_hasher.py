@@ -0,0 +1,27 @@
+from app.models.ride import Ride
+from app.services.ride_hasher import RideHasher
+
+def test_payload_and_model_hashes_match(test_ride):
+    """Test that raw JSON and the validated model hash identically"""
+    assert RideHasher.hash_payload(test_ride) == RideHasher.hash_ride(Ride(**test_ride))
+
+def test_integer_coordinates_hash_like_floats(test_ride):
+    """Test that 100 and 100.0 are the same content"""
+    original = RideHasher.hash_payload(test_ride)
+    test_ride["waypoints"][0]["elevation_ft"] = 100
+    assert RideHasher.hash_payload(test_ride) == original
+
+def test_content_changes_change_hash(test_ride):
+    """Test that waypoint and header changes produce a different hash"""
+    original = RideHasher.hash_payload(test_ride)
+    moved = {**test_ride, "waypoints": [dict(w) for w in test_ride["waypoints"]]}
+    moved["waypoints"][1]["lat"] += 0.000001
+    renamed = {**test_ride, "name": "Another Ride"}
+    assert RideHasher.hash_payload(moved) != original
+    assert RideHasher.hash_payload(renamed) != original
+
+def test_malformed_payload_has_no_hash():
+    """Test that unhashable payloads are left for validation to reject"""
+    assert RideHasher.hash_payload({"name": "No waypoints"}) is None
+    assert RideHasher.hash_payload({"waypoints": [{"lat": "north"}]}) is None
+    assert RideHasher.hash_payload([]) is None
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from app.models.ride import Ride
+from app.services.ride_ingest_validator import RideIngestValidator
+
+def test_valid_ride_is_constructed(test_ride):
+    """Test that a valid payload produces a Ride without per-field validation"""
+    ride, epochs = RideIngestValidator.validate_columns(test_ride)
+    assert isinstance(ride, Ride)
+    assert epochs[1] - epochs[0] == 300
+    assert ride.name == test_ride["name"]
+    assert len(ride.waypoints) == 2
+    assert ride.waypoints[1].lat == 37.775929
+    assert ride.waypoints[1].timestamp == "2024-03-15T10:05:00Z"
+
+def test_integer_coordinates_are_coerced(test_ride):
+    """Test that integer coordinates are accepted like the pydantic models do"""
+    test_ride["waypoints"][0]["elevation_ft"] = 100
+    ride, _ = RideIngestValidator.validate_columns(test_ride)
+    assert isinstance(ride.waypoints[0].elevation_ft, float)
+
+@pytest.mark.parametrize("mutate, message", [
+    (lambda r: r["waypoints"][1].update(lat=91.0), "Invalid latitude: 91.0. Must be between -90 and 90 degrees."),
+    (lambda r: r["waypoints"][0].update(lon=-200.0), "Invalid longitude: -200.0. Must be between -180 and 180 degrees."),
+    (lambda r: r["waypoints"][1].update(timestamp="2024-03-15T09:00:00Z"), "Waypoints must be in chronological order"),
+])
+def test_summary_errors_rejected(test_ride, mutate, message):
+    """Test that data the summary calculator rejects gets the calculator's 422"""
+    mutate(test_ride)
+    with pytest.raises(HTTPException) as exc_info:
+        RideIngestValidator.validate_columns(test_ride)
+    assert exc_info.value.status_code == 422
+    assert exc_info.value.detail == message
+
+@pytest.mark.parametrize("mutate, loc, msg", [
+    (lambda r: r["waypoints"][1].update(timestamp="2024-13-45T25:00:00Z"), ("body", "waypoints", 1, "timestamp"),
+     "Value error, Invalid timestamp format. Expected ISO format: month must be in 1..12"),
+    (lambda r: r.update(number_waypoints=3), ("body",),
+     "Value error, number_waypoints (3) must match length of waypoints list (2)"),
+    (lambda r: r.update(end_time="2024-03-15T09:00:00Z"), ("body",),
+     "Value error, end_time (2024-03-15T09:00:00Z) must be after start_time (2024-03-15T10:00:00Z)"),
+    (lambda r: r["waypoints"][0].pop("lat"), ("body", "waypoints", 0, "lat"), "Field required"),
+    (lambda r: r["waypoints"][0].update(lon="west"), ("body", "waypoints", 0, "lon"),
+     "Input should be a valid number, unable to parse string as a number"),
+    (lambda r: r.pop("name"), ("body", "name"), "Field required"),
+])
+def test_model_errors_rejected(test_ride, mutate, loc, msg):
+    """Test that model errors carry the loc and msg pydantic would report"""
+    mutate(test_ride)
+    with pytest.raises(RequestValidationError) as exc_info:
+        RideIngestValidator.validate_columns(test_ride)
+    [error] = exc_info.value.errors()
+    assert error["loc"] == loc
+    assert error["msg"] == msg
+
+def test_empty_waypoints_rejected(test_ride):
+    """Test that a ride without waypoints is rejected like the summary calculator does"""
+    test_ride["waypoints"] = []
+    test_ride["number_waypoints"] = 0
+    with pytest.raises(HTTPException) as exc_info:
+        RideIngestValidator.validate_columns(test_ride)
+    assert "At least one waypoint is required" in exc_info.value.detail
@@ -2,7 +2,7 @@ from datetime import datetime
 import pytest
 from fastapi import HTTPException
 from app.models.waypoint import Waypoint
-from app.services.ride_summary_calculator import RideSummaryCalculator
+from app.services.ride_summary_calculator import RideSummaryAccumulator, RideSummaryCalculator
 
 def test_empty_waypoints():
     """Test summary calculation with no waypoints"""
@@ -100,4 +100,80 @@ def test_non_chronological_timestamps():
     with pytest.raises(HTTPException) as exc_info:
         RideSummaryCalculator.calculate_summary(waypoints)
     assert exc_info.value.status_code == 422
-    assert "chronological order" in str(exc_info.value.detail).lower()
\ No newline at end of file
+    assert "chronological order" in str(exc_info.value.detail).lower()
+def test_equal_consecutive_timestamps_allowed():
+    """Test that repeated timestamps count as chronological and add no speed sample"""
+    waypoints = [
+        Waypoint(lat=0.0, lon=0.0, elevation_ft=100.0, timestamp="2024-03-15T10:00:00Z"),
+        Waypoint(lat=0.0, lon=0.0, elevation_ft=100.0, timestamp="2024-03-15T10:00:00Z"),
+        Waypoint(lat=0.014483, lon=0.0, elevation_ft=100.0, timestamp="2024-03-15T10:30:00Z"),
+    ]
+    RideSummaryCalculator.validate_chronological([1.0, 1.0, 2.0])
+    summary = RideSummaryCalculator.calculate_summary(waypoints)
+    assert summary.max_speed_mph == 2.0
+    assert summary.elapsed_time == "00:30:00"
+
+def test_validate_chronological_rejects_decrease():
+    """Test that a single step backwards fails the linear scan"""
+    with pytest.raises(HTTPException) as exc_info:
+        RideSummaryCalculator.validate_chronological([1.0, 3.0, 2.0, 4.0])
+    assert exc_info.value.status_code == 422
+    RideSummaryCalculator.validate_chronological([])
+
+def test_mixed_naive_and_aware_timestamps():
+    """Test that naive timestamps are treated as UTC alongside aware ones"""
+    waypoints = [
+        Waypoint(lat=37.7749, lon=-122.4194, elevation_ft=100.0, timestamp="2024-03-15T10:00:00"),
+        Waypoint(lat=37.7750, lon=-122.4195, elevation_ft=110.0, timestamp="2024-03-15T10:30:00+00:00"),
+        Waypoint(lat=37.7751, lon=-122.4196, elevation_ft=120.0, timestamp="2024-03-15T04:15:00-07:00"),
+    ]
+    assert RideSummaryCalculator.to_epochs(waypoints) == [1710496800.0, 1710498600.0, 1710501300.0]
+    summary = RideSummaryCalculator.calculate_summary(waypoints)
+    assert summary.elapsed_time == "01:15:00"
+
+def test_to_epochs_rejects_invalid_format():
+    """Test that unparseable timestamps raise a 422"""
+    waypoint = Waypoint.model_construct(lat=0.0, lon=0.0, elevation_ft=0.0, timestamp="yesterday")
+    with pytest.raises(HTTPException) as exc_info:
+        RideSummaryCalculator.to_epochs([waypoint])
+    assert exc_info.value.status_code == 422
+    assert "Invalid timestamp format" in exc_info.value.detail
+
+def test_caller_supplied_epochs():
+    """Test that precomputed epochs are used instead of re-parsing timestamps"""
+    waypoints = [
+        Waypoint(lat=0.0, lon=0.0, elevation_ft=100.0, timestamp="2024-03-15T10:00:00Z"),
+        Waypoint(lat=0.014483, lon=0.0, elevation_ft=110.0, timestamp="2024-03-15T10:30:00Z"),
+    ]
+    # One hour apart according to the supplied epochs, regardless of the strings
+    summary = RideSummaryCalculator.calculate_summary(waypoints, epochs=[0.0, 3600.0])
+    assert summary.elapsed_time == "01:00:00"
+    assert summary.max_speed_mph == 1.0
+
+    with pytest.raises(HTTPException):
+        RideSummaryCalculator.calculate_summary(waypoints, epochs=[3600.0, 0.0])
+    # Validation is skipped entirely when the caller says the data is checked
+    unchecked = RideSummaryCalculator.calculate_summary(waypoints, validate=False, epochs=[0.0, 1800.0])
+    assert unchecked.max_speed_mph == 2.0
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 50])
+def test_accumulator_matches_calculate_summary(chunk_size):
+    """Folding waypoints in chunks gives the same summary as one pass"""
+    waypoints = [
+        Waypoint(lat=44.5 + i * 0.0004, lon=-103.9 + (i % 7) * 0.0003, elevation_ft=3600.0 + (i % 11) * 3.5,
+                 timestamp=f"2024-03-15T10:{i // 60:02d}:{i % 60:02d}Z")
+        for i in range(0, 150, 3)
+    ]
+    epochs = RideSummaryCalculator.to_epochs(waypoints)
+    accumulator = RideSummaryAccumulator()
+    for start in range(0, len(waypoints), chunk_size):
+        accumulator.fold(waypoints[start:start + chunk_size], epochs[start:start + chunk_size])
+    assert accumulator.summary() == RideSummaryCalculator.calculate_summary(waypoints)
+
+def test_accumulator_single_and_empty():
+    accumulator = RideSummaryAccumulator()
+    with pytest.raises(HTTPException):
+        accumulator.summary()
+    waypoint = Waypoint(lat=37.7749, lon=-122.4194, elevation_ft=100.0, timestamp="2024-03-15T10:00:00Z")
+    accumulator.fold([waypoint], RideSummaryCalculator.to_epochs([waypoint]))
+    assert accumulator.summary() == RideSummaryCalculator.calculate_summary([waypoint])
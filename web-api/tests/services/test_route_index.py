@@ -0,0 +1,61 @@
+import random
+from math import cos, pi, sin
+from types import SimpleNamespace
+import pytest
+from app.models.waypoint import Waypoint
+from app.services.route_index import RouteIndex
+
+def _ride(points):
+    return SimpleNamespace(waypoints=[
+        Waypoint.model_construct(lat=lat, lon=lon, elevation_ft=0.0, timestamp="2024-03-15T10:00:00Z")
+        for lat, lon in points
+    ])
+
+def _loop(lat, lon, radius_deg=0.03, points=200, jitter=0.0, seed=0):
+    rng = random.Random(seed)
+    return [
+        (lat + radius_deg * sin(2 * pi * i / points) + rng.uniform(-jitter, jitter),
+         lon + radius_deg * 1.3 * cos(2 * pi * i / points) + rng.uniform(-jitter, jitter))
+        for i in range(points + 1)
+    ]
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    RouteIndex.clear()
+    yield
+    RouteIndex.clear()
+
+def test_same_loop_in_either_direction_is_similar():
+    loop = _loop(44.5, -103.9)
+    RouteIndex.add(1, _ride(loop))
+    RouteIndex.add(2, _ride(list(reversed(_loop(44.5, -103.9, jitter=0.0001, seed=1)))))
+    RouteIndex.add(3, _ride(_loop(44.6, -103.7)))
+
+    similar = RouteIndex.similar(1)
+    assert [entry["id"] for entry in similar] == [2]
+    assert similar[0]["similarity"] > 0.7
+
+def test_sparse_waypoints_are_resampled():
+    dense = _loop(44.5, -103.9, points=400)
+    sparse = _loop(44.5, -103.9, points=40)
+    # ~0.35 mi between sparse waypoints, several cells apart
+    dense_cells = RouteIndex.route_cells(_ride(dense))
+    sparse_cells = RouteIndex.route_cells(_ride(sparse))
+    assert len(sparse_cells & dense_cells) > 0.9 * len(dense_cells)
+
+def test_unindexed_ride_is_matched_from_its_track():
+    RouteIndex.add(1, _ride(_loop(44.5, -103.9)))
+    assert [entry["id"] for entry in RouteIndex.similar(9, _ride(_loop(44.5, -103.9, seed=2, jitter=0.0001)))] == [1]
+    assert RouteIndex.similar(9) == []
+
+def test_remove_and_clusters():
+    for ride_id in (1, 2, 3):
+        RouteIndex.add(ride_id, _ride(_loop(44.5, -103.9, jitter=0.0001, seed=ride_id)))
+    for ride_id in (4, 5):
+        RouteIndex.add(ride_id, _ride(_loop(45.0, -104.5, jitter=0.0001, seed=ride_id)))
+    RouteIndex.add(6, _ride(_loop(46.0, -105.0)))
+    assert RouteIndex.clusters() == [[1, 2, 3], [4, 5]]
+
+    RouteIndex.remove(2)
+    assert [entry["id"] for entry in RouteIndex.similar(1)] == [3]
+    assert RouteIndex.clusters() == [[1, 3], [4, 5]]
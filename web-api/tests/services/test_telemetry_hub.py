@@ -0,0 +1,58 @@
+import asyncio
+from app.services.telemetry_hub import TelemetryChannel, TelemetryHub
+
+def _update(n):
+    return f'{{"distance_miles":{n}}}'
+
+def test_swarm_receives_every_update_in_order():
+    async def scenario():
+        channel = TelemetryHub.attach_publisher("swarm")
+        received = {}
+
+        async def viewer(index):
+            sub = TelemetryHub.attach_subscriber("swarm")
+            cursor, seqs = sub.start_cursor(), []
+            while True:
+                update, cursor, dropped = await sub.read(cursor)
+                assert dropped == 0
+                if update is None:
+                    break
+                seqs.append(update[0])
+            TelemetryHub.detach_subscriber("swarm", sub)
+            received[index] = seqs
+
+        viewers = [asyncio.create_task(viewer(i)) for i in range(500)]
+        await asyncio.sleep(0)
+        for n in range(1, 101):
+            channel.publish(_update(n))
+            await asyncio.sleep(0)
+        TelemetryHub.detach_publisher("swarm", channel)
+        await asyncio.gather(*viewers)
+        return received
+
+    received = asyncio.run(scenario())
+    assert len(received) == 500
+    assert all(seqs == list(range(1, 101)) for seqs in received.values())
+    assert "swarm" not in TelemetryHub.sessions()
+
+def test_slow_subscriber_skips_ahead():
+    async def scenario():
+        channel = TelemetryChannel(buffer_size=10)
+        cursor = channel.start_cursor()
+        for n in range(1, 26):
+            channel.publish(_update(n))
+        update, cursor, dropped = await channel.read(cursor)
+        return update, cursor, dropped
+
+    update, cursor, dropped = asyncio.run(scenario())
+    # Updates 1-15 fell out of the ring; the viewer resumes at the oldest buffered one
+    assert dropped == 15
+    assert update[0] == 16 and cursor == 17
+    assert update[1] == '{"type":"update","seq":16,"data":{"distance_miles":16}}'
+
+def test_publish_cost_is_independent_of_viewers():
+    channel = TelemetryChannel(buffer_size=4)
+    for n in range(10):
+        channel.publish(_update(n))
+    assert len(channel.buffer) == 4
+    assert channel.buffer[-1][0] == 10
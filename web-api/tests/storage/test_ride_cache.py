@@ -0,0 +1,76 @@
+import pytest
+from app.models.ride import Ride
+from app.models.ride_with_summary import RideWithSummary
+from app.services.ride_summary_calculator import RideSummaryCalculator
+from app.storage import RideCache, TieredRideStore
+
+@pytest.fixture
+def stored_ride(test_ride):
+    ride = Ride(**test_ride)
+    return RideWithSummary(**ride.model_dump(), summary=RideSummaryCalculator.calculate_summary(ride.waypoints))
+
+def _named(ride, name):
+    return ride.model_copy(update={"name": name})
+
+def test_pack_round_trip(stored_ride):
+    blob = RideCache.pack(stored_ride)
+    assert RideCache.unpack(blob).model_dump() == stored_ride.model_dump()
+
+def test_hot_rides_demoted_and_spilled(tmp_path, stored_ride):
+    size = RideCache.estimate_size(stored_ride)
+    blob_size = len(RideCache.pack(stored_ride))
+    # Room for two hot rides and one warm blob
+    cache = RideCache(2 * size + blob_size, hot_fraction=2 * size / (2 * size + blob_size),
+                      spill_dir=str(tmp_path))
+    for ride_id in range(1, 5):
+        cache[ride_id] = _named(stored_ride, f"Ride {ride_id}")
+
+    stats = cache.stats()
+    assert (stats["hot_rides"], stats["warm_rides"], stats["cold_rides"]) == (2, 1, 1)
+    assert stats["demotions"] == 2 and stats["spills"] == 1
+    assert stats["hot_bytes"] <= cache.hot_budget and stats["warm_bytes"] <= cache.warm_budget
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1.ride"]
+
+    # Reading a cold ride promotes it and pushes the least recently used ride down
+    assert cache.get(1).name == "Ride 1"
+    assert cache.get(1).name == "Ride 1"
+    assert cache.get(2).name == "Ride 2"
+    assert cache.get(99) is None
+    stats = cache.stats()
+    assert (stats["hot_hits"], stats["warm_hits"], stats["cold_hits"], stats["misses"]) == (1, 0, 2, 1)
+    assert len(cache) == 4
+    assert list(cache.keys()) == [1, 2, 3, 4]
+
+def test_lru_order_respects_reads(tmp_path, stored_ride):
+    size = RideCache.estimate_size(stored_ride)
+    cache = RideCache(2 * size, hot_fraction=1.0, spill_dir=str(tmp_path))
+    cache[1] = _named(stored_ride, "one")
+    cache[2] = _named(stored_ride, "two")
+    cache.get(1)
+    cache[3] = _named(stored_ride, "three")
+    # Ride 2 was least recently used, so it is the one that left the hot tier
+    assert cache.stats()["cold_rides"] == 1
+    assert (tmp_path / "2.ride").exists()
+
+def test_delete_and_close_remove_spill_files(tmp_path, stored_ride):
+    cache = RideCache(0, spill_dir=str(tmp_path))
+    cache[1] = stored_ride
+    cache[2] = stored_ride
+    assert (tmp_path / "1.ride").exists()
+    del cache[1]
+    assert not (tmp_path / "1.ride").exists()
+    with pytest.raises(KeyError):
+        del cache[1]
+    cache[3] = stored_ride
+    cache.close()
+    assert list(tmp_path.iterdir()) == []
+
+def test_tiered_store_scans_without_promoting(tmp_path, stored_ride):
+    store = TieredRideStore(0, spill_dir=str(tmp_path))
+    for n in range(3):
+        store.add(_named(stored_ride, f"Ride {n}"), f"hash-{n}")
+    assert [ride.name for _, ride in store.items()] == ["Ride 0", "Ride 1", "Ride 2"]
+    stats = store.stats()
+    assert stats["hot_hits"] + stats["warm_hits"] + stats["cold_hits"] == 0
+    assert stats["cold_rides"] == 2
+    store.close()
@@ -0,0 +1,124 @@
+import multiprocessing
+import sqlite3
+import threading
+import pytest
+from app.models.ride import Ride
+from app.services.ride_service import RideService
+from app.services.ride_summary_calculator import RideSummaryCalculator
+from app.models.ride_with_summary import RideWithSummary
+from app.storage import ContentHashConflict, MemoryRideStore, SqliteRideStore, TieredRideStore
+
+@pytest.fixture(params=["memory", "sqlite", "tiered"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryRideStore()
+    elif request.param == "sqlite":
+        store = SqliteRideStore(str(tmp_path / "rides.db"))
+    else:
+        # A zero budget keeps only the most recent ride hot and spills the rest to disk
+        store = TieredRideStore(0, spill_dir=str(tmp_path / "spill"))
+    yield store
+    store.close()
+
+@pytest.fixture
+def stored_ride(test_ride):
+    ride = Ride(**test_ride)
+    return RideWithSummary(**ride.model_dump(), summary=RideSummaryCalculator.calculate_summary(ride.waypoints))
+
+def test_add_and_get(store, stored_ride):
+    ride_id, created = store.add(stored_ride, "hash-1")
+    assert created
+    loaded = store.get(ride_id)
+    assert loaded.model_dump() == stored_ride.model_dump()
+    assert store.get(ride_id + 1) is None
+
+def test_duplicate_hash_and_key(store, stored_ride):
+    ride_id, _ = store.add(stored_ride, "hash-1", "key-1")
+    assert store.add(stored_ride, "hash-1") == (ride_id, False)
+    assert store.add(stored_ride, "hash-2", "key-1") == (ride_id, False)
+    assert store.find_by_hash("hash-1") == ride_id
+    assert store.find_idempotency_key("key-1") == (ride_id, "hash-1")
+
+    store.link_idempotency_key("key-2", ride_id, "hash-1")
+    assert store.find_idempotency_key("key-2") == (ride_id, "hash-1")
+    assert store.find_idempotency_key("unknown") is None
+
+def test_replace_items_and_delete(store, stored_ride):
+    first, _ = store.add(stored_ride, "hash-1", "key-1")
+    second, _ = store.add(stored_ride, "hash-2")
+    assert second != first
+
+    renamed = stored_ride.model_copy(update={"name": "Renamed"})
+    assert store.replace(first, renamed, "hash-1b")
+    assert [(ride_id, ride.name) for ride_id, ride in store.items()] == [(first, "Renamed"), (second, "Test Ride")]
+    assert store.find_by_hash("hash-1") is None
+    assert store.find_by_hash("hash-1b") == first
+    with pytest.raises(ContentHashConflict):
+        store.replace(first, renamed, "hash-2")
+
+    assert store.delete(first)
+    assert not store.delete(first)
+    assert not store.replace(first, renamed, "hash-1b")
+    assert store.find_by_hash("hash-1b") is None
+    assert store.find_idempotency_key("key-1") is None
+    assert store.find_by_hash("hash-2") == second
+
+def _add_rides(path, worker, count, ride_data, results):
+    store = SqliteRideStore(path)
+    ride = RideWithSummary.from_trusted_dict(ride_data)
+    ids = [store.add(ride, f"{worker}-{i}")[0] for i in range(count)]
+    store.close()
+    results.put(ids)
+
+def test_sqlite_ids_unique_across_processes(tmp_path, stored_ride):
+    """Concurrent worker processes sharing one file never hand out the same ID"""
+    path = str(tmp_path / "shared.db")
+    SqliteRideStore(path).close()
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_add_rides, args=(path, n, 20, stored_ride.model_dump(), results), daemon=True)
+        for n in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        ids = [i for _ in workers for i in results.get(timeout=60)]
+    finally:
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.kill()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+    assert len(ids) == len(set(ids)) == 60
+
+def test_service_with_sqlite_store(client, tmp_path, test_ride):
+    RideService.use_store(SqliteRideStore(str(tmp_path / "service.db")))
+    try:
+        created = client.post("/api/rides/upload", json=test_ride).json()
+        assert client.post("/api/rides/upload", json=test_ride).json()["duplicate"] is True
+        response = client.get(f"/api/rides/{created['id']}")
+        assert response.status_code == 200
+        assert response.json() == created["ride"]
+        assert [ride["id"] for ride in client.get("/api/rides/").json()] == [created["id"]]
+    finally:
+        RideService.use_store(MemoryRideStore())
+
+def test_sqlite_close_releases_all_thread_connections(tmp_path, stored_ride):
+    store = SqliteRideStore(str(tmp_path / "threads.db"))
+    opened = []
+    thread = threading.Thread(target=lambda: opened.append(store._connection()))
+    thread.start()
+    thread.join()
+
+    store.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+    # The store reconnects lazily after closing
+    assert store.add(stored_ride, "hash-1") == (1, True)
+    store.close()
+
+def test_items_span_scan_batches(store, stored_ride):
+    store.SCAN_BATCH_SIZE = 2  # only read by the SQLite store
+    ids = [store.add(stored_ride, f"hash-{i}")[0] for i in range(5)]
+    assert [ride_id for ride_id, _ in store.items()] == ids
@@ -42,8 +42,10 @@ def test_get_nonexistent_ride(client):
     assert response.json()["detail"] == "Ride not found"
 
 def test_list_rides(client, created_ride, test_ride):
-    # Create a second ride to ensure we have at least two
-    response = client.post("/api/rides/upload", json=test_ride)
+    # Create a second, different ride to ensure we have at least two
+    # (re-sending the same ride would be deduplicated)
+    second_ride = {**test_ride, "name": "Second Test Ride"}
+    response = client.post("/api/rides/upload", json=second_ride)
     assert response.status_code == 200
     
     response = client.get("/api/rides/")